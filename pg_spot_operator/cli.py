@@ -1,8 +1,10 @@
+import atexit
 import fcntl
 import logging
 import os.path
 import re
 import shutil
+import time
 
 import humanize
 import requests
@@ -11,8 +13,20 @@ from prettytable import PrettyTable
 from tap import Tap
 
 from pg_spot_operator import cloud_api, cmdb, manifests, operator
-from pg_spot_operator.cloud_api import get_spot_pricing_summary_for_region
-from pg_spot_operator.cloud_impl.aws_client import set_access_keys
+from pg_spot_operator.cloud_api import get_spot_pricing_summaries_for_regions
+from pg_spot_operator.cloud_impl import (
+    aws_api_stats,
+    aws_cache,
+    aws_client,
+    aws_describe_cache,
+    aws_spot,
+    http_client,
+    pricing_bundle,
+)
+from pg_spot_operator.cloud_impl.aws_client import (
+    set_access_keys,
+    set_transport_profile,
+)
 from pg_spot_operator.cloud_impl.aws_spot import (
     get_all_active_operator_instances_from_region,
     get_current_hourly_spot_price_static,
@@ -21,10 +35,10 @@ from pg_spot_operator.cloud_impl.aws_spot import (
 from pg_spot_operator.cloud_impl.aws_vm import (
     get_operator_volumes_in_region_full,
 )
-from pg_spot_operator.cloud_impl.cloud_structs import (
-    InstanceTypeInfo,
-    RegionalSpotPricingStats,
+from pg_spot_operator.cloud_impl.aws_spot_summary import (
+    get_eviction_rate_group_labels,
 )
+from pg_spot_operator.cloud_impl.cloud_structs import InstanceTypeInfo
 from pg_spot_operator.cloud_impl.cloud_util import (
     add_aws_tags_dict_from_list_tags,
     extract_instance_storage_disk_count_from_aws_pricing_storage_string,
@@ -57,6 +71,7 @@ from pg_spot_operator.util import (
     extract_mtf_months_from_eviction_rate_group_label,
     extract_region_from_az,
     get_aws_region_code_to_name_mapping,
+    get_timed_cache_stats,
     region_regex_to_actual_region_codes,
     timestamp_to_human_readable_delta,
     try_download_ansible_from_github,
@@ -103,6 +118,22 @@ class ArgumentParser(Tap):
         os.getenv("MAIN_LOOP_INTERVAL_S")
         or 60  # Increase if causing too many calls to the cloud API
     )
+    price_cache_max_staleness_s: int = int(
+        os.getenv("PRICE_CACHE_MAX_STALENESS_S")
+        or aws_cache.DEFAULT_PRICE_CACHE_MAX_STALENESS_S
+    )  # Serve cached AWS pricing info up to given age while refreshing in the background. 0 = always wait for a refresh
+    price_cache_max_mb: int = int(
+        os.getenv("PRICE_CACHE_MAX_MB")
+        or aws_cache.DEFAULT_PRICE_CACHE_MAX_BYTES // (1024 * 1024)
+    )  # Least recently used pricing files are pruned over that
+    region_concurrency: int = int(
+        os.getenv("REGION_CONCURRENCY")
+        or cloud_api.DEFAULT_REGION_RESOLVE_CONCURRENCY
+    )  # Max regions resolved in parallel for multi-region price checks. Lower if hitting EC2 API throttling
+    price_stats_window_days: float = float(
+        os.getenv("PRICE_STATS_WINDOW_DAYS")
+        or aws_spot.DEFAULT_SPOT_PRICE_STATS_WINDOW_DAYS
+    )  # Spot price history period for the price-stability selection strategy
     config_dir: str = os.getenv(
         "CONFIG_DIR", "~/.pg-spot-operator"
     )  # For internal state keeping
@@ -118,7 +149,7 @@ class ArgumentParser(Tap):
     )  # Display all known AWS region codes + names and exit
     list_avg_spot_savings: bool = str_to_bool(
         os.getenv("LIST_AVG_SPOT_SAVINGS", "false")
-    )  # Display avg. regional Spot savings and eviction rates to choose the best region. Can apply the --region filter.
+    )  # Display avg. regional Spot savings and eviction rates to choose the best region. Can apply the --region, --cpu-arch and --instance-family filters.
     list_instances: bool = str_to_bool(
         os.getenv("LIST_INSTANCES", "false")
     )  # List running VMs for given region / region wildcards
@@ -128,6 +159,24 @@ class ArgumentParser(Tap):
     list_strategies: bool = str_to_bool(
         os.getenv("LIST_STRATEGIES", "false")
     )  # Display available instance selection strategies and exit
+    export_pricing_bundle: str = os.getenv(
+        "EXPORT_PRICING_BUNDLE", ""
+    )  # Pack cached pricing feeds and AMI info into a .tar.gz file and exit. Feeds are refreshed first for --region if set
+    import_pricing_bundle: str = os.getenv(
+        "IMPORT_PRICING_BUNDLE", ""
+    )  # Load an exported pricing bundle into the local price cache before any other actions
+    offline: bool = str_to_bool(
+        os.getenv("OFFLINE", "false")
+    )  # No HTTP downloads, only use cached / imported pricing info. Doesn't apply to AWS API calls
+    cache_stats: bool = str_to_bool(
+        os.getenv("CACHE_STATS", "false")
+    )  # Show price cache sizes and hit ratios by file kind and exit
+    stats: bool = str_to_bool(
+        os.getenv("STATS", "false")
+    )  # Log AWS API calls per main loop iteration, plus API call / cache telemetry on exit
+    cache_prune: bool = str_to_bool(
+        os.getenv("CACHE_PRUNE", "false")
+    )  # Apply price cache retention and size limits and exit
     list_vm_creates: bool = str_to_bool(
         os.getenv("LIST_VM_CREATES", "false")
     )  # Show VM provisioning times for active instances. Region / instance name filtering applies
@@ -258,6 +307,24 @@ class ArgumentParser(Tap):
         "AWS_VPC_ID", ""
     )  # If not set default VPC in region used
     aws_subnet_id: str = os.getenv("AWS_SUBNET_ID", "")
+    aws_retry_mode: str = os.getenv(
+        "AWS_RETRY_MODE", ""
+    )  # legacy | standard | adaptive. Adaptive also rate limits client side on throttling
+    aws_max_attempts: int = int(
+        os.getenv("AWS_MAX_ATTEMPTS") or 0
+    )  # Per API call, including the initial one. 0 = retry mode default
+    aws_max_pool_connections: int = int(
+        os.getenv("AWS_MAX_POOL_CONNECTIONS") or 0
+    )  # Per client. 0 = botocore default of 10
+    aws_connect_timeout_s: float = float(
+        os.getenv("AWS_CONNECT_TIMEOUT_S") or 0
+    )  # 0 = botocore default of 60s
+    aws_read_timeout_s: float = float(
+        os.getenv("AWS_READ_TIMEOUT_S") or 0
+    )  # 0 = botocore default of 60s
+    aws_tcp_keepalive: bool = str_to_bool(
+        os.getenv("AWS_TCP_KEEPALIVE", "false")
+    )
     self_termination_access_key_id: str = os.getenv(
         "SELF_TERMINATION_ACCESS_KEY_ID", ""
     )
@@ -785,6 +852,9 @@ def display_selected_skus_for_region(
             "Evic. rate",
         ]
     ]
+    show_price_stats = any(x.spot_price_p50 for x in selected_skus)
+    if show_price_stats:
+        table[0].append("Price volatility (%)")
 
     for i in selected_skus:
         if not i.monthly_ondemand_price:
@@ -809,8 +879,12 @@ def display_selected_skus_for_region(
             ]
         )
         ram_gb = round(i.ram_mb / 1024)
-        disks_count = extract_instance_storage_disk_count_from_aws_pricing_storage_string(
-            i.provider_description
+        disks_count = (
+            extract_instance_storage_disk_count_from_aws_pricing_storage_string(
+                i.provider_description
+            )
+            if i.provider_description
+            else i.instance_storage_disks
         )
         table.append(
             [
@@ -847,6 +921,12 @@ def display_selected_skus_for_region(
                 ),
             ]
         )
+        if show_price_stats:
+            table[-1].append(
+                f"{round(i.spot_price_volatility * 100, 1)} ({i.spot_price_changes} changes)"
+                if i.spot_price_p50
+                else "N/A"
+            )
 
     tab = PrettyTable(table[0])
     tab.add_rows(table[1:])
@@ -874,9 +954,15 @@ def resolve_manifest_and_display_price(
         ),
     )
 
+    set_transport_profile(**m.aws.transport.model_dump())
     use_boto3: bool = False
     # Set AWS creds if AZ set, AZ-specific pricing info not available over static API
-    if m.availability_zone or (
+    if http_client.offline:
+        if m.availability_zone:
+            logger.warning(
+                "AZ specific pricing not available in --offline mode, showing region level prices"
+            )
+    elif m.availability_zone or (
         (m.aws.access_key_id and m.aws.secret_access_key) or m.aws.profile_name
     ):
         m.decrypt_secrets_if_any()
@@ -1112,6 +1198,161 @@ def list_strategies_and_exit() -> None:
     exit(0)
 
 
+def export_pricing_bundle_and_exit(args: ArgumentParser) -> None:
+    regions: list[str] = []
+    if args.region:
+        regions = (
+            [args.region]
+            if is_explicit_aws_region_code(args.region)
+            else region_regex_to_actual_region_codes(args.region)
+        )
+    manifest = pricing_bundle.export_pricing_bundle(
+        args.export_pricing_bundle, regions
+    )
+    print(
+        f"Exported {len(manifest['files'])} files to {args.export_pricing_bundle}"
+    )
+    exit(0)
+
+
+def import_pricing_bundle_and_exit_if_nothing_else_to_do(
+    args: ArgumentParser,
+) -> None:
+    try:
+        manifest = pricing_bundle.import_pricing_bundle(
+            args.import_pricing_bundle
+        )
+    except Exception as e:
+        logger.error("Failed to import pricing bundle: %s", e)
+        exit(1)
+    args.import_pricing_bundle = ""
+    if not any_action_flags_set(args):
+        print(
+            f"Imported {len(manifest['files'])} files from the pricing bundle"
+        )
+        exit(0)
+
+
+def show_price_cache_stats_and_exit() -> None:
+    stats = aws_cache.get_price_cache_stats()
+    tab = PrettyTable(
+        [
+            "Kind",
+            "Files",
+            "Size",
+            "Hits",
+            "Misses",
+            "Hit Ratio",
+            "Oldest",
+            "Last Access",
+        ]
+    )
+    for kind, s in sorted(stats.items()):
+        reads = s["hits"] + s["misses"]
+        tab.add_row(
+            [
+                kind,
+                s["files"],
+                humanize.naturalsize(s["bytes"]),
+                s["hits"],
+                s["misses"],
+                f"{round(100.0 * s['hits'] / reads)}%" if reads else "-",
+                (
+                    humanize.naturaltime(time.time() - s["oldest_mtime"])
+                    if s["files"]
+                    else "-"
+                ),
+                (
+                    humanize.naturaltime(time.time() - s["last_access"])
+                    if s["files"]
+                    else "-"
+                ),
+            ]
+        )
+    print(tab)
+    print(
+        "Total size:",
+        humanize.naturalsize(sum(s["bytes"] for s in stats.values())),
+        "/ budget:",
+        humanize.naturalsize(aws_cache.price_cache_max_bytes),
+    )
+    exit(0)
+
+
+def get_latency_percentile_ms_str(
+    latency_buckets: list[int], pct: float
+) -> str:
+    """Histogram based, so only an upper bound e.g. <=250"""
+    if not sum(latency_buckets):
+        return "-"
+    upper_bound_s = aws_api_stats.get_latency_percentile(latency_buckets, pct)
+    if upper_bound_s == float("inf"):
+        return f">{round(1000 * aws_api_stats.LATENCY_BUCKETS_S[-1])}"
+    return f"<={round(1000 * upper_bound_s)}"
+
+
+def log_runtime_stats() -> None:
+    """In-process AWS API call, describe cache, function cache and HTTP download counters"""
+    api_stats = aws_api_stats.get_api_call_stats()
+    if api_stats:
+        tab = PrettyTable(
+            [
+                "Service",
+                "Operation",
+                "Region",
+                "Calls",
+                "Cached",
+                "Errors",
+                "Retries",
+                "Throttles",
+                "Avg ms",
+                "P90 ms",
+                "Max ms",
+            ]
+        )
+        for (service, operation, region), s in sorted(api_stats.items()):
+            timed_calls = s["calls"] - s["cached"]
+            tab.add_row(
+                [
+                    service,
+                    operation,
+                    region,
+                    s["calls"],
+                    s["cached"],
+                    s["errors"],
+                    s["retries"],
+                    s["throttles"],
+                    (
+                        round(1000 * s["seconds"] / timed_calls)
+                        if timed_calls
+                        else "-"
+                    ),
+                    get_latency_percentile_ms_str(s["latency_buckets"], 90),
+                    round(1000 * s["max_seconds"]),
+                ]
+            )
+        logger.info("AWS API calls:\n%s", tab)
+    else:
+        logger.info("No AWS API calls made")
+    logger.info(
+        "EC2 describe cache: %s", aws_describe_cache.describe_cache_stats
+    )
+    for name, info in sorted(get_timed_cache_stats().items()):
+        if info["hits"] or info["misses"]:
+            logger.info("Function cache %s: %s", name, info)
+    for host, info in sorted(http_client.get_http_download_stats().items()):
+        logger.info("HTTP downloads from %s: %s", host, info)
+
+
+def prune_price_cache_and_exit() -> None:
+    pruned = aws_cache.try_prune_price_cache()
+    print(
+        f"Deleted {pruned.get('deleted_files', 0)} files, freed {humanize.naturalsize(pruned.get('freed_bytes', 0))}. "
+        f"Price cache size now {humanize.naturalsize(pruned.get('total_bytes', 0))}"
+    )
+    exit(0)
+
+
 def list_instances_and_exit(args: ArgumentParser) -> None:
     regions: list[str] = []
 
@@ -1452,20 +1693,30 @@ def show_regional_spot_pricing_and_eviction_summary_and_exit(
         args.region,
         regions,
     )
-    reg_pricing: list[RegionalSpotPricingStats] = []
-    for reg in regions:
-        try:
-            reg_pricing.append(get_spot_pricing_summary_for_region(reg))
-        except Exception as e:
-            logger.warning(str(e))
+    try:
+        reg_pricing = get_spot_pricing_summaries_for_regions(
+            regions,
+            cpu_arch=args.cpu_arch,
+            instance_family=args.instance_family,
+        )
+    except Exception as e:
+        logger.error(str(e))
+        exit(1)
+    if not reg_pricing:
+        logger.error("No Spot eviction rate info found for given filters")
+        exit(1)
     reg_pricing.sort(key=lambda x: x.avg_spot_savings_rate, reverse=True)
 
+    ev_rate_labels = get_eviction_rate_group_labels()
     table: list[list] = [
         [
             "Region",
             "Avg. Spot EC2 Discount",
+            "Median / P90 Discount",
             "Expected Eviction Rate (Mo)",
             "Mean Time to Eviction (Mo)",
+            "Instance Types",
+            "By Eviction Rate (" + " / ".join(ev_rate_labels) + ")",
         ]
     ]
     tab = PrettyTable(table[0])
@@ -1478,10 +1729,18 @@ def show_regional_spot_pricing_and_eviction_summary_and_exit(
                 [
                     r.region.ljust(max_reg_len, " "),
                     str(-1 * r.avg_spot_savings_rate) + "%",
+                    f"{-1 * r.median_spot_savings_rate:g}% / {-1 * r.p90_spot_savings_rate:g}%",
                     r.eviction_rate_group_label,
                     extract_mtf_months_from_eviction_rate_group_label(
                         r.eviction_rate_group_label
                     ),
+                    r.instance_type_count,
+                    " / ".join(
+                        str(c)
+                        for _, c in sorted(
+                            r.eviction_rate_group_counts.items()
+                        )
+                    ),
                 ]
             ]
         )
@@ -1507,6 +1766,10 @@ def any_action_flags_set(a: ArgumentParser) -> bool:
         or a.list_instances_cmdb
         or a.list_avg_spot_savings
         or a.list_vm_creates
+        or a.cache_stats
+        or a.cache_prune
+        or a.export_pricing_bundle
+        or a.import_pricing_bundle
         or a.check_price
         or a.check_manifest
         or a.manifest
@@ -1539,6 +1802,27 @@ def main():  # pragma: no cover
         level=(logging.DEBUG if args.verbose else logging.INFO),
     )
 
+    aws_cache.price_cache_max_staleness_s = args.price_cache_max_staleness_s
+    aws_cache.price_cache_max_bytes = args.price_cache_max_mb * 1024 * 1024
+    cloud_api.region_resolve_concurrency = max(args.region_concurrency, 1)
+    aws_spot.spot_price_stats_window_days = args.price_stats_window_days
+    try:
+        aws_client.set_default_transport_profile(
+            retry_mode=args.aws_retry_mode,
+            max_attempts=args.aws_max_attempts,
+            max_pool_connections=args.aws_max_pool_connections,
+            connect_timeout_s=args.aws_connect_timeout_s,
+            read_timeout_s=args.aws_read_timeout_s,
+            tcp_keepalive=args.aws_tcp_keepalive or None,
+        )
+    except ValueError as e:
+        logger.error("%s", e)
+        exit(1)
+    atexit.register(aws_cache.flush_cache_read_stats)
+    if args.stats:
+        atexit.register(log_runtime_stats)
+    http_client.offline = args.offline
+
     if not any_action_flags_set(args):
         if args.vm_host and not args.instance_name:
             logger.error("Custom hosts still need --instance-name")
@@ -1558,6 +1842,18 @@ def main():  # pragma: no cover
     if args.list_strategies:
         list_strategies_and_exit()
 
+    if args.import_pricing_bundle:
+        import_pricing_bundle_and_exit_if_nothing_else_to_do(args)
+
+    if args.export_pricing_bundle:
+        export_pricing_bundle_and_exit(args)
+
+    if args.cache_stats:
+        show_price_cache_stats_and_exit()
+
+    if args.cache_prune:
+        prune_price_cache_and_exit()
+
     if args.check_manifest:
         check_manifest_and_exit(args)
 
@@ -1667,4 +1963,5 @@ def main():  # pragma: no cover
         cli_connstr_format=args.connstr_format,
         cli_ansible_path=args.ansible_path,
         cli_connstr_output_path=args.connstr_output_path,
+        cli_stats=args.stats,
     )
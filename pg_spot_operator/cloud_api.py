@@ -1,26 +1,33 @@
 import logging
-from statistics import mean
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from pg_spot_operator.cloud_impl import aws_spot
 from pg_spot_operator.cloud_impl.aws_cache import (
     get_aws_static_ondemand_pricing_info,
-    get_spot_eviction_rates_from_public_json,
-    get_spot_pricing_from_public_json,
+    get_spot_price_index,
+    get_spot_prices_for_region,
 )
 from pg_spot_operator.cloud_impl.aws_spot import (
-    extract_instance_type_eviction_rates_from_public_eviction_info,
+    build_instance_type_catalog_from_aws_regional_pricing_info,
     get_all_ec2_spot_instance_types,
-    get_all_instance_types_from_aws_regional_pricing_info,
-    get_eviction_rate_brackets_from_public_eviction_info,
-    get_spot_instance_types_with_price_from_s3_pricing_json,
+)
+from pg_spot_operator.cloud_impl.aws_spot_summary import (
+    get_eviction_rate_columns,
+    summarize_spot_savings_and_eviction_rates,
 )
 from pg_spot_operator.cloud_impl.cloud_structs import (
-    EvictionRateInfo,
     InstanceTypeInfo,
     RegionalSpotPricingStats,
 )
 from pg_spot_operator.cloud_impl.cloud_util import (
     extract_cpu_arch_from_sku_desc,
+    extract_instance_storage_disk_count_from_aws_pricing_storage_string,
+)
+from pg_spot_operator.cloud_impl.instance_catalog import (
+    SPEC_SOURCE_BOTO3,
+    InstanceTypeCatalog,
+    get_instance_spec_table,
 )
 from pg_spot_operator.constants import (
     CLOUD_AWS,
@@ -31,33 +38,114 @@ from pg_spot_operator.manifests import InstanceManifest
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_REGION_RESOLVE_CONCURRENCY = 8
+# Max regions resolved in parallel. Each boto3 mode region does a few paginated EC2 calls
+region_resolve_concurrency = DEFAULT_REGION_RESOLVE_CONCURRENCY
 
-def boto3_api_instance_list_to_instance_type_info(
+
+def build_instance_type_catalog_from_boto3_instance_types(
     region: str, boto3_instance_type_infos: list[dict]
-) -> list[InstanceTypeInfo]:
-    ret = []
+) -> InstanceTypeCatalog:
+    """Specs are parsed only for instance types not yet seen in any region"""
+    specs = get_instance_spec_table(SPEC_SOURCE_BOTO3)
+    catalog = InstanceTypeCatalog(region, specs=specs)
     for ii in boto3_instance_type_infos:
-        sku = InstanceTypeInfo(
-            region=region,
-            cloud=CLOUD_AWS,
-            instance_type=ii["InstanceType"],
-            arch=extract_cpu_arch_from_sku_desc(CLOUD_AWS, ii),
-        )
-        sku.cpu = ii["VCpuInfo"]["DefaultVCpus"]
-        sku.ram_mb = ii["MemoryInfo"]["SizeInMiB"]
-        if ii.get("InstanceStorageSupported"):
-            sku.instance_storage = ii.get("InstanceStorageInfo", {}).get(
-                "TotalSizeInGB", 0
+        spec_row = specs.rows_by_instance_type.get(ii["InstanceType"])
+        if spec_row is None:
+            storage_info = ii.get("InstanceStorageInfo", {})
+            spec_row = specs.add(
+                ii["InstanceType"],
+                extract_cpu_arch_from_sku_desc(CLOUD_AWS, ii),
+                cpu=ii["VCpuInfo"]["DefaultVCpus"],
+                ram_mb=ii["MemoryInfo"]["SizeInMiB"],
+                instance_storage=(
+                    storage_info.get("TotalSizeInGB", 0)
+                    if ii.get("InstanceStorageSupported")
+                    else 0
+                ),
+                instance_storage_disks=extract_instance_storage_disk_count_from_aws_pricing_storage_string(
+                    ii
+                ),
+                storage_speed_class=(
+                    storage_info["Disks"][0]["Type"]
+                    if storage_info.get("Disks")
+                    else "hdd"
+                ),
+                is_burstable=bool(ii.get("BurstablePerformanceSupported")),
             )
-        if ii.get("InstanceStorageInfo", {}).get("Disks"):
-            sku.storage_speed_class = ii["InstanceStorageInfo"]["Disks"][0][
-                "Type"
-            ]
-        sku.is_burstable = bool(ii.get("BurstablePerformanceSupported"))
-        sku.provider_description = ii
-        ret.append(sku)
+        catalog.add_spec_row(spec_row)
+    return catalog
 
-    return ret
+
+def boto3_api_instance_list_to_instance_type_info(
+    region: str, boto3_instance_type_infos: list[dict]
+) -> list[InstanceTypeInfo]:
+    return build_instance_type_catalog_from_boto3_instance_types(
+        region, boto3_instance_type_infos
+    ).to_instance_type_infos()
+
+
+def resolve_hardware_requirements_to_instance_types_for_region(
+    m: InstanceManifest,
+    region: str,
+    max_skus_to_get: int,
+    skus_to_avoid: list[str] | None,
+    use_boto3: bool,
+) -> list[InstanceTypeInfo] | None:
+    """Returns None if no instance or pricing info found for the region"""
+    if use_boto3:
+        logger.debug(
+            "Fetching instance types for region %s using boto3 ...",
+            region,
+        )
+        all_boto3_instance_types_for_region = get_all_ec2_spot_instance_types(
+            region,
+            with_local_storage_only=(
+                m.vm.storage_type == MF_SEC_VM_STORAGE_TYPE_LOCAL
+            ),
+        )
+        catalog = build_instance_type_catalog_from_boto3_instance_types(
+            region, all_boto3_instance_types_for_region
+        )
+    else:
+        logger.debug(
+            "Fetching instance types for region %s using AWS static pricing files ...",
+            region,
+        )
+        all_spot_instances_for_region_with_price = get_spot_prices_for_region(
+            region
+        )
+        if not all_spot_instances_for_region_with_price:
+            return None
+        catalog = build_instance_type_catalog_from_aws_regional_pricing_info(
+            region,
+            get_aws_static_ondemand_pricing_info(region),
+            spot_prices=all_spot_instances_for_region_with_price,
+        )
+        if not len(catalog):
+            return None
+    return aws_spot.resolve_hardware_requirements_to_instance_types(
+        catalog,
+        region,
+        max_skus_to_get,
+        use_boto3=use_boto3,
+        persistent_vms=m.vm.persistent_vms,
+        availability_zone=m.availability_zone,
+        cpu_min=m.vm.cpu_min,
+        cpu_max=m.vm.cpu_max,
+        ram_min=m.vm.ram_min,
+        ram_max=m.vm.ram_max,
+        architecture=m.vm.cpu_arch,
+        storage_type=m.vm.storage_type,
+        storage_min=m.vm.storage_min,
+        allow_burstable=m.vm.allow_burstable,
+        storage_speed_class=m.vm.storage_speed_class,
+        instance_types=m.vm.instance_types,
+        instance_types_to_avoid=skus_to_avoid,
+        instance_selection_strategy=m.vm.instance_selection_strategy,
+        instance_family=m.vm.instance_family,
+        max_price=m.vm.max_price,
+    )
 
 
 def resolve_hardware_requirements_to_instance_types(
@@ -66,9 +154,12 @@ def resolve_hardware_requirements_to_instance_types(
     skus_to_avoid: list[str] | None = None,
     use_boto3: bool = True,
     regions: list[str] | None = None,
+    max_parallel_regions: int = 0,  # 0 = region_resolve_concurrency
 ) -> list[InstanceTypeInfo]:
     """By default prefer to use the direct boto3 APIs to get the most fresh instance and pricing info.
-    Use AWS static JSONs for unauthenticated price checks"""
+    Use AWS static JSONs for unauthenticated price checks.
+    Multiple regions are resolved concurrently, results are returned in input region order
+    """
     logger.debug(
         "Resolving HW requirements in region '%s' using --selection-strategy=%s ...",
         m.region,
@@ -79,93 +170,62 @@ def resolve_hardware_requirements_to_instance_types(
         "boto3" if use_boto3 else "S3 price listings",
         [x for x in m.vm.dict().items() if x[1] is not None],
     )
-    ret: list[InstanceTypeInfo] = []
+    regions = regions or [m.region]
+    if not use_boto3 and len(regions) > 1:
+        get_spot_price_index()  # One spot.json pass for all regions, sliced per region later
     noinfo_regions: list[str] = []
+    timings: dict[str, float] = {}
 
-    for region in regions or [m.region]:
+    def resolve_region(region: str) -> list[InstanceTypeInfo] | None:
+        started = time.time()
         try:
-            if use_boto3:
-                logger.debug(
-                    "Fetching instance types for region %s using boto3 ...",
-                    region,
-                )
-                all_boto3_instance_types_for_region = (
-                    get_all_ec2_spot_instance_types(
-                        region,
-                        with_local_storage_only=(
-                            m.vm.storage_type == MF_SEC_VM_STORAGE_TYPE_LOCAL
-                        ),
-                    )
-                )
-                all_regional_spots = (
-                    boto3_api_instance_list_to_instance_type_info(
-                        region, all_boto3_instance_types_for_region
-                    )
-                )
-            else:
-                logger.debug(
-                    "Fetching instance types for region %s using AWS static pricing files ...",
-                    region,
-                )
-                all_instances_for_region = (
-                    get_all_instance_types_from_aws_regional_pricing_info(
-                        region, get_aws_static_ondemand_pricing_info(region)
-                    )
-                )
-                if not all_instances_for_region:
-                    noinfo_regions.append(region)
-                    continue
-                all_spot_instances_for_region_with_price = (
-                    get_spot_instance_types_with_price_from_s3_pricing_json(
-                        region, get_spot_pricing_from_public_json()
-                    )
-                )
-                if not all_spot_instances_for_region_with_price:
-                    noinfo_regions.append(region)
-                    continue
-
-                all_regional_spots = []
-                for x in all_instances_for_region:
-                    if all_spot_instances_for_region_with_price.get(
-                        x.instance_type
-                    ):
-                        x.hourly_spot_price = (
-                            all_spot_instances_for_region_with_price[
-                                x.instance_type
-                            ]
-                        )
-                        all_regional_spots.append(x)
-            ret.extend(
-                aws_spot.resolve_hardware_requirements_to_instance_types(
-                    all_regional_spots,
+            return resolve_hardware_requirements_to_instance_types_for_region(
+                m, region, max_skus_to_get, skus_to_avoid, use_boto3
+            )
+        finally:
+            timings[region] = time.time() - started
+
+    max_workers = min(
+        max_parallel_regions or region_resolve_concurrency, len(regions)
+    )
+    results: dict[str, list[InstanceTypeInfo] | None] = {}
+    with ThreadPoolExecutor(
+        max_workers=max(max_workers, 1), thread_name_prefix="resolve_region"
+    ) as executor:
+        futures = {
+            region: executor.submit(resolve_region, region)
+            for region in regions
+        }
+        for region, future in futures.items():
+            try:
+                results[region] = future.result()
+            except Exception as e:
+                results[region] = None
+                logger.error(
+                    "Failed to resolve instance types from region %s: %s",
                     region,
-                    max_skus_to_get,
-                    use_boto3=use_boto3,
-                    persistent_vms=m.vm.persistent_vms,
-                    availability_zone=m.availability_zone,
-                    cpu_min=m.vm.cpu_min,
-                    cpu_max=m.vm.cpu_max,
-                    ram_min=m.vm.ram_min,
-                    ram_max=m.vm.ram_max,
-                    architecture=m.vm.cpu_arch,
-                    storage_type=m.vm.storage_type,
-                    storage_min=m.vm.storage_min,
-                    allow_burstable=m.vm.allow_burstable,
-                    storage_speed_class=m.vm.storage_speed_class,
-                    instance_types=m.vm.instance_types,
-                    instance_types_to_avoid=skus_to_avoid,
-                    instance_selection_strategy=m.vm.instance_selection_strategy,
-                    instance_family=m.vm.instance_family,
-                    max_price=m.vm.max_price,
+                    e,
                 )
-            )
-        except Exception as e:
+
+    ret: list[InstanceTypeInfo] = []
+    for region in regions:
+        region_skus = results.get(region)
+        if region_skus is None:
             noinfo_regions.append(region)
-            logger.error(
-                "Failed to resolve instance types from region %s: %s",
-                region,
-                e,
-            )
+        else:
+            ret.extend(region_skus)
+    if len(regions) > 1:
+        logger.debug(
+            "Resolved %s regions with %s workers, slowest: %s",
+            len(regions),
+            max_workers,
+            [
+                (r, round(t, 1))
+                for r, t in sorted(
+                    timings.items(), key=lambda x: x[1], reverse=True
+                )[:3]
+            ],
+        )
     if noinfo_regions:
         logger.warning(
             "WARNING - failed to inquiry regions: %s", noinfo_regions
@@ -189,43 +249,28 @@ def get_all_operator_vms_in_manifest_region(
     return vms_in_region
 
 
-def summarize_region_spot_pricing(
-    region: str,
-    eviction_rate_infos: dict[str, EvictionRateInfo],
-) -> RegionalSpotPricingStats:
-    logger.debug("Summarizing Spot statistics for region %s ...", region)
-    avg_ev_rate_group = mean(
-        [eri.eviction_rate_group for _, eri in eviction_rate_infos.items()]
-    )
-    avg_savings_rate = mean(
-        [eri.spot_savings_rate for _, eri in eviction_rate_infos.items()]
-    )
-
-    public_ev_rate_infos = get_spot_eviction_rates_from_public_json()
-
-    ev_rate_brackets = get_eviction_rate_brackets_from_public_eviction_info(
-        public_ev_rate_infos
-    )
-    ev_rate_group = round(avg_ev_rate_group)
-
-    return RegionalSpotPricingStats(
-        region=region,
-        avg_spot_savings_rate=round(avg_savings_rate, 1),
-        avg_eviction_rate_group=ev_rate_group,
-        eviction_rate_group_label=ev_rate_brackets[ev_rate_group]["label"],
+def get_spot_pricing_summaries_for_regions(
+    regions: list[str] | None = None,
+    cpu_arch: str = "",
+    instance_family: str = "",
+) -> list[RegionalSpotPricingStats]:
+    """All regions' savings / eviction rate aggregates in one go from the columnar eviction rate
+    data. Optionally filtered by CPU arch and instance family regex
+    """
+    columns = get_eviction_rate_columns()
+    if not columns:
+        raise Exception("Could not fetch public Spot eviction rates info")
+    return summarize_spot_savings_and_eviction_rates(
+        columns, regions, cpu_arch=cpu_arch, instance_family=instance_family
     )
 
 
 def get_spot_pricing_summary_for_region(
     region: str,
 ) -> RegionalSpotPricingStats:
-
-    ev_rates = extract_instance_type_eviction_rates_from_public_eviction_info(
-        region
-    )
-    if not ev_rates:
+    summaries = get_spot_pricing_summaries_for_regions([region])
+    if not summaries:
         raise Exception(
             f"Could not fetch public Spot eviction rates info for region {region}"
         )
-
-    return summarize_region_spot_pricing(region, ev_rates)
+    return summaries[0]
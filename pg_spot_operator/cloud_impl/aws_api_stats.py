@@ -0,0 +1,203 @@
+import functools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, plus an implicit overflow bucket
+LATENCY_BUCKETS_S = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# As in botocore.retries.standard.ThrottledRetryableChecker
+THROTTLING_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "ProvisionedThroughputExceededException",
+    "TransactionInProgressException",
+    "RequestLimitExceeded",
+    "BandwidthLimitExceeded",
+    "LimitExceededException",
+    "RequestThrottled",
+    "SlowDown",
+    "PriorRequestNotComplete",
+    "EC2ThrottledException",
+}
+HANDLER_ID = "pg_spot_operator_api_stats"
+STARTED_CONTEXT_KEY = "pg_spot_operator_api_call_started"
+ATTEMPTS_CONTEXT_KEY = "pg_spot_operator_api_call_attempts"
+# Set by the describe cache when serving a response without an API call
+CACHE_HIT_CONTEXT_KEY = "pg_spot_operator_describe_cache_hit"
+
+# (service, operation, region) -> counters
+api_call_stats: dict[tuple[str, str, str], dict] = {}
+api_call_stats_lock = threading.Lock()
+
+
+def get_service_and_operation(event_name: str) -> tuple[str, str]:
+    """E.g. after-call.ec2.DescribeInstances -> (ec2, DescribeInstances)"""
+    parts = event_name.split(".", 2)
+    if len(parts) < 3:
+        return parts[-1], ""
+    return parts[1], parts[2]
+
+
+def get_empty_api_call_stats() -> dict:
+    return {
+        "calls": 0,
+        "cached": 0,
+        "errors": 0,
+        "retries": 0,
+        "throttles": 0,
+        "seconds": 0.0,
+        "max_seconds": 0.0,
+        "latency_buckets": [0] * (len(LATENCY_BUCKETS_S) + 1),
+    }
+
+
+def record_api_call(
+    service: str,
+    operation: str,
+    region: str,
+    elapsed: float,
+    failed: bool = False,
+    cached: bool = False,
+    retries: int = 0,
+) -> None:
+    with api_call_stats_lock:
+        stats = api_call_stats.setdefault(
+            (service, operation, region), get_empty_api_call_stats()
+        )
+        stats["calls"] += 1
+        stats["errors"] += int(failed)
+        stats["retries"] += retries
+        if cached:  # Not to skew the latencies
+            stats["cached"] += 1
+            return
+        stats["seconds"] += elapsed
+        stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+        bucket = len(LATENCY_BUCKETS_S)
+        for i, upper_bound in enumerate(LATENCY_BUCKETS_S):
+            if elapsed <= upper_bound:
+                bucket = i
+                break
+        stats["latency_buckets"][bucket] += 1
+
+
+def record_throttle(service: str, operation: str, region: str) -> None:
+    with api_call_stats_lock:
+        api_call_stats.setdefault(
+            (service, operation, region), get_empty_api_call_stats()
+        )["throttles"] += 1
+
+
+def on_before_call(context, **kwargs) -> None:
+    context[STARTED_CONTEXT_KEY] = time.monotonic()
+
+
+def on_needs_retry(
+    response, attempts, request_dict, event_name, region: str, **kwargs
+) -> None:
+    """Called after every HTTP attempt, returns None not to affect the retry decision"""
+    try:
+        request_dict.get("context", {})[ATTEMPTS_CONTEXT_KEY] = attempts
+        if (
+            response
+            and response[1].get("Error", {}).get("Code")
+            in THROTTLING_ERROR_CODES
+        ):
+            record_throttle(*get_service_and_operation(event_name), region)
+    except Exception as e:
+        logger.debug("Failed to record an API call attempt: %s", e)
+
+
+def on_after_call(
+    http_response, context, event_name, region: str, **kwargs
+) -> None:
+    finish_api_call(
+        context,
+        event_name,
+        region,
+        failed=http_response.status_code >= 300,
+    )
+
+
+def on_after_call_error(context, event_name, region: str, **kwargs) -> None:
+    """Connection errors, timeouts etc, after any retries"""
+    finish_api_call(context, event_name, region, failed=True)
+
+
+def finish_api_call(
+    context: dict, event_name: str, region: str, failed: bool
+) -> None:
+    try:
+        started = context.get(STARTED_CONTEXT_KEY)
+        record_api_call(
+            *get_service_and_operation(event_name),
+            region,
+            time.monotonic() - started if started else 0,
+            failed=failed,
+            cached=bool(context.get(CACHE_HIT_CONTEXT_KEY)),
+            retries=max(context.get(ATTEMPTS_CONTEXT_KEY, 1) - 1, 0),
+        )
+    except Exception as e:
+        logger.debug("Failed to record an API call: %s", e)
+
+
+def register_api_stats(client, region: str) -> None:
+    """Hooks the call counters into a client's botocore event system, for all operations"""
+    client.meta.events.register(
+        "before-call", on_before_call, unique_id=HANDLER_ID + "_before"
+    )
+    client.meta.events.register(
+        "needs-retry",
+        functools.partial(on_needs_retry, region=region),
+        unique_id=HANDLER_ID + "_retry",
+    )
+    client.meta.events.register(
+        "after-call",
+        functools.partial(on_after_call, region=region),
+        unique_id=HANDLER_ID + "_after",
+    )
+    client.meta.events.register(
+        "after-call-error",
+        functools.partial(on_after_call_error, region=region),
+        unique_id=HANDLER_ID + "_error",
+    )
+
+
+def get_api_call_stats() -> dict[tuple[str, str, str], dict]:
+    """Returns a copy of the per (service, operation, region) counters"""
+    with api_call_stats_lock:
+        return {
+            key: dict(stats, latency_buckets=list(stats["latency_buckets"]))
+            for key, stats in api_call_stats.items()
+        }
+
+
+def get_api_call_counts() -> dict[tuple[str, str, str], int]:
+    with api_call_stats_lock:
+        return {key: stats["calls"] for key, stats in api_call_stats.items()}
+
+
+def reset_api_call_stats() -> None:
+    with api_call_stats_lock:
+        api_call_stats.clear()
+
+
+def get_latency_percentile(latency_buckets: list[int], pct: float) -> float:
+    """Upper bound of the histogram bucket the percentile falls into, inf for the overflow bucket"""
+    total = sum(latency_buckets)
+    if not total:
+        return 0
+    cumulative = 0
+    for i, count in enumerate(latency_buckets):
+        cumulative += count
+        if cumulative >= pct / 100 * total:
+            return (
+                LATENCY_BUCKETS_S[i]
+                if i < len(LATENCY_BUCKETS_S)
+                else float("inf")
+            )
+    return float("inf")
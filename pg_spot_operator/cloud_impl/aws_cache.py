@@ -1,105 +1,508 @@
 import glob
+import gzip
 import json
 import logging
 import os
+import tempfile
+import threading
 import time
 import urllib
 from datetime import date, datetime
+from typing import Callable, Iterator
 
 import requests
 from unidecode import unidecode
 
+from pg_spot_operator.cloud_impl import cache_manager, http_client
+from pg_spot_operator.cloud_impl.cache_manager import (
+    DEFAULT_PRICE_CACHE_MAX_BYTES,
+    record_cache_read,
+    touch_cache_file_access_time,
+)
+from pg_spot_operator.cloud_impl.http_client import http_get
+from pg_spot_operator.cloud_impl.pricing_store import (
+    METRIC_ONDEMAND_PRICE,
+    METRIC_SPOT_PRICE,
+    PRICING_DB_FILE_NAME,
+    add_cache_read_stats,
+    get_cache_read_stats,
+    get_current_values,
+    get_feed_ingest,
+    prune_value_history,
+    replace_current_values,
+)
 from pg_spot_operator.constants import DEFAULT_CONFIG_DIR
-from pg_spot_operator.util import get_aws_region_code_to_name_mapping
+from pg_spot_operator.util import (
+    get_aws_region_code_to_name_mapping,
+    single_flight,
+    single_flight_lock,
+)
 
 CONFIG_DIR_PRICE_CACHE_SUBDIR = "price_cache"
+PRICE_HISTORY_RETENTION_DAYS = 90
+DEFAULT_PRICE_CACHE_MAX_STALENESS_S = 3600  # One spot.json publishing period, as background refreshes of short CLI runs may not finish
+DEFAULT_BOTO3_CATALOG_MAX_AGE_S = 7 * 86400
+COMPRESSED_FILE_SUFFIX = ".gz"
+SPOT_PRICING_URL = "https://website.spot.ec2.aws.a2z.com/spot.json"
+EVICTION_RATE_URL = (
+    "https://spot-bid-advisor.s3.amazonaws.com/spot-advisor-data.json"
+)
 
 logger = logging.getLogger(__name__)
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
-def get_cached_pricing_dict(cache_file: str) -> dict:
-    cache_dir = os.path.expanduser(
+try:
+    import orjson
+
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads  # type: ignore[assignment]
+
+    def json_dumps(obj) -> bytes:  # type: ignore[misc]
+        return json.dumps(obj).encode()
+
+
+# Parsed pricing indexes by feed or feed/region, e.g. {"aws_spot": (cache_file, {region: {instance_type: price}})}
+pricing_index_memo: dict[str, tuple[str, dict]] = {}
+# How old previously validated pricing data can be to be served while re-fetching in the background. 0 = always block
+price_cache_max_staleness_s: int = DEFAULT_PRICE_CACHE_MAX_STALENESS_S
+pricing_feed_refreshes_in_progress: set[str] = set()
+price_cache_max_bytes: int = DEFAULT_PRICE_CACHE_MAX_BYTES
+# Instance type specs change only when AWS launches new types, so describe_instance_types output is kept for long
+boto3_catalog_max_age_s: int = DEFAULT_BOTO3_CATALOG_MAX_AGE_S
+pricing_feed_refresh_lock = threading.Lock()
+
+
+def get_price_cache_dir() -> str:
+    return os.path.expanduser(
         os.path.join(DEFAULT_CONFIG_DIR, CONFIG_DIR_PRICE_CACHE_SUBDIR)
     )
-    cache_path = os.path.join(cache_dir, cache_file)
+
+
+def get_pricing_cache_file_path(cache_file: str) -> str:
+    """Returns the gzipped path for a logical cache file name, or the plain one for files
+    written by older versions. Empty string if neither exists
+    """
+    cache_path = os.path.join(get_price_cache_dir(), cache_file)
+    if os.path.exists(cache_path + COMPRESSED_FILE_SUFFIX):
+        return cache_path + COMPRESSED_FILE_SUFFIX
     if os.path.exists(cache_path):
+        return cache_path
+    return ""
+
+
+def get_cached_pricing_dict(cache_file: str) -> dict:
+    """Gzip's CRC32 trailer guards against truncated / corrupted files"""
+    cache_path = get_pricing_cache_file_path(cache_file)
+    if cache_path:
         # logger.debug("Reading cached AWS pricing file: %s", cache_path)
         try:
-            with open(cache_path, "r") as f:
-                return json.loads(f.read())
+            if cache_path.endswith(COMPRESSED_FILE_SUFFIX):
+                with gzip.open(cache_path, "rb") as f:
+                    pricing_info = json_loads(f.read())
+            else:
+                with open(cache_path, "rb") as f:
+                    pricing_info = json_loads(f.read())
+            record_cache_read(cache_file, hit=True)
+            touch_cache_file_access_time(cache_path)
+            return pricing_info
         except Exception:
             logger.error(
                 "Failed to read cached AWS pricing file from: %s", cache_path
             )
+    record_cache_read(cache_file, hit=False)
     return {}
 
 
 def write_pricing_cache_file_as_json(
     cache_file: str, pricing_info: dict
 ) -> None:
-    cache_dir = os.path.expanduser(
-        os.path.join(DEFAULT_CONFIG_DIR, CONFIG_DIR_PRICE_CACHE_SUBDIR)
-    )
+    """Writes gzipped JSON via a temp file + rename so that readers never see partial files"""
+    cache_dir = get_price_cache_dir()
     cache_path = os.path.join(cache_dir, cache_file)
     os.makedirs(cache_dir, exist_ok=True)
-    with open(cache_path, "w") as f:
-        json.dump(pricing_info, f)
+    data = gzip.compress(json_dumps(pricing_info), compresslevel=6)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=cache_file + ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path + COMPRESSED_FILE_SUFFIX)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    if os.path.exists(cache_path):  # Legacy plain file
+        os.unlink(cache_path)
+
+
+def get_pricing_feed_meta_file_name(feed: str) -> str:
+    """aws_spot -> aws_spot.meta.json"""
+    return f"{feed}.meta.json"
+
+
+def fetch_pricing_feed(
+    feed: str,
+    url: str,
+    cache_file: str,
+    meta: dict,
+    previous_cache_file: str,
+) -> tuple[str, dict]:
+    """Does the actual (conditional) download of a pricing feed and updates the cache / meta files.
+    Returns the cache file holding the feed data plus the data itself if it had to be downloaded.
+    On failures falls back to the previous download if any, else returns ("", {})
+    """
+    meta_file = get_pricing_feed_meta_file_name(feed)
+    headers = {"Content-Type": "application/json"}
+    if previous_cache_file:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    logger.debug(
+        "Fetching %s from %s to %s (conditional=%s) ...",
+        feed,
+        url,
+        cache_file,
+        bool(previous_cache_file),
+    )
+    try:
+        r = http_get(url, headers=headers)
+    except requests.RequestException as e:
+        logger.error("Failed to retrieve AWS pricing info from %s: %s", url, e)
+        r = None
+
+    if r is not None and r.status_code == 304 and previous_cache_file:
+        logger.debug("%s not modified, re-using %s", feed, previous_cache_file)
+        try:  # Keep the re-used file from age based clean-up
+            os.utime(get_pricing_cache_file_path(previous_cache_file))
+        except OSError:
+            pass
+        meta["checked_for"] = cache_file
+        meta["checked_on"] = time.time()
+        write_pricing_cache_file_as_json(meta_file, meta)
+        return previous_cache_file, {}
+
+    if r is None or r.status_code != 200:
+        if r is not None:
+            logger.error(
+                "Failed to retrieve AWS pricing info - retcode: %s, URL: %s",
+                r.status_code,
+                url,
+            )
+        if previous_cache_file:
+            logger.warning(
+                "Using possibly outdated %s pricing info from: %s",
+                feed,
+                previous_cache_file,
+            )
+        return previous_cache_file, {}
 
+    pricing_info = r.json()
+    write_pricing_cache_file_as_json(cache_file, pricing_info)
+    write_pricing_cache_file_as_json(
+        meta_file,
+        {
+            "url": url,
+            "etag": r.headers.get("ETag", ""),
+            "last_modified": r.headers.get("Last-Modified", ""),
+            "cache_file": cache_file,
+            "checked_for": cache_file,
+            "checked_on": time.time(),
+        },
+    )
+    try_prune_price_cache()
+    return cache_file, pricing_info
 
-def get_ondemand_pricing_info_via_http(region: str) -> dict:
+
+def drop_memoized_pricing_indexes(feed: str) -> None:
+    """Both the feed level and per region indexes"""
+    for index_key in list(pricing_index_memo):
+        if index_key == feed or index_key.startswith(feed + "/"):
+            pricing_index_memo.pop(index_key, None)
+
+
+def get_pricing_feed_lock_file_path(feed: str) -> str:
+    return os.path.join(
+        get_price_cache_dir(), feed + cache_manager.LOCK_FILE_SUFFIX
+    )
+
+
+def get_previous_pricing_feed_file(meta: dict, url: str) -> str:
+    """The last download of the feed as per its meta file, if still on disk"""
+    if (
+        meta.get("cache_file")
+        and meta.get("url") == url
+        and get_pricing_cache_file_path(meta["cache_file"])
+    ):
+        return meta["cache_file"]
+    return ""
+
+
+@single_flight
+def fetch_pricing_feed_single_flight(
+    feed: str, url: str, cache_file: str
+) -> tuple[str, dict]:
+    """Concurrent callers in the process share one fetch, other processes using the same cache
+    dir (operator daemons) wait on the feed's lock file and then re-use the fresh download
+    """
+    os.makedirs(get_price_cache_dir(), exist_ok=True)
+    with single_flight_lock(
+        f"pricing_feed/{feed}", get_pricing_feed_lock_file_path(feed)
+    ):
+        if get_pricing_cache_file_path(cache_file):
+            return cache_file, {}
+        meta = get_cached_pricing_dict(get_pricing_feed_meta_file_name(feed))
+        previous_cache_file = get_previous_pricing_feed_file(meta, url)
+        if previous_cache_file and meta.get("checked_for") == cache_file:
+            return previous_cache_file, {}
+        return fetch_pricing_feed(
+            feed, url, cache_file, meta, previous_cache_file
+        )
+
+
+def refresh_pricing_feed_in_background(
+    feed: str,
+    url: str,
+    cache_file: str,
+) -> None:
+    """At most one refresh per feed at a time. Drops the feed's memoized indexes when done,
+    so that the next lookup picks up the fresh data
+    """
+
+    def refresh():
+        try:
+            fetch_pricing_feed_single_flight(feed, url, cache_file)
+            drop_memoized_pricing_indexes(feed)
+        except Exception:
+            logger.exception("Background refresh of %s failed", feed)
+        finally:
+            with pricing_feed_refresh_lock:
+                pricing_feed_refreshes_in_progress.discard(feed)
+
+    with pricing_feed_refresh_lock:
+        if feed in pricing_feed_refreshes_in_progress:
+            return
+        pricing_feed_refreshes_in_progress.add(feed)
+
+    logger.debug("Refreshing %s in the background ...", feed)
+    # Only an opportunistic cache refresh, not to block CLI exit. Cache writes are atomic so an
+    # interrupted download leaves no partial files behind
+    threading.Thread(
+        target=refresh, name=f"refresh_{feed}", daemon=True
+    ).start()
+
+
+def is_pricing_feed_validated_for_period(feed: str, cache_file: str) -> bool:
+    """False if the data for the current period is being served stale, i.e. not re-checked yet"""
+    if get_pricing_cache_file_path(cache_file):
+        return True
+    meta = get_cached_pricing_dict(get_pricing_feed_meta_file_name(feed))
+    return meta.get("checked_for") == cache_file
+
+
+def get_pricing_feed_file_with_revalidation(
+    feed: str, url: str, cache_file: str
+) -> tuple[str, dict]:
+    """Makes sure a public pricing JSON is available in the price cache and returns the name of the
+    cache file holding it, so that it can also be read in a streaming manner. If the feed had to
+    be downloaded, the parsed data is returned as well, else {}.
+
+    Data is fetched into the period-specific (hourly / daily) cache_file.
+    The ETag / Last-Modified headers of the last download are stored in a per-feed meta file,
+    so that on period change we can revalidate with a conditional GET - an unchanged feed costs
+    a 304 and no new file is written, the meta file just starts pointing the current period to the
+    previous download.
+    If the previous download was validated less than price_cache_max_staleness_s ago, it's
+    returned right away and the revalidation happens in a background thread.
+    Returns ("", {}) on failures if nothing cached
+    """
+    if get_pricing_cache_file_path(cache_file):
+        return cache_file, {}
+
+    meta = get_cached_pricing_dict(get_pricing_feed_meta_file_name(feed))
+    previous_cache_file = get_previous_pricing_feed_file(meta, url)
+    if previous_cache_file and (
+        meta.get("checked_for") == cache_file or http_client.offline
+    ):
+        return previous_cache_file, {}
+
+    if (
+        previous_cache_file
+        and price_cache_max_staleness_s > 0
+        and time.time() - meta.get("checked_on", 0)
+        < price_cache_max_staleness_s
+    ):
+        refresh_pricing_feed_in_background(feed, url, cache_file)
+        return previous_cache_file, {}
+
+    return fetch_pricing_feed_single_flight(feed, url, cache_file)
+
+
+def get_pricing_json_with_revalidation(
+    feed: str, url: str, cache_file: str
+) -> dict:
+    """Returns {} on failures if nothing cached"""
+    feed_file, pricing_info = get_pricing_feed_file_with_revalidation(
+        feed, url, cache_file
+    )
+    if pricing_info or not feed_file:
+        return pricing_info
+    return get_cached_pricing_dict(feed_file)
+
+
+def iter_pricing_feed_items(
+    feed_file: str, pricing_info: dict, prefix: str
+) -> Iterator:
+    """Yields the JSON elements at an ijson style prefix, e.g. "config.regions.item". Streams from
+    the cache file if pricing_info not yet in memory and ijson available, to avoid materializing
+    the whole document
+    """
+    if not (pricing_info or feed_file):
+        return
+    if not pricing_info and ijson is not None:
+        cache_path = get_pricing_cache_file_path(feed_file)
+        if not cache_path:
+            return
+        opener = (
+            gzip.open if cache_path.endswith(COMPRESSED_FILE_SUFFIX) else open
+        )
+        with opener(cache_path, "rb") as f:
+            yield from ijson.items(f, prefix, use_float=True)
+        return
+
+    if not pricing_info:
+        pricing_info = get_cached_pricing_dict(feed_file)
+
+    def walk(node, path: list[str]):
+        if not path:
+            yield node
+        elif path[0] == "item":
+            if isinstance(node, list):
+                for x in node:
+                    yield from walk(x, path[1:])
+        elif isinstance(node, dict) and path[0] in node:
+            yield from walk(node[path[0]], path[1:])
+
+    yield from walk(pricing_info, prefix.split(".") if prefix else [])
+
+
+def iter_pricing_feed_kvitems(
+    feed_file: str, pricing_info: dict, prefix: str
+) -> Iterator[tuple[str, dict]]:
+    """Yields the (key, value) pairs of the JSON object at prefix, streaming if possible"""
+    if not (pricing_info or feed_file):
+        return
+    if not pricing_info and ijson is not None:
+        cache_path = get_pricing_cache_file_path(feed_file)
+        if not cache_path:
+            return
+        opener = (
+            gzip.open if cache_path.endswith(COMPRESSED_FILE_SUFFIX) else open
+        )
+        with opener(cache_path, "rb") as f:
+            yield from ijson.kvitems(f, prefix, use_float=True)
+        return
+    for obj in iter_pricing_feed_items(feed_file, pricing_info, prefix):
+        if isinstance(obj, dict):
+            yield from obj.items()
+
+
+def get_ondemand_pricing_url(region: str) -> str:
     """AWS caches pricing info for public usage in static files like:
     https://b0.p.awsstatic.com/pricing/2.0/meteredUnitMaps/ec2/USD/current/ec2-ondemand-without-sec-sel/EU%20(Stockholm)/Linux/index.json
     """
     region_location = get_aws_region_code_to_name_mapping().get(region, "")
     if not region_location:
         raise Exception(f"Could not map region code {region} to location name")
-    logger.debug(
-        f"Fetching AWS on-demand pricing info for region {region} ({region_location}) ..."
-    )
 
     url = f"https://b0.p.awsstatic.com/pricing/2.0/meteredUnitMaps/ec2/USD/current/ec2-ondemand-without-sec-sel/{region_location}/Linux/index.json"
 
-    sanitized_url = urllib.parse.quote(unidecode(url), safe=":/")
-    logger.debug("requests.get: %s", sanitized_url)
-    f = requests.get(
-        sanitized_url, headers={"Content-Type": "application/json"}, timeout=5
+    return urllib.parse.quote(unidecode(url), safe=":/")
+
+
+def get_ondemand_pricing_info_via_http(region: str) -> dict:
+    logger.debug(
+        f"Fetching AWS on-demand pricing info for region {region} ..."
     )
-    if f.status_code != 200:
-        logger.error(
-            "Failed to retrieve AWS pricing info - retcode: %s, URL: %s",
-            f.status_code,
-            sanitized_url,
+    return get_pricing_json_with_revalidation(
+        f"aws_ondemand_{region}",
+        get_ondemand_pricing_url(region),
+        get_ondemand_pricing_cache_file_name(region),
+    )
+
+
+def flush_cache_read_stats() -> None:
+    """Moves the in-process cache hit / miss counters to the pricing DB"""
+    counters = cache_manager.pop_cache_read_counters()
+    if not counters:
+        return
+    try:
+        add_cache_read_stats(get_pricing_db_path(), counters)
+    except Exception:
+        logger.exception("Failed to store price cache read stats")
+
+
+def get_files_referenced_by_pricing_feed_metas() -> set[str]:
+    """Previous downloads used for revalidation should survive LRU pruning"""
+    ret: set[str] = set()
+    for meta_path in glob.glob(
+        os.path.join(get_price_cache_dir(), "*.meta.json*")
+    ):
+        meta = get_cached_pricing_dict(
+            os.path.basename(meta_path).removesuffix(COMPRESSED_FILE_SUFFIX)
         )
-        return {}
-    return f.json()
+        if meta.get("cache_file"):
+            ret.add(meta["cache_file"])
+            ret.add(meta["cache_file"] + COMPRESSED_FILE_SUFFIX)
+    return ret
 
 
-def try_clean_up_old_pricing_cache_files(older_than_days: int) -> None:
-    """Delete old per region JSON files
-    ~/.pg-spot-operator/price_cache/aws_ondemand_us-east-1_20241115.json
+def try_prune_price_cache() -> dict:
+    """Applies per-kind retention and the byte budget (LRU) to the whole price cache dir,
+    and prunes the pricing DB history
     """
-    cache_dir = os.path.expanduser(
-        os.path.join(DEFAULT_CONFIG_DIR, CONFIG_DIR_PRICE_CACHE_SUBDIR)
-    )
-    epoch = time.time()
-    for pd in sorted(glob.glob(os.path.join(cache_dir, "aws_*"))):
-        try:
-            st = os.stat(pd)
-            if epoch - st.st_mtime > 3600 * 24 * older_than_days:
-                os.unlink(pd)
-        except Exception:
-            logger.info("Failed to clean up old on-demand pricing JSON %s", pd)
+    ret: dict = {}
+    try:
+        ret = cache_manager.prune_cache_dir(
+            get_price_cache_dir(),
+            max_bytes=price_cache_max_bytes,
+            protected_files=get_files_referenced_by_pricing_feed_metas(),
+        )
+    except Exception:
+        logger.exception("Failed to prune the price cache")
+    try:
+        prune_value_history(
+            get_pricing_db_path(), PRICE_HISTORY_RETENTION_DAYS
+        )
+    except Exception:
+        logger.exception("Failed to prune the pricing history")
+    flush_cache_read_stats()
+    return ret
 
 
-def get_aws_static_ondemand_pricing_info(region: str) -> dict:
+def get_price_cache_stats() -> dict[str, dict]:
+    """Per file kind sizes, ages and read hit / miss counts, including the current process"""
+    flush_cache_read_stats()
+    read_stats: dict[str, dict[str, int]] = {}
+    if os.path.exists(get_pricing_db_path()):
+        read_stats = get_cache_read_stats(get_pricing_db_path())
+    return cache_manager.summarize_cache_dir(get_price_cache_dir(), read_stats)
+
+
+def get_ondemand_pricing_cache_file_name(region: str) -> str:
     today = date.today()
-    cache_file = (
-        f"aws_ondemand_{region}_{today.year}{today.month}{today.day}.json"
-    )
-    cached_pricing_info = get_cached_pricing_dict(cache_file)
-    if cached_pricing_info:
-        return cached_pricing_info
+    return f"aws_ondemand_{region}_{today.year}{today.month}{today.day}.json"
+
 
+def get_aws_static_ondemand_pricing_info(region: str) -> dict:
     pricing_info = get_ondemand_pricing_info_via_http(region)
     if not pricing_info:
         logger.error(
@@ -107,23 +510,37 @@ def get_aws_static_ondemand_pricing_info(region: str) -> dict:
             region,
         )
         return {}
-
-    write_pricing_cache_file_as_json(cache_file, pricing_info)
-    try_clean_up_old_pricing_cache_files(older_than_days=7)
     return pricing_info
 
 
-def get_latest_spot_pricing_json() -> dict:
-    """Return latest Spot JSON if any found.
+def get_latest_spot_pricing_cache_file() -> str:
+    """Return latest Spot JSON cache file name if any found.
     Location: $config-dir/$price-cache/aws_spot_{now.year}{now.month}{now.day}_{now.hour}00.json
+    File names are not zero-padded so going by modification time
     """
-    cache_dir = os.path.expanduser(
-        os.path.join(DEFAULT_CONFIG_DIR, CONFIG_DIR_PRICE_CACHE_SUBDIR)
+    cache_dir = get_price_cache_dir()
+    g = glob.glob(os.path.join(cache_dir, "aws_spot_*.json")) + glob.glob(
+        os.path.join(cache_dir, "aws_spot_*.json" + COMPRESSED_FILE_SUFFIX)
     )
-    g = glob.glob(os.path.join(cache_dir, "aws_spot_*"))
     if g:
-        return json.load(open(sorted(g, reverse=True)[0]))
-    return {}
+        return os.path.basename(max(g, key=os.path.getmtime)).removesuffix(
+            COMPRESSED_FILE_SUFFIX
+        )
+    return ""
+
+
+def get_spot_pricing_feed_file() -> tuple[str, dict]:
+    """Returns the spot.json cache file name plus the data if just downloaded"""
+    feed_file, spot_pricing_info = get_pricing_feed_file_with_revalidation(
+        "aws_spot", SPOT_PRICING_URL, get_spot_pricing_cache_file_name()
+    )
+    if not feed_file:
+        feed_file = get_latest_spot_pricing_cache_file()
+        if feed_file:
+            logger.warning(
+                "Using possibly outdated spot pricing from: %s", feed_file
+            )
+    return feed_file, spot_pricing_info
 
 
 def get_spot_pricing_from_public_json() -> dict:
@@ -186,78 +603,292 @@ def get_spot_pricing_from_public_json() -> dict:
                     ]
                   },
     """
-    now = datetime.now()
-    cache_file = f"aws_spot_{now.year}{now.month}{now.day}_{now.hour}00.json"
-    spot_pricing_info = get_cached_pricing_dict(cache_file)
-    if spot_pricing_info:
+    feed_file, spot_pricing_info = get_spot_pricing_feed_file()
+    if spot_pricing_info or not feed_file:
         return spot_pricing_info
+    return get_cached_pricing_dict(feed_file)
 
-    url = "https://website.spot.ec2.aws.a2z.com/spot.json"
-    logger.debug(
-        "Fetching AWS spot pricing info from %s to %s ...", url, cache_file
-    )
-    r = requests.get(
-        url, headers={"Content-Type": "application/json"}, timeout=5
+
+def get_spot_eviction_rates_feed_file() -> tuple[str, dict]:
+    """Via an AWS managed ~1MB JSON: https://spot-bid-advisor.s3.amazonaws.com/spot-advisor-data.json
+    Caches locally into hourly aws_eviction_rate_* files.
+    Returns the cache file name plus the data if just downloaded
+    """
+    return get_pricing_feed_file_with_revalidation(
+        "aws_eviction_rate",
+        EVICTION_RATE_URL,
+        get_eviction_rate_cache_file_name(),
     )
-    if r.status_code != 200:
-        logger.error(
-            "Failed to retrieve AWS pricing info - retcode: %s, URL: %s",
-            r.status_code,
-            url,
-        )
-        latest_stored_spot_pricing_info = get_latest_spot_pricing_json()
-        if latest_stored_spot_pricing_info:
-            logger.warning(
-                "Using possibly outdated spot pricing from: %s",
-                latest_stored_spot_pricing_info,
-            )
-        return {}
-    spot_pricing_info = r.json()
 
-    write_pricing_cache_file_as_json(cache_file, spot_pricing_info)
 
-    return spot_pricing_info
+def get_spot_eviction_rates_from_public_json() -> dict:
+    """All regions"""
+    feed_file, eviction_rate_info = get_spot_eviction_rates_feed_file()
+    if eviction_rate_info or not feed_file:
+        return eviction_rate_info
+    return get_cached_pricing_dict(feed_file)
 
 
-def get_spot_eviction_rates_from_public_json() -> dict:
-    """Via an AWS managed ~1MB JSON: https://spot-bid-advisor.s3.amazonaws.com/spot-advisor-data.json
-    Caches locally into hourly aws_eviction_rate_* files
+def get_eviction_rate_index_file_name(feed_file: str) -> str:
+    """aws_eviction_rate_2024111_1000.json -> aws_eviction_rate_2024111_1000.index.json"""
+    return f"{feed_file.removesuffix('.json')}.index.json"
+
+
+def build_eviction_rate_index(
+    feed_file: str, eviction_rate_info: dict
+) -> dict:
+    """A compact all-regions index of the Linux eviction rate data, in one streaming pass over
+    "spot_advisor": {"feed_file": str, "ranges": [...], "regions": {region: {instance_type: [r, s]}}},
+    where r = eviction rate group / bracket index and s = Spot savings rate
     """
-    now = datetime.now()
-    cache_file = (
-        f"aws_eviction_rate_{now.year}{now.month}{now.day}_{now.hour}00.json"
+    regions: dict[str, dict[str, list[int]]] = {}
+    for region, region_data in iter_pricing_feed_kvitems(
+        feed_file, eviction_rate_info, "spot_advisor"
+    ):
+        regions[region] = {
+            instance_type: [int(ev_info["r"]), int(ev_info["s"])]
+            for instance_type, ev_info in region_data.get("Linux", {}).items()
+            if "r" in ev_info and "s" in ev_info
+        }
+    ranges = list(
+        iter_pricing_feed_items(feed_file, eviction_rate_info, "ranges.item")
     )
-    eviction_rate_info = get_cached_pricing_dict(cache_file)
-    if eviction_rate_info:
-        return eviction_rate_info
+    if not (ranges and regions):
+        return {}
+    return {"feed_file": feed_file, "ranges": ranges, "regions": regions}
 
-    url = "https://spot-bid-advisor.s3.amazonaws.com/spot-advisor-data.json"
-    logger.debug(
-        "Fetching AWS spot eviction rate info from %s to %s ...",
-        url,
-        cache_file,
+
+def get_spot_eviction_rate_index() -> dict:
+    """Parsed once per spot-advisor-data.json download, memoized in memory and persisted next to
+    the raw file. Returns {} if no eviction rate data available
+    """
+    cache_file = get_eviction_rate_cache_file_name()
+    memo_file, memo_index = pricing_index_memo.get(
+        "aws_eviction_rate", ("", {})
     )
-    r = requests.get(
-        url, headers={"Content-Type": "application/json"}, timeout=5
+    if memo_file == cache_file and memo_index:
+        return memo_index
+
+    with single_flight_lock("pricing_index/aws_eviction_rate"):
+        memo_file, memo_index = pricing_index_memo.get(
+            "aws_eviction_rate", ("", {})
+        )
+        if memo_file == cache_file and memo_index:
+            return memo_index
+        feed_file, eviction_rate_info = get_spot_eviction_rates_feed_file()
+        if not feed_file:
+            return {}
+        index_file = get_eviction_rate_index_file_name(feed_file)
+        index = get_cached_pricing_dict(index_file)
+        if not index:
+            index = build_eviction_rate_index(feed_file, eviction_rate_info)
+            if not index:
+                return {}
+            write_pricing_cache_file_as_json(index_file, index)
+        pricing_index_memo["aws_eviction_rate"] = (cache_file, index)
+        return index
+
+
+def get_eviction_rate_cache_file_name() -> str:
+    now = datetime.now()
+    return (
+        f"aws_eviction_rate_{now.year}{now.month}{now.day}_{now.hour}00.json"
     )
-    if r.status_code != 200:
-        logger.error(
-            "Failed to retrieve AWS pricing info - retcode: %s, URL: %s",
-            r.status_code,
-            url,
+
+
+def get_spot_pricing_cache_file_name() -> str:
+    now = datetime.now()
+    return f"aws_spot_{now.year}{now.month}{now.day}_{now.hour}00.json"
+
+
+def get_pricing_db_path() -> str:
+    return os.path.join(get_price_cache_dir(), PRICING_DB_FILE_NAME)
+
+
+def get_or_build_pricing_index(
+    index_key: str,
+    feed: str,
+    cache_file: str,
+    index_getter: Callable[[], dict[str, dict[str, float]]],
+    metric: str,
+    region: str = "",
+) -> dict[str, dict[str, float]]:
+    """Parses a raw pricing file into a {region: {instance_type: value}} index only once per
+    download period. The index is memoized in memory per index_key (a feed or "feed/region")
+    and ingested into the SQLite pricing store, unless built from stale data still being
+    refreshed in the background. For region level indexes only given region's values are
+    loaded back from the store.
+    """
+    memo_file, memo_index = pricing_index_memo.get(index_key, ("", {}))
+    if memo_file == cache_file and memo_index:
+        return memo_index
+
+    with single_flight_lock(f"pricing_index/{index_key}"):
+        # Concurrent callers wait for the first one to build it
+        memo_file, memo_index = pricing_index_memo.get(index_key, ("", {}))
+        if memo_file == cache_file and memo_index:
+            return memo_index
+        return build_pricing_index(
+            index_key, feed, cache_file, index_getter, metric, region
         )
-        latest_stored_spot_pricing_info = get_latest_spot_pricing_json()
-        if latest_stored_spot_pricing_info:
-            logger.warning(
-                "Using possibly outdated spot pricing from: %s",
-                latest_stored_spot_pricing_info,
+
+
+def build_pricing_index(
+    index_key: str,
+    feed: str,
+    cache_file: str,
+    index_getter: Callable[[], dict[str, dict[str, float]]],
+    metric: str,
+    region: str = "",
+) -> dict[str, dict[str, float]]:
+    db_path = get_pricing_db_path()
+    index: dict[str, dict[str, float]] = {}
+    if any(
+        get_feed_ingest(db_path, k).get("cache_file") == cache_file
+        for k in {index_key, feed}
+    ):
+        index = get_current_values(db_path, metric, region=region)
+    if not index:
+        index = index_getter()
+        if not index:
+            return {}
+        if is_pricing_feed_validated_for_period(feed, cache_file):
+            replace_current_values(
+                db_path, index_key, cache_file, metric, index
             )
-        return {}
-    eviction_rate_info = r.json()
 
-    write_pricing_cache_file_as_json(cache_file, eviction_rate_info)
+    pricing_index_memo[index_key] = (cache_file, index)
+    return index
+
+
+def extract_spot_prices_from_public_spot_json_region_data(
+    region_data: dict,
+) -> dict[str, float]:
+    """Returns {instance_type: hourly_spot_price} for a single "regions" element of spot.json"""
+    ret: dict[str, float] = {}
+    for ins_types in region_data.get("instanceTypes", []):
+        for size in ins_types.get("sizes", []):
+            if not size.get("size"):
+                continue
+            for vc in size.get("valueColumns", []):
+                if vc.get("name") != "linux":
+                    continue
+                price = vc.get("prices", {}).get("USD", "")
+                try:
+                    if price and float(price):
+                        ret[size["size"]] = float(price)
+                except ValueError:  # "N/A*"
+                    pass
+    return ret
+
+
+def extract_spot_price_index_from_spot_pricing_feed(
+    feed_file: str, spot_pricing_info: dict, region: str = ""
+) -> dict[str, dict[str, float]]:
+    """Single pass over the regions of spot.json, stopping early if only one region needed.
+    Returns {region: {instance_type: hourly_spot_price}}, with an empty dict for a single region
+    missing from an available feed, for the miss to be memoized as well
+    """
+    ret: dict[str, dict[str, float]] = {}
+    for rd in iter_pricing_feed_items(
+        feed_file, spot_pricing_info, "config.regions.item"
+    ):
+        if not rd.get("region") or (region and rd["region"] != region):
+            continue
+        ret[rd["region"]] = (
+            extract_spot_prices_from_public_spot_json_region_data(rd)
+        )
+        if region:
+            break
+    if region and (feed_file or spot_pricing_info):
+        ret.setdefault(region, {})
+    return ret
+
+
+def extract_spot_price_index_from_public_spot_json(
+    spot_pricing_info: dict,
+) -> dict[str, dict[str, float]]:
+    """Returns {region: {instance_type: hourly_spot_price}}"""
+    return extract_spot_price_index_from_spot_pricing_feed(
+        "", spot_pricing_info
+    )
 
-    return eviction_rate_info
+
+def get_spot_price_index() -> dict[str, dict[str, float]]:
+    """Region-keyed Spot prices, parsed once per hourly spot.json download"""
+    return get_or_build_pricing_index(
+        "aws_spot",
+        "aws_spot",
+        get_spot_pricing_cache_file_name(),
+        lambda: extract_spot_price_index_from_spot_pricing_feed(
+            *get_spot_pricing_feed_file()
+        ),
+        METRIC_SPOT_PRICE,
+    )
+
+
+def get_spot_prices_for_region(region: str) -> dict[str, float]:
+    """Returns a dict of {instance_type: hourly_spot_price}. Only given region's subtree is
+    extracted from spot.json, unless all regions already indexed via get_spot_price_index()
+    """
+    cache_file = get_spot_pricing_cache_file_name()
+    memo_file, memo_index = pricing_index_memo.get("aws_spot", ("", {}))
+    if memo_file == cache_file and memo_index:
+        return memo_index.get(region, {})
+    return get_or_build_pricing_index(
+        f"aws_spot/{region}",
+        "aws_spot",
+        cache_file,
+        lambda: extract_spot_price_index_from_spot_pricing_feed(
+            *get_spot_pricing_feed_file(), region=region
+        ),
+        METRIC_SPOT_PRICE,
+        region=region,
+    ).get(region, {})
+
+
+def extract_ondemand_price_index_from_regional_pricing_info(
+    regional_pricing_info: dict,
+) -> dict[str, float]:
+    """Returns {instance_type: hourly_ondemand_price} from a regional on-demand pricing file"""
+    ret: dict[str, float] = {}
+    for _, reg_data in regional_pricing_info.get("regions", {}).items():
+        for _, sku_data in reg_data.items():
+            instance_type = sku_data.get("Instance Type")
+            if not instance_type or instance_type in ret:
+                continue
+            try:
+                ret[instance_type] = float(sku_data.get("price", 0))
+            except ValueError:
+                logger.debug(
+                    "Unexpected on-demand price for %s: %s",
+                    instance_type,
+                    sku_data.get("price"),
+                )
+    return ret
+
+
+def get_aws_static_ondemand_price_index(region: str) -> dict[str, float]:
+    """Per region {instance_type: hourly_ondemand_price}, parsed once per daily download"""
+
+    def index_getter() -> dict[str, dict[str, float]]:
+        regional_pricing_info = get_aws_static_ondemand_pricing_info(region)
+        if not regional_pricing_info:
+            return {}
+        return {
+            region: extract_ondemand_price_index_from_regional_pricing_info(
+                regional_pricing_info
+            )
+        }
+
+    return get_or_build_pricing_index(
+        f"aws_ondemand_{region}",
+        f"aws_ondemand_{region}",
+        get_ondemand_pricing_cache_file_name(region),
+        index_getter,
+        METRIC_ONDEMAND_PRICE,
+        region=region,
+    ).get(region, {})
 
 
 def try_get_cached_ami_details(region, architecture) -> dict:
@@ -284,16 +915,61 @@ def try_get_cached_ami_details(region, architecture) -> dict:
 
 def cache_ami_details_to_fs(region: str, architecture: str, ami_details: dict):
     try:
-        cache_dir = os.path.expanduser(
-            os.path.join(DEFAULT_CONFIG_DIR, CONFIG_DIR_PRICE_CACHE_SUBDIR)
-        )
         now = datetime.now()
         week = now.isocalendar().week
         cache_file = f"aws_ami_{region}_{architecture}_{now.year}_w{week}.json"
-        cache_path = os.path.join(cache_dir, cache_file)
-        os.makedirs(cache_dir, exist_ok=True)
-        with open(cache_path, "w") as f:
-            json.dump(ami_details, f)
-        logger.debug("Wrote AMI cache to %s", cache_path)
+        write_pricing_cache_file_as_json(cache_file, ami_details)
+        logger.debug("Wrote AMI cache to %s", cache_file)
     except Exception:
         logger.exception("Failed to cache AMI info")
+
+
+def get_boto3_catalog_cache_file_name(
+    region: str, with_local_storage_only: bool = False
+) -> str:
+    return f"aws_boto3_catalog_{region}{'_local' if with_local_storage_only else ''}.json"
+
+
+def get_cached_boto3_catalog(
+    cache_file: str, max_age_s: int | None = None
+) -> list[dict] | None:
+    """Cached describe_instance_types output. None if missing or older than max_age_s (defaults to
+    boto3_catalog_max_age_s, 0 = any age). Freshness is checked via mtime, without reading the file
+    """
+    cache_path = get_pricing_cache_file_path(cache_file)
+    if max_age_s is None:
+        max_age_s = boto3_catalog_max_age_s
+    try:
+        if (
+            cache_path
+            and max_age_s
+            and time.time() - os.path.getmtime(cache_path) > max_age_s
+        ):
+            logger.debug("Cached boto3 catalog %s expired", cache_file)
+            record_cache_read(cache_file, hit=False)
+            return None
+    except OSError:
+        return None
+    catalog = get_cached_pricing_dict(cache_file)
+    if not catalog or "instance_types" not in catalog:
+        return None
+    return catalog["instance_types"]
+
+
+def cache_boto3_catalog_to_fs(
+    cache_file: str, region: str, instance_types: list[dict]
+) -> None:
+    try:
+        write_pricing_cache_file_as_json(
+            cache_file,
+            {
+                "region": region,
+                "created_on": time.time(),
+                "instance_types": instance_types,
+            },
+        )
+        logger.debug(
+            "Wrote %s instance types to %s", len(instance_types), cache_file
+        )
+    except Exception:
+        logger.exception("Failed to cache boto3 catalog to %s", cache_file)
@@ -1,8 +1,35 @@
+import threading
+import time
+
 import boto3
+from botocore.config import Config
+
+from pg_spot_operator.cloud_impl.aws_api_stats import register_api_stats
+from pg_spot_operator.cloud_impl.aws_describe_cache import (
+    get_credentials_identity,
+    register_describe_cache,
+)
+from pg_spot_operator.constants import AWS_RETRY_MODES
 
 AWS_PROFILE: str = ""
 AWS_ACCESS_KEY_ID: str = ""
 AWS_SECRET_ACCESS_KEY: str = ""
+# Pooled sessions / clients are re-created after that, to pick up rotated credentials
+CLIENT_POOL_MAX_AGE_S = 3600
+
+# (region, profile, key id) -> (created_on, session)
+session_pool: dict[tuple, tuple[float, boto3.session.Session]] = {}
+# (service, region, profile, key id, endpoint, transport profile) -> (created_on, client)
+client_pool: dict[tuple, tuple[float, object]] = {}
+# One botocore Config per transport profile
+botocore_configs: dict[tuple, Config | None] = {}
+# Sessions aren't thread-safe so clients are created under the lock, clients themselves are
+client_pool_lock = threading.Lock()
+
+# botocore transport settings for all clients, set from CLI flags. Empty / 0 = botocore default
+default_transport_profile: dict = {}
+# Defaults plus any manifest level overrides of the instance being processed
+transport_profile: dict = {}
 
 
 def set_access_keys(
@@ -10,40 +37,183 @@ def set_access_keys(
     secret_access_key: str = "",
     profile_name: str = "",
 ):
+    global AWS_ACCESS_KEY_ID
+    global AWS_SECRET_ACCESS_KEY
+    global AWS_PROFILE
+    prev_creds = (AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_PROFILE)
     if access_key_id and secret_access_key:
-        global AWS_ACCESS_KEY_ID
-        global AWS_SECRET_ACCESS_KEY
         AWS_ACCESS_KEY_ID = access_key_id
         AWS_SECRET_ACCESS_KEY = secret_access_key
     elif profile_name:
-        global AWS_PROFILE
         AWS_PROFILE = profile_name
+    if (AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_PROFILE) != prev_creds:
+        clear_client_pool()
 
 
-def get_client(
-    service: str, region: str
-):  # TODO reuse / cache sessions for a while
-    if AWS_PROFILE:
-        session = boto3.session.Session(
-            profile_name=AWS_PROFILE,
-            region_name=(
-                region if region else None
-            ),  # None assumes default region set
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+def get_non_empty_transport_settings(
+    retry_mode: str = "",
+    max_attempts: int = 0,
+    max_pool_connections: int = 0,
+    connect_timeout_s: float = 0,
+    read_timeout_s: float = 0,
+    tcp_keepalive: bool | None = None,
+) -> dict:
+    if retry_mode and retry_mode not in AWS_RETRY_MODES:
+        raise ValueError(
+            f"Invalid AWS retry mode {retry_mode}, expected one of {AWS_RETRY_MODES}"
         )
-    else:
-        session = boto3.session.Session(
-            region_name=region if region else None,
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+    settings = {
+        "retry_mode": retry_mode,
+        "max_attempts": max_attempts,
+        "max_pool_connections": max_pool_connections,
+        "connect_timeout_s": connect_timeout_s,
+        "read_timeout_s": read_timeout_s,
+        "tcp_keepalive": tcp_keepalive,
+    }
+    return {k: v for k, v in settings.items() if v or v is False}
+
+
+def set_default_transport_profile(**settings) -> None:
+    """Process wide transport settings, for all instances"""
+    global default_transport_profile
+    default_transport_profile = get_non_empty_transport_settings(**settings)
+    apply_transport_profile(default_transport_profile)
+
+
+def set_transport_profile(**overrides) -> None:
+    """Instance level (manifest) transport settings, non-empty ones override the defaults"""
+    apply_transport_profile(
+        default_transport_profile
+        | get_non_empty_transport_settings(**overrides)
+    )
+
+
+def apply_transport_profile(profile: dict) -> None:
+    """Clients of other profiles stay pooled, for switching between instances with different settings"""
+    global transport_profile
+    transport_profile = profile
+
+
+def get_botocore_config(profile: dict) -> Config | None:
+    if not profile:
+        return None
+    config_params: dict = {}
+    retries = {}
+    if profile.get("retry_mode"):
+        retries["mode"] = profile["retry_mode"]
+    if profile.get("max_attempts"):
+        retries["total_max_attempts"] = profile["max_attempts"]
+    if retries:
+        config_params["retries"] = retries
+    if profile.get("max_pool_connections"):
+        config_params["max_pool_connections"] = profile["max_pool_connections"]
+    if profile.get("connect_timeout_s"):
+        config_params["connect_timeout"] = profile["connect_timeout_s"]
+    if profile.get("read_timeout_s"):
+        config_params["read_timeout"] = profile["read_timeout_s"]
+    if "tcp_keepalive" in profile:
+        config_params["tcp_keepalive"] = profile["tcp_keepalive"]
+    return Config(**config_params)
+
+
+def get_botocore_config_locked(profile_key: tuple) -> Config | None:
+    if profile_key not in botocore_configs:
+        botocore_configs[profile_key] = get_botocore_config(dict(profile_key))
+    return botocore_configs[profile_key]
+
+
+def clear_client_pool() -> None:
+    with client_pool_lock:
+        session_pool.clear()
+        client_pool.clear()
+
+
+def get_pooled_session(
+    region: str,
+    profile_name: str = "",
+    access_key_id: str = "",
+    secret_access_key: str = "",
+) -> boto3.session.Session:
+    with client_pool_lock:
+        return get_pooled_session_locked(
+            region, profile_name, access_key_id, secret_access_key
+        )
+
+
+def get_pooled_session_locked(
+    region: str,
+    profile_name: str,
+    access_key_id: str,
+    secret_access_key: str,
+) -> boto3.session.Session:
+    key = (region, profile_name, access_key_id)
+    pooled = session_pool.get(key)
+    if pooled and time.time() - pooled[0] < CLIENT_POOL_MAX_AGE_S:
+        return pooled[1]
+    session = boto3.session.Session(
+        profile_name=profile_name or None,
+        region_name=region or None,  # None assumes default region set
+        aws_access_key_id=access_key_id or None,
+        aws_secret_access_key=secret_access_key or None,
+    )
+    session_pool[key] = (time.time(), session)
+    return session
+
+
+def get_pooled_client(
+    service: str,
+    region: str,
+    profile_name: str = "",
+    access_key_id: str = "",
+    secret_access_key: str = "",
+    endpoint_url: str = "",
+):
+    """Re-uses clients per (service, region, credentials, endpoint, transport profile) for up to
+    CLIENT_POOL_MAX_AGE_S
+    """
+    profile_key = tuple(sorted(transport_profile.items()))
+    key = (
+        service,
+        region,
+        profile_name,
+        access_key_id,
+        endpoint_url,
+        profile_key,
+    )
+    with client_pool_lock:
+        pooled = client_pool.get(key)
+        if pooled and time.time() - pooled[0] < CLIENT_POOL_MAX_AGE_S:
+            return pooled[1]
+        session = get_pooled_session_locked(
+            region, profile_name, access_key_id, secret_access_key
         )
-    return session.client(service)
+        client = session.client(
+            service,
+            endpoint_url=endpoint_url or None,
+            config=get_botocore_config_locked(profile_key),
+        )
+        register_api_stats(client, client.meta.region_name or "")
+        if service == "ec2":
+            register_describe_cache(
+                client,
+                client.meta.region_name or "",
+                get_credentials_identity(session, endpoint_url),
+            )
+        client_pool[key] = (time.time(), client)
+        return client
+
+
+def get_client(service: str, region: str):
+    return get_pooled_client(
+        service,
+        region,
+        AWS_PROFILE,
+        AWS_ACCESS_KEY_ID,
+        AWS_SECRET_ACCESS_KEY,
+    )
 
 
 def get_session(region: str) -> boto3.session.Session:
-    return boto3.session.Session(
-        region_name=region,
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+    return get_pooled_session(
+        region, AWS_PROFILE, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY
     )
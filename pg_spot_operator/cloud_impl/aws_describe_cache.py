@@ -0,0 +1,186 @@
+import functools
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime
+
+from botocore.awsrequest import AWSResponse
+
+from pg_spot_operator.cloud_impl.aws_api_stats import CACHE_HIT_CONTEXT_KEY
+from pg_spot_operator.cloud_impl.aws_cache import get_pricing_db_path
+from pg_spot_operator.cloud_impl.pricing_store import (
+    get_cached_api_response,
+    invalidate_api_responses,
+    store_api_response,
+)
+
+logger = logging.getLogger(__name__)
+
+# Read-only EC2 operations served from the pricing DB for given seconds. Instance / volume
+# state TTLs are kept below the 5s polling intervals of the wait loops
+DESCRIBE_CACHE_TTLS_S: dict[str, float] = {
+    "DescribeInstances": 4,
+    "DescribeVolumes": 4,
+    "DescribeAddresses": 30,
+    "DescribeKeyPairs": 300,
+    "DescribeSubnets": 3600,
+    "DescribeVpcs": 3600,
+    "DescribeImages": 6 * 3600,
+}
+# Any other EC2 operation drops all cached responses of the region
+READ_ONLY_OPERATION_PREFIXES = ("Describe", "Get", "List")
+HANDLER_ID = "pg_spot_operator_describe_cache"
+CONTEXT_KEY = "pg_spot_operator_describe_cache"
+GENERATION_CONTEXT_KEY = "pg_spot_operator_describe_cache_generation"
+
+describe_cache_enabled: bool = True
+describe_cache_stats: dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "invalidations": 0,
+}
+describe_cache_stats_lock = threading.Lock()
+# Bumped on every invalidation of a scope, for responses fetched before a mutating call not to be
+# stored after it
+scope_generations: dict[str, int] = {}
+scope_generations_lock = threading.Lock()
+
+
+def count(stat: str) -> None:
+    with describe_cache_stats_lock:
+        describe_cache_stats[stat] += 1
+
+
+def encode_datetime(obj):
+    if isinstance(obj, datetime):
+        return {"__datetime__": obj.isoformat()}
+    raise TypeError(f"Can't serialize {type(obj)}")
+
+
+def decode_datetime(obj: dict):
+    if "__datetime__" in obj and len(obj) == 1:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def get_request_cache_key(operation: str, request_dict: dict) -> str:
+    """EC2 is a query protocol API, so all params end up flattened into the body"""
+    body = request_dict.get("body")
+    params = (
+        json.dumps(body, sort_keys=True)
+        if isinstance(body, dict)
+        else str(body)
+    )
+    return hashlib.sha1(
+        f"{operation}|{request_dict.get('url_path', '')}|{params}".encode()
+    ).hexdigest()
+
+
+def get_cache_scope(region: str, identity: str) -> str:
+    """Different credentials can see different resources"""
+    return hashlib.sha1(identity.encode()).hexdigest()[:12] + "/" + region
+
+
+def get_scope_generation(scope: str) -> int:
+    with scope_generations_lock:
+        return scope_generations.get(scope, 0)
+
+
+def bump_scope_generation(scope: str) -> None:
+    with scope_generations_lock:
+        scope_generations[scope] = scope_generations.get(scope, 0) + 1
+
+
+def serve_cached_response(
+    model, params, context, scope: str, **kwargs
+) -> tuple | None:
+    """before-call handler, a non-None return value skips the HTTP request"""
+    ttl_s = DESCRIBE_CACHE_TTLS_S.get(model.name)
+    if not ttl_s:
+        return None
+    try:
+        request_key = get_request_cache_key(model.name, params)
+        context[CONTEXT_KEY] = request_key
+        context[GENERATION_CONTEXT_KEY] = get_scope_generation(scope)
+        cached = get_cached_api_response(
+            get_pricing_db_path(), scope, request_key
+        )
+    except Exception as e:
+        logger.debug("Describe cache lookup failed: %s", e)
+        return None
+    if cached is None:
+        count("misses")
+        return None
+    count("hits")
+    context[CONTEXT_KEY] = ""  # Not to re-store and extend the expiry
+    context[CACHE_HIT_CONTEXT_KEY] = True
+    logger.debug("Serving %s from the describe cache", model.name)
+    return AWSResponse("", 200, {}, None), json.loads(
+        cached, object_hook=decode_datetime
+    )
+
+
+def store_or_invalidate(
+    http_response, parsed, model, context, scope: str, **kwargs
+) -> None:
+    """after-call handler"""
+    try:
+        if model.name in DESCRIBE_CACHE_TTLS_S:
+            if (
+                context.get(CONTEXT_KEY)
+                and http_response.status_code < 300
+                and context.get(GENERATION_CONTEXT_KEY)
+                == get_scope_generation(scope)
+            ):
+                store_api_response(
+                    get_pricing_db_path(),
+                    scope,
+                    context[CONTEXT_KEY],
+                    model.name,
+                    json.dumps(parsed, default=encode_datetime),
+                    DESCRIBE_CACHE_TTLS_S[model.name],
+                )
+        elif not model.name.startswith(READ_ONLY_OPERATION_PREFIXES):
+            # Also on failures, as they could have partially succeeded
+            bump_scope_generation(scope)
+            if invalidate_api_responses(get_pricing_db_path(), scope):
+                logger.debug(
+                    "Describe cache of %s invalidated by %s", scope, model.name
+                )
+            count("invalidations")
+    except Exception as e:
+        logger.debug("Describe cache update failed: %s", e)
+
+
+def get_credentials_identity(session, endpoint_url: str = "") -> str:
+    """Access key ID of the resolved credentials, as profiles or the default credential chain
+    can point to any account. Empty if no credentials found
+    """
+    try:
+        credentials = session.get_credentials()
+    except Exception as e:
+        logger.debug("Failed to resolve AWS credentials: %s", e)
+        return ""
+    if not credentials or not credentials.access_key:
+        return ""
+    return f"{credentials.access_key}|{endpoint_url}"
+
+
+def register_describe_cache(client, region: str, identity: str) -> None:
+    """Hooks the response cache into an EC2 client's botocore event system, if the identity of
+    the credentials is known
+    """
+    if not describe_cache_enabled or not identity:
+        return
+    scope = get_cache_scope(region, identity)
+    client.meta.events.register(
+        "before-call.ec2",
+        functools.partial(serve_cached_response, scope=scope),
+        unique_id=HANDLER_ID + "_before",
+    )
+    client.meta.events.register(
+        "after-call.ec2",
+        functools.partial(store_or_invalidate, scope=scope),
+        unique_id=HANDLER_ID + "_after",
+    )
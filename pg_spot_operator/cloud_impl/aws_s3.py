@@ -1,8 +1,10 @@
 import logging
 
-import boto3
-
-from pg_spot_operator.cloud_impl.aws_client import get_client, get_session
+from pg_spot_operator.cloud_impl.aws_client import (
+    get_client,
+    get_pooled_client,
+    get_session,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -76,7 +78,13 @@ def write_to_s3_bucket(
             if v and k not in ("aws_access_key_id", "aws_secret_access_key")
         },
     )
-    client = boto3.client(**{k: v for k, v in s3_params.items() if v})  # type: ignore
+    client = get_pooled_client(
+        "s3",
+        region,
+        access_key_id=access_key,
+        secret_access_key=access_secret,
+        endpoint_url=endpoint,
+    )
     # https://boto3.amazonaws.com/v1/documentation/api/1.35.9/reference/services/s3.html
     client.put_object(Bucket=bucket_name, Key=bucket_key, Body=data)
 
@@ -89,15 +97,13 @@ def read_s3_bucket(
     key: str = "",
     secret: str = "",
 ):
-    s3_params = {
-        "service_name": "s3",
-        "endpoint_url": endpoint,
-        "aws_access_key_id": key,
-        "aws_secret_access_key": secret,
-        "region_name": region,
-    }
-
-    client = boto3.client(**{k: v for k, v in s3_params.items() if v})  # type: ignore
+    client = get_pooled_client(
+        "s3",
+        region,
+        access_key_id=key,
+        secret_access_key=secret,
+        endpoint_url=endpoint,
+    )
     # https://youtype.github.io/boto3_stubs_docs/mypy_boto3_s3/client/#get_object
     resp = client.get_object(
         Bucket=bucket_name,
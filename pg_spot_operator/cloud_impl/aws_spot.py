@@ -1,41 +1,89 @@
 import logging
+import os
 import re
+import time
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from statistics import mean
 
 import requests
 from botocore.exceptions import EndpointConnectionError
 
 from pg_spot_operator.cloud_impl.aws_cache import (
-    get_aws_static_ondemand_pricing_info,
-    get_spot_eviction_rates_from_public_json,
-    get_spot_pricing_from_public_json,
+    build_eviction_rate_index,
+    cache_boto3_catalog_to_fs,
+    extract_spot_prices_from_public_spot_json_region_data,
+    get_aws_static_ondemand_price_index,
+    get_boto3_catalog_cache_file_name,
+    get_cached_boto3_catalog,
+    get_pricing_db_path,
+    get_pricing_feed_lock_file_path,
+    get_price_cache_dir,
+    get_spot_eviction_rate_index,
+    get_spot_prices_for_region,
 )
 from pg_spot_operator.cloud_impl.aws_client import get_client
+from pg_spot_operator.cloud_impl.pricing_store import (
+    METRIC_SPOT_PRICE,
+    get_current_zonal_values,
+    get_feed_ingest,
+    get_spot_price_history,
+    get_spot_price_history_synced_ranges,
+    replace_current_zonal_values,
+    store_spot_price_history,
+)
+from pg_spot_operator.cloud_impl.http_client import http_get
 from pg_spot_operator.cloud_impl.cloud_structs import (
     EvictionRateInfo,
     InstanceTypeInfo,
 )
 from pg_spot_operator.cloud_impl.cloud_util import (
     extract_cpu_arch_from_sku_desc,
+    extract_instance_storage_disk_count_from_aws_pricing_storage_string,
     extract_instance_storage_size_and_type_from_aws_pricing_storage_string,
     infer_cpu_arch_from_aws_instance_type_name,
 )
+from pg_spot_operator.cloud_impl.instance_catalog import (
+    SPEC_SOURCE_PRICING,
+    InstanceSpecTable,
+    InstanceTypeCatalog,
+    get_instance_spec_table,
+)
+from pg_spot_operator.cloud_impl.spot_price_stats import (
+    SpotPriceStats,
+    compute_spot_price_stats_by_sku_and_az,
+)
 from pg_spot_operator.constants import (
     CLOUD_AWS,
-    MF_SEC_VM_STORAGE_TYPE_LOCAL,
     SPOT_OPERATOR_ID_TAG,
 )
 from pg_spot_operator.instance_type_selection import (
     SELECTION_STRATEGY_BALANCED,
     SELECTION_STRATEGY_EVICTION_RATE,
+    SELECTION_STRATEGY_PRICE_STABILITY,
     InstanceTypeSelection,
 )
-from pg_spot_operator.util import timed_cache
+from pg_spot_operator.util import (
+    single_flight,
+    single_flight_lock,
+    timed_cache,
+)
 
-MAX_SKUS_FOR_SPOT_PRICE_COMPARE = 25
-SPOT_HISTORY_LOOKBACK_DAYS = 1
+SPOT_HISTORY_SYNC_INTERVAL_S = (
+    300  # Don't ask the API for the delta more often
+)
+SPOT_HISTORY_SYNC_OVERLAP_S = 300  # For late published price points
+SPOT_PRICE_SNAPSHOT_MAX_AGE_S = 600
+DEFAULT_SPOT_PRICE_STATS_WINDOW_DAYS = 7
+SPOT_PRICE_STATS_MAX_SKUS = (
+    25  # Cheapest ones, to bound price history fetching
+)
+spot_price_stats_window_days: float = DEFAULT_SPOT_PRICE_STATS_WINDOW_DAYS
+FEED_SPOT_PRICE_SNAPSHOT = "aws_spot_zonal"
+# Per region {instance_type: EvictionRateInfo} built from a specific eviction rate index version
+eviction_rate_infos_memo: dict[
+    str, tuple[str, dict[str, EvictionRateInfo]]
+] = {}
 
 
 logger = logging.getLogger(__name__)
@@ -48,6 +96,7 @@ logging.getLogger("urllib3").setLevel(logging.ERROR)
 
 
 @timed_cache(seconds=3600)
+@single_flight
 def describe_instance_type_boto3(instance_type: str, region: str) -> dict:
     try:
         client = get_client("ec2", region)
@@ -122,9 +171,51 @@ def resolve_instance_type_info(
 
 
 @timed_cache(seconds=3600)
+@single_flight
 def get_all_ec2_spot_instance_types(
     region: str, with_local_storage_only: bool = False
-):
+) -> list[dict]:
+    """Served from the on-disk catalog while younger than aws_cache.boto3_catalog_max_age_s, so
+    that new runs don't have to re-paginate describe_instance_types. Falls back to an expired
+    catalog if the API call fails
+    """
+    cache_file = get_boto3_catalog_cache_file_name(
+        region, with_local_storage_only
+    )
+    instances = get_cached_boto3_catalog(cache_file)
+    if instances is not None:
+        return instances
+
+    os.makedirs(get_price_cache_dir(), exist_ok=True)
+    with single_flight_lock(
+        f"boto3_catalog/{cache_file}",
+        get_pricing_feed_lock_file_path(cache_file),
+    ):
+        instances = get_cached_boto3_catalog(
+            cache_file
+        )  # Another process might have just refreshed it
+        if instances is not None:
+            return instances
+        try:
+            instances = describe_all_ec2_spot_instance_types(
+                region, with_local_storage_only
+            )
+        except Exception:
+            instances = get_cached_boto3_catalog(cache_file, max_age_s=0)
+            if not instances:
+                raise
+            logger.warning(
+                "Failed to list instance types for region %s, using an expired cached catalog",
+                region,
+            )
+            return instances
+        cache_boto3_catalog_to_fs(cache_file, region, instances)
+        return instances
+
+
+def describe_all_ec2_spot_instance_types(
+    region: str, with_local_storage_only: bool = False
+) -> list[dict]:
     client = get_client("ec2", region)
     instances = []
     filters = [
@@ -162,6 +253,7 @@ def get_all_ec2_spot_instance_types(
 
 
 @timed_cache(seconds=600)
+@single_flight
 def get_current_hourly_spot_price_static(
     region: str,
     instance_type: str,
@@ -169,10 +261,8 @@ def get_current_hourly_spot_price_static(
     if not instance_type:
         return 0
     try:
-        all_spot_instances_for_region_with_price = (
-            get_spot_instance_types_with_price_from_s3_pricing_json(
-                region, get_spot_pricing_from_public_json()
-            )
+        all_spot_instances_for_region_with_price = get_spot_prices_for_region(
+            region
         )
         if not all_spot_instances_for_region_with_price:
             logger.warning(
@@ -205,7 +295,6 @@ def get_current_hourly_spot_price_static(
     return 0
 
 
-# TODO some caching
 def get_current_hourly_spot_price_boto3(
     region: str,
     instance_type: str,
@@ -217,6 +306,8 @@ def get_current_hourly_spot_price_boto3(
         pricing_data = get_spot_pricing_data_for_skus_over_period(
             [instance_type], region, timedelta(days=1), az=az
         )
+        if not pricing_data:
+            return 0
     if az:
         for pd in pricing_data:
             if (
@@ -255,16 +346,22 @@ def get_ondemand_price_for_instance_type_from_aws_regional_pricing_info(
 
 
 @timed_cache(seconds=1800)
+@single_flight
 def get_current_hourly_ondemand_price(
     region: str,
     instance_type: str,
 ) -> float:
-    ondemand_pricing_info = get_aws_static_ondemand_pricing_info(region)
-    if not ondemand_pricing_info:
+    ondemand_price_index = get_aws_static_ondemand_price_index(region)
+    if not ondemand_price_index:
         return 0
-    return get_ondemand_price_for_instance_type_from_aws_regional_pricing_info(
-        region, instance_type, ondemand_pricing_info
-    )
+    if instance_type not in ondemand_price_index:
+        logger.error(
+            "Failed to find ondemand pricing info from AWS regional data for region %s, instance type %s",
+            region,
+            instance_type,
+        )
+        return 0
+    return ondemand_price_index[instance_type]
 
 
 def get_current_hourly_ondemand_price_fallback(
@@ -273,9 +370,11 @@ def get_current_hourly_ondemand_price_fallback(
 ) -> float:
     """Use an external 3rd party web service as fallback if something changes in AWS static pricing JSONs"""
     url = f"https://ec2.shop/?region={region}&filter={instance_type}"
-    f = requests.get(
-        url, headers={"Content-Type": "application/json"}, timeout=5
-    )
+    try:
+        f = http_get(url, headers={"Content-Type": "application/json"})
+    except requests.RequestException as e:
+        logger.error("Failed to retrieve pricing info from %s: %s", url, e)
+        return 0
     if f.status_code != 200:
         return 0
     pd = f.json()
@@ -300,126 +399,38 @@ def filter_instance_types_by_hw_req(
     instance_family: str = "",
 ) -> list[InstanceTypeInfo]:
     """Returns qualified SKUs sorted by (CPU, RAM) or (CPU, Total instance storage DESC)"""
-    ret: list[InstanceTypeInfo] = []
-    instance_family_regex: re.Pattern | None = None
-
-    if instance_types:
-        logger.debug(
-            "Only considering following instance types: %s",
-            instance_types,
-        )
-    if instance_family:
-        logger.debug(
-            "Only considering instance families matching regex: %s",
-            instance_family,
-        )
-        instance_family_regex = re.compile(instance_family)
-    if instance_types_to_avoid:
-        logger.debug(
-            "NOT considering following instance types: %s",
-            instance_types_to_avoid,
-        )
-
-    for ii in all_instances:
-
-        if instance_types:
-            if ii.instance_type not in instance_types:
-                continue
-            ret.append(ii)
-            continue
-
-        if (
-            instance_types_to_avoid
-            and ii.instance_type in instance_types_to_avoid
-        ):
-            continue
-
-        if (
-            instance_family
-            and instance_family_regex
-            and not instance_family_regex.search(ii.instance_type)
-        ):
-            continue
-
-        if cpu_arch and cpu_arch.strip() and cpu_arch.strip().lower() != "any":
-            # On AWS architectures are named x86_64 and arm64, but we only look for arm / not-arm for now
-            if "arm" in cpu_arch.strip().lower() and "arm" not in ii.arch:
-                continue
-            if "arm" not in cpu_arch.strip().lower() and "arm" in ii.arch:
-                continue
-
-        if allow_burstable is False and ii.is_burstable:
-            continue
-
-        if cpu_min and ii.cpu < cpu_min:
-            continue
-
-        if cpu_max and ii.cpu > cpu_max:
-            continue
-
-        if (
-            ram_min and ii.ram_mb / 1000 < ram_min
-        ):  # 1000 on purpose to use almost matching RAM SKUs as well
-            continue
-
-        if ram_max and ii.ram_mb / 1024 > ram_max:  # User input in GBs
-            continue
-
-        if (
-            storage_type == MF_SEC_VM_STORAGE_TYPE_LOCAL
-            and ii.instance_storage == 0
-        ):
-            continue
-
-        if storage_min and storage_type == MF_SEC_VM_STORAGE_TYPE_LOCAL:
-            if ii.instance_storage < storage_min:
-                continue
-
-        if (
-            storage_speed_class
-        ):  # PS storage_speed_class=ssd > SSD + NVME, storage_speed_class=nvme > nvme only
-            if (
-                storage_speed_class == "hdd"
-                and ii.storage_speed_class != "hdd"
-            ):
-                continue
-            if (
-                storage_speed_class.lower() == "ssd"
-                and ii.storage_speed_class == "hdd"
-            ):
-                continue
-            if (
-                storage_speed_class == "nvme"
-                and ii.storage_speed_class != "nvme"
-            ):
-                continue
-
-        ret.append(ii)
-
-    if (
-        storage_min and storage_type == MF_SEC_VM_STORAGE_TYPE_LOCAL
-    ):  # Prefer bigger disks for local storage
-        ret.sort(
-            key=lambda x: (
-                x.cpu,
-                x.instance_storage,
-            )
-        )
-    else:
-        ret.sort(
-            key=lambda x: (
-                x.cpu,
-                x.ram_mb,
-            )
-        )
-    return ret
+    catalog = InstanceTypeCatalog.from_instance_type_infos(all_instances)
+    rows = catalog.filter_rows(
+        cpu_min=cpu_min,
+        cpu_max=cpu_max,
+        ram_min=ram_min,
+        ram_max=ram_max,
+        cpu_arch=cpu_arch,
+        storage_min=storage_min,
+        storage_type=storage_type,
+        allow_burstable=allow_burstable,
+        storage_speed_class=storage_speed_class,
+        instance_types=instance_types,
+        instance_types_to_avoid=instance_types_to_avoid,
+        instance_family=instance_family,
+    )
+    # Input can have multiple rows per instance type, e.g. per AZ, all of which are returned
+    input_rows_by_instance_type: dict[str, list[int]] = defaultdict(list)
+    for i, x in enumerate(all_instances):
+        input_rows_by_instance_type[x.instance_type].append(i)
+    return [
+        all_instances[i]
+        for row in rows
+        for i in input_rows_by_instance_type[catalog.instance_types[row]]
+    ]
 
 
-def get_spot_pricing_data_for_skus_over_period(
+def fetch_spot_pricing_data_for_skus_since(
     instance_types: list[str],
     region: str,
-    lookback_period: timedelta,
+    start_time: datetime,
     az: str | None = None,
+    end_time: datetime | None = None,
 ) -> list[dict]:
     """
     https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2/client/describe_spot_price_history.html
@@ -435,14 +446,16 @@ def get_spot_pricing_data_for_skus_over_period(
         {"Name": "instance-type", "Values": instance_types},
         {"Name": "product-description", "Values": ["Linux/UNIX"]},
     ]
-    kwargs = {}
+    kwargs: dict = {}
     if az:
         kwargs["AvailabilityZone"] = az
+    if end_time:
+        kwargs["EndTime"] = end_time
 
     paginator = client.get_paginator("describe_spot_price_history")
     page_iterator = paginator.paginate(
         Filters=filters,
-        StartTime=(datetime.utcnow() - lookback_period),
+        StartTime=start_time,
         **kwargs,
     )
     pricing_data = []
@@ -451,6 +464,252 @@ def get_spot_pricing_data_for_skus_over_period(
     return pricing_data
 
 
+def sync_spot_price_history_store(
+    instance_types: list[str],
+    region: str,
+    since: float,
+    az: str | None = None,
+) -> None:
+    """Asks describe_spot_price_history only for the parts of the [since, now] period not fetched
+    before - the delta since the last sync and / or older history if a longer period is asked
+    for than on previous syncs. The whole period for never seen SKUs
+    """
+    db_path = get_pricing_db_path()
+    now = time.time()
+    synced_ranges = get_spot_price_history_synced_ranges(
+        db_path, region, instance_types, az or ""
+    )
+    # (start, end), end = None for up to now
+    fetch_ranges: list[tuple[float, float | None]] = []
+    if any(it not in synced_ranges for it in instance_types):
+        fetch_ranges.append((since, None))
+    else:
+        # Ranges common to all given SKUs
+        synced_from = max(synced_ranges[it][0] for it in instance_types)
+        synced_until = min(synced_ranges[it][1] for it in instance_types)
+        if now - synced_until >= SPOT_HISTORY_SYNC_INTERVAL_S:
+            fetch_ranges.append(
+                (max(since, synced_until - SPOT_HISTORY_SYNC_OVERLAP_S), None)
+            )
+        if since < synced_from and (
+            not fetch_ranges or fetch_ranges[0][0] > since
+        ):
+            fetch_ranges.append((since, min(synced_from, now)))
+    if not fetch_ranges:
+        return
+
+    pricing_data = []
+    for start, end in fetch_ranges:
+        logger.debug(
+            "Fetching Spot price history for %s SKUs in region %s from %s to %s ...",
+            len(instance_types),
+            region,
+            datetime.fromtimestamp(start, timezone.utc),
+            datetime.fromtimestamp(end, timezone.utc) if end else "now",
+        )
+        pricing_data.extend(
+            fetch_spot_pricing_data_for_skus_since(
+                instance_types,
+                region,
+                datetime.fromtimestamp(start, timezone.utc),
+                az,
+                datetime.fromtimestamp(end, timezone.utc) if end else None,
+            )
+        )
+
+    new_synced_ranges: dict[str, tuple[float, float]] = {}
+    for it in instance_types:
+        prev_from, prev_until = synced_ranges.get(it, (now, now))
+        # Extend the previous range when adjacent to or overlapping with the newly fetched ones
+        new_from, new_until = prev_from, prev_until
+        for start, end in sorted(fetch_ranges, key=lambda r: r[0]):
+            range_end = end or now
+            if start <= new_until and range_end >= new_from:
+                new_from = min(new_from, start)
+                new_until = max(new_until, range_end)
+            else:
+                new_from, new_until = start, range_end
+        new_synced_ranges[it] = (new_from, new_until)
+
+    store_spot_price_history(
+        db_path,
+        region,
+        [
+            (
+                pd["InstanceType"],
+                pd["AvailabilityZone"],
+                pd["Timestamp"].timestamp(),
+                float(pd["SpotPrice"]),
+            )
+            for pd in pricing_data
+        ],
+        new_synced_ranges,
+        az or "",
+    )
+
+
+def get_spot_pricing_data_for_skus_over_period(
+    instance_types: list[str],
+    region: str,
+    lookback_period: timedelta,
+    az: str | None = None,
+) -> list[dict]:
+    """Same shape as describe_spot_price_history output, served from the local store after a
+    delta sync. Includes the price in effect at the start of the period
+    """
+    since = time.time() - lookback_period.total_seconds()
+    sync_spot_price_history_store(instance_types, region, since, az)
+    return [
+        {
+            "AvailabilityZone": zone,
+            "InstanceType": instance_type,
+            "SpotPrice": str(price),
+            "Timestamp": datetime.fromtimestamp(ts, tz=timezone.utc),
+        }
+        for instance_type, zone, ts, price in get_spot_price_history(
+            get_pricing_db_path(), region, instance_types, since, az or ""
+        )
+    ]
+
+
+def fetch_current_spot_prices_for_region(region: str) -> list[dict]:
+    """Prices in effect for all Linux Spot instance types in all AZs of the region in one paginated
+    sweep - with StartTime = EndTime = now describe_spot_price_history returns only the latest
+    point per (instance type, AZ). Same shape as fetch_spot_pricing_data_for_skus_since output
+    """
+    client = get_client("ec2", region)
+    now = datetime.now(timezone.utc)
+    paginator = client.get_paginator("describe_spot_price_history")
+    page_iterator = paginator.paginate(
+        Filters=[{"Name": "product-description", "Values": ["Linux/UNIX"]}],
+        StartTime=now,
+        EndTime=now,
+        PaginationConfig={"PageSize": 1000},
+    )
+    pricing_data = []
+    for page in page_iterator:
+        pricing_data.extend(page["SpotPriceHistory"])
+    logger.debug(
+        "%s current zonal Spot prices fetched for region %s",
+        len(pricing_data),
+        region,
+    )
+    return pricing_data
+
+
+@single_flight
+def get_zonal_spot_price_snapshot(region: str) -> dict[str, dict[str, float]]:
+    """Current Spot prices as {instance_type: {az: hourly_price}} for the whole region. Kept in the
+    pricing store and re-fetched when older than SPOT_PRICE_SNAPSHOT_MAX_AGE_S
+    """
+    db_path = get_pricing_db_path()
+    feed = f"{FEED_SPOT_PRICE_SNAPSHOT}/{region}"
+    ingest = get_feed_ingest(db_path, feed)
+    if (
+        ingest
+        and time.time() - ingest["ingested_at"] < SPOT_PRICE_SNAPSHOT_MAX_AGE_S
+    ):
+        return get_current_zonal_values(db_path, METRIC_SPOT_PRICE, region)
+
+    logger.debug(
+        "Fetching a zonal Spot price snapshot for region %s ...", region
+    )
+    pricing_data = fetch_current_spot_prices_for_region(region)
+    snapshot: dict[str, dict[str, float]] = {}
+    latest_ts: dict[tuple[str, str], float] = {}
+    for pd in pricing_data:
+        key = (pd["InstanceType"], pd["AvailabilityZone"])
+        ts = pd["Timestamp"].timestamp()
+        if ts >= latest_ts.get(key, 0):
+            latest_ts[key] = ts
+            snapshot.setdefault(key[0], {})[key[1]] = float(pd["SpotPrice"])
+    replace_current_zonal_values(
+        db_path, feed, region, METRIC_SPOT_PRICE, snapshot
+    )
+    # Also feeds the price history, without marking any SKUs as synced
+    store_spot_price_history(
+        db_path,
+        region,
+        [
+            (it, az, latest_ts[(it, az)], price)
+            for it, by_az in snapshot.items()
+            for az, price in by_az.items()
+        ],
+        {},
+        "",
+    )
+    return snapshot
+
+
+def get_spot_price_stats_by_sku_and_az_over_period(
+    instance_types: list[str],
+    region: str,
+    lookback_period: timedelta,
+    az: str | None = None,
+) -> dict[tuple[str, str], SpotPriceStats]:
+    """Volatility, percentiles etc. per (instance type, AZ) from the local store after a delta sync.
+    (instance type, AZ) pairs without the price in effect at the period start are left out, as
+    stats over partial history would make them look more stable than they are
+    """
+    now = time.time()
+    since = now - lookback_period.total_seconds()
+    sync_spot_price_history_store(instance_types, region, since, az)
+    price_history = get_spot_price_history(
+        get_pricing_db_path(), region, instance_types, since, az or ""
+    )
+    history_start: dict[tuple[str, str], float] = {}
+    for instance_type, zone, ts, _ in price_history:
+        history_start[(instance_type, zone)] = min(
+            ts, history_start.get((instance_type, zone), ts)
+        )
+    partial = {k for k, ts in history_start.items() if ts > since}
+    if partial:
+        logger.debug(
+            "Not calculating Spot price stats for %s (instance type, AZ) pairs with history not reaching back %s",
+            len(partial),
+            lookback_period,
+        )
+    return compute_spot_price_stats_by_sku_and_az(
+        [x for x in price_history if (x[0], x[1]) not in partial],
+        since,
+        now,
+    )
+
+
+def attach_spot_price_stats_to_instance_types(
+    instance_types: list[InstanceTypeInfo],
+    region: str,
+    lookback_period: timedelta,
+    availability_zone: str | None = None,
+) -> None:
+    """For the SPOT_PRICE_STATS_MAX_SKUS cheapest instance types. Others are left without stats,
+    ranked after the ones with stats by the price stability strategy
+    """
+    cheapest: list[str] = []
+    for x in sorted(instance_types, key=lambda x: x.hourly_spot_price):
+        if x.instance_type not in cheapest:
+            cheapest.append(x.instance_type)
+        if len(cheapest) >= SPOT_PRICE_STATS_MAX_SKUS:
+            break
+    logger.debug(
+        "Calculating Spot price stats over %s for %s instance types ...",
+        lookback_period,
+        len(cheapest),
+    )
+    stats_by_sku_az = get_spot_price_stats_by_sku_and_az_over_period(
+        cheapest, region, lookback_period, availability_zone
+    )
+    for x in instance_types:
+        stats = stats_by_sku_az.get((x.instance_type, x.availability_zone))
+        if not stats:
+            continue
+        x.spot_price_volatility = stats.volatility
+        x.spot_price_p50 = stats.p50_price
+        x.spot_price_p90 = stats.p90_price
+        x.spot_price_changes = stats.price_changes
+        x.spot_price_trend = stats.trend
+
+
 def get_avg_spot_price_from_pricing_history_data_by_sku_and_az(
     pricing_data: list[dict],
 ) -> list[tuple[str, str, float]]:
@@ -523,7 +782,7 @@ def attach_pricing_info_to_instance_type_info(
 
 
 def resolve_hardware_requirements_to_instance_types(
-    all_instances: list[InstanceTypeInfo],
+    catalog: InstanceTypeCatalog,
     region: str,
     max_skus_to_get: int,
     use_boto3: bool = False,
@@ -544,67 +803,55 @@ def resolve_hardware_requirements_to_instance_types(
     instance_family: str = "",
     max_price: float = 0,
 ) -> list[InstanceTypeInfo]:
-    """Returns a price-sorted list"""
-    if not all_instances:
+    """Returns a price-sorted list. InstanceTypeInfo objects are only created for the catalog rows
+    matching the HW reqs"""
+    if not len(catalog):
         raise Exception("Need all_instances set to apply a selection strategy")
 
     logger.debug(
         "Filtering through %s instances types to match HW reqs ...",
-        len(all_instances),
+        len(catalog),
     )
-    qualified_instances_cpu_sorted: list[InstanceTypeInfo] = (
-        filter_instance_types_by_hw_req(
-            all_instances,
-            cpu_min=cpu_min,
-            cpu_max=cpu_max,
-            ram_min=ram_min,
-            ram_max=ram_max,
-            cpu_arch=architecture,
-            storage_min=storage_min,
-            storage_type=storage_type,
-            allow_burstable=allow_burstable,
-            storage_speed_class=storage_speed_class,
-            instance_types=instance_types,
-            instance_types_to_avoid=instance_types_to_avoid,
-            instance_family=instance_family,
-        )
+    qualified_rows_cpu_sorted = catalog.filter_rows(
+        cpu_min=cpu_min,
+        cpu_max=cpu_max,
+        ram_min=ram_min,
+        ram_max=ram_max,
+        cpu_arch=architecture,
+        storage_min=storage_min,
+        storage_type=storage_type,
+        allow_burstable=allow_burstable,
+        storage_speed_class=storage_speed_class,
+        instance_types=instance_types,
+        instance_types_to_avoid=instance_types_to_avoid,
+        instance_family=instance_family,
     )
 
     logger.debug(
-        "%s of them matching min HW reqs", len(qualified_instances_cpu_sorted)
+        "%s of them matching min HW reqs", len(qualified_rows_cpu_sorted)
     )
 
-    if not qualified_instances_cpu_sorted:
+    if not qualified_rows_cpu_sorted:
         return []
 
-    if len(qualified_instances_cpu_sorted) > MAX_SKUS_FOR_SPOT_PRICE_COMPARE:
-        logger.debug(
-            "Reducing to %s instance types by CPU count to reduce pricing history fetching",
-            MAX_SKUS_FOR_SPOT_PRICE_COMPARE,
-        )
-        qualified_instances_cpu_sorted = qualified_instances_cpu_sorted[
-            :MAX_SKUS_FOR_SPOT_PRICE_COMPARE
-        ]
-
     if persistent_vms:
         # Overrride selection strategy - only price sort makes sense for non-Spot VMs
-        for x in qualified_instances_cpu_sorted:
-            x.is_spot = False
-
         logger.debug(
             "Sorting VM shortlist by ondemand price as persistent VMs wanted ...",
         )
-
-        qualified_instances_cpu_sorted_with_ondemand_price = (
-            attach_pricing_info_to_instance_type_info(
-                qualified_instances_cpu_sorted
-            )
+        # Sort on the catalog / regional index prices, to look up full pricing for the shortlist only
+        ondemand_price_index = get_aws_static_ondemand_price_index(region)
+        ondemand_price_sorted_rows = sorted(
+            qualified_rows_cpu_sorted,
+            key=lambda row: catalog.hourly_ondemand_price[row]
+            or ondemand_price_index.get(catalog.instance_types[row], 0),
         )
-
-        ondemand_price_sorted = sorted(
-            qualified_instances_cpu_sorted_with_ondemand_price,
-            key=lambda x: x.monthly_ondemand_price,
+        ondemand_price_sorted = catalog.to_instance_type_infos(
+            ondemand_price_sorted_rows[:max_skus_to_get]
         )
+        for x in ondemand_price_sorted:
+            x.is_spot = False
+        attach_pricing_info_to_instance_type_info(ondemand_price_sorted)
 
         logger.debug(
             "Instances / prices in selection: %s",
@@ -614,11 +861,24 @@ def resolve_hardware_requirements_to_instance_types(
             ],
         )
 
-        return ondemand_price_sorted[:max_skus_to_get]
+        return ondemand_price_sorted
+
+    try:
+        catalog.set_eviction_rates(
+            extract_instance_type_eviction_rates_from_public_eviction_info(
+                region
+            )
+        )
+    except Exception:
+        if instance_selection_strategy in (
+            SELECTION_STRATEGY_EVICTION_RATE,
+            SELECTION_STRATEGY_BALANCED,
+        ):  # Can't proceed, for other strategies not critical
+            raise
+        logger.warning(
+            "Could not fetch eviction rate information from AWS, can't display expected eviction rate info"
+        )
 
-    instance_types_to_consider = [
-        x.instance_type for x in qualified_instances_cpu_sorted
-    ]
     avg_by_sku_az: list[tuple[str, str, float]] = (
         []
     )  # [(i3.xlarge, eu-north-1, 0.0132),]
@@ -626,53 +886,37 @@ def resolve_hardware_requirements_to_instance_types(
     qualified_instances_with_price_info: list[InstanceTypeInfo] = []
 
     if use_boto3:
-        hourly_pricing_data = get_spot_pricing_data_for_skus_over_period(
-            instance_types_to_consider,
-            region,
-            timedelta(days=SPOT_HISTORY_LOOKBACK_DAYS),
-            availability_zone,
-        )
-        if not hourly_pricing_data:
-            raise Exception(
-                "Could not fetch pricing data, can't select SKU"
-            )  # TODO use last cached data
-        avg_by_sku_az = (
-            get_avg_spot_price_from_pricing_history_data_by_sku_and_az(
-                hourly_pricing_data
-            )
-        )
-
-        if (
-            availability_zone
-        ):  # avg_by_sku_az and qualified_instances_by_cpu should map 1-to-1
-            avg_by_sku_az_map: dict[str, float] = {
-                ins_type: price for ins_type, _, price in avg_by_sku_az
-            }
-            for qi in qualified_instances_cpu_sorted:
-                if qi.instance_type in avg_by_sku_az_map:
-                    qi.hourly_spot_price = avg_by_sku_az_map[qi.instance_type]
-                    qi.region = region
-                    qi.availability_zone = availability_zone or ""
-            qualified_instances_with_price_info = (
-                qualified_instances_cpu_sorted
+        # Current zonal prices of all qualified SKUs from a region-wide snapshot
+        spot_price_snapshot = get_zonal_spot_price_snapshot(region)
+        for row in qualified_rows_cpu_sorted:
+            ins_type = catalog.instance_types[row]
+            for az, spot_price in spot_price_snapshot.get(
+                ins_type, {}
+            ).items():
+                if availability_zone and az != availability_zone:
+                    continue
+                avg_by_sku_az.append((ins_type, az, spot_price))
+        if not avg_by_sku_az:
+            raise Exception("Could not fetch pricing data, can't select SKU")
+        avg_by_sku_az.sort(key=lambda x: x[2])
+
+        # If user doesn't fix AZ, instance type infos will "multiply" as get price per AZ
+        for ins_type, az, spot_price in avg_by_sku_az:
+            qualified_instances_with_price_info.append(
+                catalog.to_instance_type_info(
+                    catalog.rows_by_instance_type[ins_type],
+                    availability_zone=az,
+                    hourly_spot_price=spot_price,
+                )
             )
-        else:
-            # If user doesn't fix AZ, instance type infos will "multiply" as get price per AZ
-            qualified_instances_map: dict[str, InstanceTypeInfo] = {
-                x.instance_type: x for x in qualified_instances_cpu_sorted
-            }
-
-            for ins_type, az, spot_price in avg_by_sku_az:
-                qiti: InstanceTypeInfo = qualified_instances_map[ins_type]
-                qiti_az = InstanceTypeInfo(**qiti.__dict__)
-                qiti_az.availability_zone = az
-                qiti_az.hourly_spot_price = spot_price
-                qualified_instances_with_price_info.append(qiti_az)
     else:
-        qualified_instances_with_price_info = qualified_instances_cpu_sorted
-        # Already have a price in InstanceTypeInfo when using public AWS pricing API, just for showing the candidates
+        # Already have a price in the catalog when using public AWS pricing API
+        qualified_instances_with_price_info = catalog.to_instance_type_infos(
+            qualified_rows_cpu_sorted
+        )
+        # Just for showing the candidates
         avg_by_sku_az = get_filtered_instances_by_price_no_az(
-            qualified_instances_cpu_sorted
+            qualified_instances_with_price_info
         )
 
     if max_price and qualified_instances_with_price_info:
@@ -695,27 +939,27 @@ def resolve_hardware_requirements_to_instance_types(
             if price <= max_price
         ]
 
-    try:
-        qualified_instances_with_price_info = (
-            add_eviction_rate_to_instance_types(
-                region, qualified_instances_with_price_info
-            )
-        )
-    except Exception:
-        if instance_selection_strategy in (
-            SELECTION_STRATEGY_EVICTION_RATE,
-            SELECTION_STRATEGY_BALANCED,
-        ):  # Can't proceed, for other strategies not critical
-            raise
-        logger.warning(
-            "Could not fetch eviction rate information from AWS, can't display expected eviction rate info"
-        )
-
     logger.debug("Instances / prices in selection: %s", avg_by_sku_az)
 
     if not qualified_instances_with_price_info:
         return []
 
+    if (
+        use_boto3
+        and instance_selection_strategy == SELECTION_STRATEGY_PRICE_STABILITY
+    ):
+        try:
+            attach_spot_price_stats_to_instance_types(
+                qualified_instances_with_price_info,
+                region,
+                timedelta(days=spot_price_stats_window_days),
+                availability_zone,
+            )
+        except Exception:
+            logger.exception(
+                "Failed to calculate Spot price stats for region %s", region
+            )
+
     instance_selection_strategy_cls = (
         InstanceTypeSelection.get_selection_strategy(
             instance_selection_strategy
@@ -732,16 +976,14 @@ def resolve_hardware_requirements_to_instance_types(
     if not strategy_sorted_instance_types:
         raise Exception("Should not happen")
 
-    strategy_sorted_instance_types_with_pricing = (
-        attach_pricing_info_to_instance_type_info(
-            strategy_sorted_instance_types
-        )
+    # Strategies don't filter on on-demand prices, enough to look them up for the returned ones
+    return attach_pricing_info_to_instance_type_info(
+        strategy_sorted_instance_types[:max_skus_to_get]
     )
 
-    return strategy_sorted_instance_types_with_pricing[:max_skus_to_get]
-
 
 @timed_cache(seconds=30)
+@single_flight
 def get_all_active_operator_instances_from_region(
     region: str,
 ) -> list[dict]:
@@ -772,6 +1014,7 @@ def get_all_active_operator_instances_from_region(
 
 
 @timed_cache(seconds=5)
+@single_flight
 def get_backing_vms_for_instances_if_any(
     region: str, instance_name: str
 ) -> list[dict]:
@@ -831,45 +1074,36 @@ def extract_memory_mb_from_aws_pricing_memory_string(
     return 0
 
 
-def get_all_instance_types_from_aws_regional_pricing_info(
-    region: str, regional_pricing_info: dict
-) -> list[InstanceTypeInfo]:
-    instances: list[InstanceTypeInfo] = []
+def build_instance_type_catalog_from_aws_regional_pricing_info(
+    region: str,
+    regional_pricing_info: dict,
+    spot_prices: dict[str, float] | None = None,
+) -> InstanceTypeCatalog:
+    """If spot_prices given, only instance types with a Spot price are included. Specs are parsed
+    only for instance types not yet seen in any region
+    """
+    specs = get_instance_spec_table(SPEC_SOURCE_PRICING)
+    catalog = InstanceTypeCatalog(region, specs=specs)
 
     for reg, reg_data in regional_pricing_info.get("regions", {}).items():
         for _, sku_data in reg_data.items():
             try:
-                instances.append(
-                    InstanceTypeInfo(
-                        instance_type=sku_data["Instance Type"],
-                        arch=infer_cpu_arch_from_aws_instance_type_name(
-                            sku_data["Instance Type"]
-                        ),
-                        cloud=CLOUD_AWS,
-                        region=region,
-                        hourly_ondemand_price=float(sku_data["price"]),
-                        monthly_ondemand_price=(
-                            round(float(sku_data["price"]) * 24 * 30, 1)
-                            if float(sku_data["price"]) * 24 * 30 < 100
-                            else round(float(sku_data["price"]) * 24 * 30)
-                        ),
-                        cpu=int(sku_data["vCPU"]),
-                        ram_mb=extract_memory_mb_from_aws_pricing_memory_string(
-                            sku_data.get("Memory", "0")
-                        ),
-                        instance_storage=extract_instance_storage_size_and_type_from_aws_pricing_storage_string(
-                            sku_data["Storage"]
-                        )[
-                            0
-                        ],
-                        storage_speed_class=extract_instance_storage_size_and_type_from_aws_pricing_storage_string(
-                            sku_data["Storage"]
-                        )[
-                            1
-                        ],
-                        is_burstable=sku_data["Instance Type"].startswith("t"),
-                        provider_description=sku_data,
+                instance_type = sku_data["Instance Type"]
+                if spot_prices is not None and not spot_prices.get(
+                    instance_type
+                ):
+                    continue
+                spec_row = specs.rows_by_instance_type.get(instance_type)
+                if spec_row is None:
+                    spec_row = add_instance_spec_from_aws_pricing_sku_data(
+                        specs, sku_data
                     )
+                catalog.add_spec_row(
+                    spec_row,
+                    hourly_spot_price=(
+                        spot_prices[instance_type] if spot_prices else 0
+                    ),
+                    hourly_ondemand_price=float(sku_data["price"]),
                 )
             except Exception as e:
                 logger.error(
@@ -878,7 +1112,40 @@ def get_all_instance_types_from_aws_regional_pricing_info(
                     e,
                 )
 
-    return instances
+    return catalog
+
+
+def add_instance_spec_from_aws_pricing_sku_data(
+    specs: InstanceSpecTable, sku_data: dict
+) -> int:
+    instance_type = sku_data["Instance Type"]
+    storage_size, storage_speed_class = (
+        extract_instance_storage_size_and_type_from_aws_pricing_storage_string(
+            sku_data["Storage"]
+        )
+    )
+    return specs.add(
+        instance_type,
+        infer_cpu_arch_from_aws_instance_type_name(instance_type),
+        cpu=int(sku_data["vCPU"]),
+        ram_mb=extract_memory_mb_from_aws_pricing_memory_string(
+            sku_data.get("Memory", "0")
+        ),
+        instance_storage=storage_size,
+        instance_storage_disks=extract_instance_storage_disk_count_from_aws_pricing_storage_string(
+            sku_data
+        ),
+        storage_speed_class=storage_speed_class,
+        is_burstable=instance_type.startswith("t"),
+    )
+
+
+def get_all_instance_types_from_aws_regional_pricing_info(
+    region: str, regional_pricing_info: dict
+) -> list[InstanceTypeInfo]:
+    return build_instance_type_catalog_from_aws_regional_pricing_info(
+        region, regional_pricing_info
+    ).to_instance_type_infos()
 
 
 def get_spot_instance_types_with_price_from_s3_pricing_json(
@@ -925,26 +1192,10 @@ def get_spot_instance_types_with_price_from_s3_pricing_json(
                     ]
                   },
     """
-    ret = {}
-    r = re.compile(r"[0-9.]")
     for rd in spot_pricing_info.get("config", {}).get("regions", []):
-        if rd.get("region") != region:
-            continue
-        for ins_types in rd.get("instanceTypes", []):
-            for size in ins_types.get("sizes", []):
-                if not size.get("size"):
-                    continue
-                for vc in size.get("valueColumns", []):
-                    if vc.get("name") == "linux":
-                        if vc.get("prices", {}).get("USD", 0) and r.match(
-                            vc.get("prices", {}).get("USD", 0)
-                        ):
-                            if float(vc.get("prices", {}).get("USD", 0)):
-                                ret[size["size"]] = float(
-                                    vc.get("prices", {}).get("USD", 0)
-                                )
-
-    return ret
+        if rd.get("region") == region:
+            return extract_spot_prices_from_public_spot_json_region_data(rd)
+    return {}
 
 
 def get_eviction_rate_brackets_from_public_eviction_info(
@@ -967,66 +1218,55 @@ def get_eviction_rate_brackets_from_public_eviction_info(
     return {}
 
 
-def extract_instance_type_eviction_rates_from_public_eviction_info(
-    region: str, public_eviction_info: dict | None = None
+def extract_instance_type_eviction_rates_from_eviction_rate_index(
+    region: str, eviction_rate_index: dict
 ) -> dict[str, EvictionRateInfo]:
     ret: dict[str, EvictionRateInfo] = {}
-
-    if not public_eviction_info:
-        public_eviction_info = get_spot_eviction_rates_from_public_json()
-    if not public_eviction_info:
-        raise Exception("Need eviction rate info to proceed")
-
     ev_brackets = get_eviction_rate_brackets_from_public_eviction_info(
-        public_eviction_info
+        eviction_rate_index
     )
-
-    for instance_type, ev_info in (
-        public_eviction_info.get("spot_advisor", {})
-        .get(region, {})
-        .get("Linux", {})
-        .items()
+    for instance_type, (ev_group, savings_rate) in (
+        eviction_rate_index.get("regions", {}).get(region, {}).items()
     ):
-        # In[156]: eviction_rate_info["spot_advisor"]["eu-north-1"]["Linux"]
-        # Out[156]:
-        # {'r5dn.24xlarge': {'s': 73, 'r': 2},
-        #  'm7gd.8xlarge': {'s': 74, 'r': 1},
-
-        try:
-            ret[instance_type] = EvictionRateInfo(
-                instance_type=instance_type,
-                region=region,
-                eviction_rate_group=ev_info["r"],
-                eviction_rate_group_label=ev_brackets[ev_info["r"]]["label"],
-                spot_savings_rate=ev_info["s"],
-                eviction_rate_max_pct=ev_brackets[ev_info["r"]]["max"],
-            )
-        except Exception as e:
+        if ev_group not in ev_brackets:
             logger.error(
-                "Failed to parse instance eviction rate info from: %s. Error: %s",
-                ev_info,
-                e,
+                "Unknown eviction rate group %s for instance type %s",
+                ev_group,
+                instance_type,
             )
-
+            continue
+        ret[instance_type] = EvictionRateInfo(
+            instance_type=instance_type,
+            region=region,
+            eviction_rate_group=ev_group,
+            eviction_rate_group_label=ev_brackets[ev_group]["label"],
+            spot_savings_rate=savings_rate,
+            eviction_rate_max_pct=ev_brackets[ev_group]["max"],
+        )
     return ret
 
 
-def add_eviction_rate_to_instance_types(
-    region, instances: list[InstanceTypeInfo]
-) -> list[InstanceTypeInfo]:
-    ev_rate_info = (
-        extract_instance_type_eviction_rates_from_public_eviction_info(region)
-    )
-    if not ev_rate_info:
-        raise Exception(
-            "Can't use eviction rate based selection as could not fetch eviction rate data"
+def extract_instance_type_eviction_rates_from_public_eviction_info(
+    region: str, public_eviction_info: dict | None = None
+) -> dict[str, EvictionRateInfo]:
+    """Served from the memoized all-regions eviction rate index, unless raw
+    spot-advisor-data.json content given
+    """
+    if public_eviction_info:
+        return extract_instance_type_eviction_rates_from_eviction_rate_index(
+            region, build_eviction_rate_index("", public_eviction_info)
         )
-    for ins in instances:
-        if ins.instance_type in ev_rate_info:
-            ins.max_eviction_rate = ev_rate_info[
-                ins.instance_type
-            ].eviction_rate_max_pct
-            ins.eviction_rate_group_label = ev_rate_info[
-                ins.instance_type
-            ].eviction_rate_group_label
-    return instances
+
+    eviction_rate_index = get_spot_eviction_rate_index()
+    if not eviction_rate_index:
+        raise Exception("Need eviction rate info to proceed")
+
+    version = eviction_rate_index["feed_file"]
+    memo_version, memo_infos = eviction_rate_infos_memo.get(region, ("", {}))
+    if memo_version == version:
+        return memo_infos
+    infos = extract_instance_type_eviction_rates_from_eviction_rate_index(
+        region, eviction_rate_index
+    )
+    eviction_rate_infos_memo[region] = (version, infos)
+    return infos
@@ -0,0 +1,187 @@
+import logging
+import math
+import re
+from array import array
+from dataclasses import dataclass
+from itertools import compress
+
+from pg_spot_operator.cloud_impl.aws_cache import get_spot_eviction_rate_index
+from pg_spot_operator.cloud_impl.cloud_structs import RegionalSpotPricingStats
+from pg_spot_operator.cloud_impl.cloud_util import (
+    infer_cpu_arch_from_aws_instance_type_name,
+)
+from pg_spot_operator.constants import CPU_ARCH_ARM
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EvictionRateColumns:
+    """Column-wise form of the eviction rate index. Rows are grouped by region - rows of
+    regions[i] are in the [region_offsets[i], region_offsets[i + 1]) range
+    """
+
+    version: str
+    regions: list[str]
+    region_offsets: array
+    instance_types: list[str]
+    eviction_rate_groups: array
+    savings_rates: array
+    is_arm: array
+    brackets: dict[int, dict]
+
+
+# (index version, columns)
+eviction_rate_columns_memo: tuple[str, EvictionRateColumns | None] = ("", None)
+
+
+def build_eviction_rate_columns(
+    eviction_rate_index: dict,
+) -> EvictionRateColumns:
+    regions: list[str] = []
+    region_offsets = array("I", [0])
+    instance_types: list[str] = []
+    eviction_rate_groups = array("B")
+    savings_rates = array("B")
+    is_arm = array("B")
+    for region, region_data in sorted(
+        eviction_rate_index.get("regions", {}).items()
+    ):
+        for instance_type, (ev_group, savings_rate) in region_data.items():
+            instance_types.append(instance_type)
+            eviction_rate_groups.append(ev_group)
+            savings_rates.append(savings_rate)
+            is_arm.append(
+                infer_cpu_arch_from_aws_instance_type_name(instance_type)
+                == CPU_ARCH_ARM
+            )
+        regions.append(region)
+        region_offsets.append(len(instance_types))
+    return EvictionRateColumns(
+        version=eviction_rate_index.get("feed_file", ""),
+        regions=regions,
+        region_offsets=region_offsets,
+        instance_types=instance_types,
+        eviction_rate_groups=eviction_rate_groups,
+        savings_rates=savings_rates,
+        is_arm=is_arm,
+        brackets={
+            x["index"]: x for x in eviction_rate_index.get("ranges", [])
+        },
+    )
+
+
+def get_eviction_rate_columns() -> EvictionRateColumns | None:
+    """Re-built only when the underlying eviction rate index changes"""
+    global eviction_rate_columns_memo
+    eviction_rate_index = get_spot_eviction_rate_index()
+    if not eviction_rate_index:
+        return None
+    version, columns = eviction_rate_columns_memo
+    if columns is None or version != eviction_rate_index["feed_file"]:
+        columns = build_eviction_rate_columns(eviction_rate_index)
+        eviction_rate_columns_memo = (columns.version, columns)
+    return columns
+
+
+def get_row_mask(
+    columns: EvictionRateColumns, cpu_arch: str = "", instance_family: str = ""
+) -> array | None:
+    """None if no filtering needed, else a 0/1 mask over all rows"""
+    arch_filter = cpu_arch.strip().lower()
+    if arch_filter == "any":
+        arch_filter = ""
+    if not (arch_filter or instance_family):
+        return None
+    family_regex = re.compile(instance_family) if instance_family else None
+    want_arm = "arm" in arch_filter
+    return array(
+        "B",
+        (
+            (not arch_filter or bool(arm) == want_arm)
+            and (
+                family_regex is None
+                or bool(family_regex.search(instance_type))
+            )
+            for instance_type, arm in zip(
+                columns.instance_types, columns.is_arm
+            )
+        ),
+    )
+
+
+def percentile(sorted_values: list[int], pct: float) -> float:
+    """Nearest-rank percentile of pre-sorted values"""
+    if not sorted_values:
+        return 0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def median(sorted_values: list[int]) -> float:
+    n = len(sorted_values)
+    if not n:
+        return 0
+    return (sorted_values[n // 2] + sorted_values[(n - 1) // 2]) / 2
+
+
+def summarize_spot_savings_and_eviction_rates(
+    columns: EvictionRateColumns,
+    regions: list[str] | None = None,
+    cpu_arch: str = "",
+    instance_family: str = "",
+) -> list[RegionalSpotPricingStats]:
+    """Per region savings and eviction rate aggregates over the Linux instance types of the
+    Spot advisor data. Regions without (matching) instance types are left out
+    """
+    ret: list[RegionalSpotPricingStats] = []
+    mask = get_row_mask(columns, cpu_arch, instance_family)
+    wanted_regions = set(regions) if regions else None
+
+    for i, region in enumerate(columns.regions):
+        if wanted_regions is not None and region not in wanted_regions:
+            continue
+        start, end = columns.region_offsets[i], columns.region_offsets[i + 1]
+        savings = columns.savings_rates[start:end]
+        ev_groups = columns.eviction_rate_groups[start:end]
+        if mask is not None:
+            region_mask = mask[start:end]
+            savings = array("B", compress(savings, region_mask))
+            ev_groups = array("B", compress(ev_groups, region_mask))
+        if not savings:
+            continue
+
+        sorted_savings = sorted(savings)
+        ev_rate_group = round(sum(ev_groups) / len(ev_groups))
+        if ev_rate_group not in columns.brackets:
+            logger.error(
+                "Unknown eviction rate group %s for region %s",
+                ev_rate_group,
+                region,
+            )
+            continue
+        ret.append(
+            RegionalSpotPricingStats(
+                region=region,
+                avg_spot_savings_rate=round(sum(savings) / len(savings), 1),
+                avg_eviction_rate_group=ev_rate_group,
+                eviction_rate_group_label=columns.brackets[ev_rate_group][
+                    "label"
+                ],
+                median_spot_savings_rate=median(sorted_savings),
+                p90_spot_savings_rate=percentile(sorted_savings, 90),
+                instance_type_count=len(savings),
+                eviction_rate_group_counts={
+                    g: ev_groups.count(g) for g in sorted(columns.brackets)
+                },
+            )
+        )
+    return ret
+
+
+def get_eviction_rate_group_labels() -> list[str]:
+    """E.g. ["<5%", "5-10%", "10-15%", "15-20%", ">20%"]"""
+    columns = get_eviction_rate_columns()
+    if not columns:
+        return []
+    return [b["label"] for _, b in sorted(columns.brackets.items())]
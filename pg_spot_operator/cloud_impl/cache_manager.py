@@ -0,0 +1,218 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRICE_CACHE_MAX_BYTES = 100 * 1024 * 1024
+TEMP_FILE_MAX_AGE_S = 3600
+KIND_OTHER = "other"
+KIND_TEMP = "temp"
+LOCK_FILE_SUFFIX = ".lock"
+
+
+@dataclass
+class CacheKindPolicy:
+    kind: str
+    file_prefix: str
+    max_age_days: float
+
+
+# Checked in order, first prefix match wins. Age is by mtime, which is bumped on conditional GET revalidations
+CACHE_KIND_POLICIES = [
+    CacheKindPolicy("spot", "aws_spot_", 2),
+    CacheKindPolicy("eviction_rate", "aws_eviction_rate_", 2),
+    CacheKindPolicy("ondemand", "aws_ondemand_", 7),
+    CacheKindPolicy("ami", "aws_ami_", 14),
+    CacheKindPolicy("boto3_catalog", "aws_boto3_catalog_", 30),
+    CacheKindPolicy("meta", "", 30),  # *.meta.json
+]
+# Never pruned, only reported. Same goes for *.lock files, as deleting a held lock file breaks flock
+UNMANAGED_FILE_PREFIXES = ("pricing.db",)
+
+# In-process read counters per kind, e.g. {"spot": {"hits": 1, "misses": 0}}
+cache_read_counters: dict[str, dict[str, int]] = {}
+# Reads happen from region worker threads too
+cache_read_counters_lock = threading.Lock()
+
+
+@dataclass
+class CacheFileInfo:
+    name: str
+    kind: str
+    size: int
+    mtime: float
+    atime: float
+
+
+def get_cache_file_kind(file_name: str) -> str:
+    """aws_spot_2024111_1000.json.gz -> spot"""
+    if file_name.startswith(UNMANAGED_FILE_PREFIXES) or file_name.endswith(
+        LOCK_FILE_SUFFIX
+    ):
+        return KIND_OTHER
+    if not (file_name.endswith(".json") or file_name.endswith(".json.gz")):
+        return KIND_TEMP  # Leftovers of interrupted atomic writes
+    if file_name.endswith(".meta.json") or file_name.endswith(".meta.json.gz"):
+        return "meta"
+    for policy in CACHE_KIND_POLICIES:
+        if policy.file_prefix and file_name.startswith(policy.file_prefix):
+            return policy.kind
+    return KIND_OTHER
+
+
+def record_cache_read(file_name: str, hit: bool) -> None:
+    kind = get_cache_file_kind(file_name)
+    with cache_read_counters_lock:
+        counters = cache_read_counters.setdefault(
+            kind, {"hits": 0, "misses": 0}
+        )
+        counters["hits" if hit else "misses"] += 1
+
+
+def pop_cache_read_counters() -> dict[str, dict[str, int]]:
+    """Returns the counters accumulated so far and starts from zero"""
+    global cache_read_counters
+    with cache_read_counters_lock:
+        counters = cache_read_counters
+        cache_read_counters = {}
+    return counters
+
+
+def touch_cache_file_access_time(cache_path: str) -> None:
+    """Sets atime explicitly as the LRU ledger, leaving mtime for age based retention. Works
+    regardless of noatime / relatime mount options
+    """
+    try:
+        st = os.stat(cache_path)
+        os.utime(cache_path, (time.time(), st.st_mtime))
+    except OSError:
+        pass
+
+
+def list_cache_files(cache_dir: str) -> list[CacheFileInfo]:
+    ret: list[CacheFileInfo] = []
+    try:
+        entries = list(os.scandir(cache_dir))
+    except FileNotFoundError:
+        return ret
+    for e in entries:
+        try:
+            if not e.is_file():
+                continue
+            st = e.stat()
+        except OSError:
+            continue
+        ret.append(
+            CacheFileInfo(
+                name=e.name,
+                kind=get_cache_file_kind(e.name),
+                size=st.st_size,
+                mtime=st.st_mtime,
+                atime=st.st_atime,
+            )
+        )
+    return ret
+
+
+def prune_cache_dir(
+    cache_dir: str,
+    max_bytes: int = DEFAULT_PRICE_CACHE_MAX_BYTES,
+    protected_files: set[str] | None = None,
+) -> dict:
+    """First drops files past their kind's retention period, then least recently accessed files
+    until within the byte budget. Returns {"deleted_files": n, "freed_bytes": n, "total_bytes": n}
+    """
+    now = time.time()
+    max_age_by_kind = {p.kind: p.max_age_days for p in CACHE_KIND_POLICIES}
+    protected_files = protected_files or set()
+    deleted_files = 0
+    freed_bytes = 0
+
+    def delete(f: CacheFileInfo) -> bool:
+        nonlocal deleted_files, freed_bytes
+        try:
+            os.unlink(os.path.join(cache_dir, f.name))
+        except OSError:
+            logger.info("Failed to delete price cache file %s", f.name)
+            return False
+        deleted_files += 1
+        freed_bytes += f.size
+        return True
+
+    remaining: list[CacheFileInfo] = []
+    for f in list_cache_files(cache_dir):
+        if f.kind == KIND_OTHER or f.name in protected_files:
+            remaining.append(f)
+            continue
+        if f.kind == KIND_TEMP:
+            expired = now - f.mtime > TEMP_FILE_MAX_AGE_S
+        else:
+            expired = now - f.mtime > max_age_by_kind[f.kind] * 86400
+        if not (expired and delete(f)):
+            remaining.append(f)
+
+    total_bytes = sum(f.size for f in remaining)
+    if total_bytes > max_bytes:
+        for f in sorted(remaining, key=lambda x: x.atime):
+            if total_bytes <= max_bytes:
+                break
+            if (
+                f.kind in (KIND_OTHER, "meta", KIND_TEMP)
+                or f.name in protected_files
+            ):
+                continue
+            if delete(f):
+                total_bytes -= f.size
+
+    if deleted_files:
+        logger.debug(
+            "Pruned %s files / %s bytes from the price cache",
+            deleted_files,
+            freed_bytes,
+        )
+    return {
+        "deleted_files": deleted_files,
+        "freed_bytes": freed_bytes,
+        "total_bytes": total_bytes,
+    }
+
+
+def summarize_cache_dir(
+    cache_dir: str, read_counters: dict[str, dict[str, int]] | None = None
+) -> dict[str, dict]:
+    """Per kind {"files": n, "bytes": n, "oldest_mtime": epoch, "last_access": epoch, "hits": n, "misses": n}"""
+    ret: dict[str, dict] = {}
+    for f in list_cache_files(cache_dir):
+        s = ret.setdefault(
+            f.kind,
+            {
+                "files": 0,
+                "bytes": 0,
+                "oldest_mtime": f.mtime,
+                "last_access": f.atime,
+                "hits": 0,
+                "misses": 0,
+            },
+        )
+        s["files"] += 1
+        s["bytes"] += f.size
+        s["oldest_mtime"] = min(s["oldest_mtime"], f.mtime)
+        s["last_access"] = max(s["last_access"], f.atime)
+    for kind, counters in (read_counters or {}).items():
+        s = ret.setdefault(
+            kind,
+            {
+                "files": 0,
+                "bytes": 0,
+                "oldest_mtime": 0,
+                "last_access": 0,
+                "hits": 0,
+                "misses": 0,
+            },
+        )
+        s["hits"] += counters.get("hits", 0)
+        s["misses"] += counters.get("misses", 0)
+    return ret
@@ -4,7 +4,7 @@ from datetime import datetime
 from pg_spot_operator.constants import CLOUD_AWS
 
 
-@dataclass
+@dataclass(slots=True)
 class InstanceTypeInfo:
     instance_type: str
     arch: str
@@ -18,6 +18,12 @@ class InstanceTypeInfo:
     monthly_ondemand_price: float = 0
     max_eviction_rate: float = 0
     eviction_rate_group_label: str = ""
+    # Zonal Spot price history stats, only set for the price-stability selection strategy
+    spot_price_volatility: float = 0
+    spot_price_p50: float = 0
+    spot_price_p90: float = 0
+    spot_price_changes: int = 0
+    spot_price_trend: float = 0
     cpu: int = 0
     ram_mb: int = 0
     instance_storage: int = 0
@@ -63,3 +69,8 @@ class RegionalSpotPricingStats:
     avg_spot_savings_rate: float
     avg_eviction_rate_group: int
     eviction_rate_group_label: str
+    median_spot_savings_rate: float = 0
+    p90_spot_savings_rate: float = 0
+    instance_type_count: int = 0
+    # {eviction_rate_group: instance_type_count}
+    eviction_rate_group_counts: dict[int, int] = field(default_factory=dict)
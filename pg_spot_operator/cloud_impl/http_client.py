@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+HTTP_RETRIES = 3
+HTTP_RETRY_BACKOFF_FACTOR = 0.5  # 0.5s, 1s, 2s
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+HTTP_POOL_MAXSIZE = 10
+# (connect, read) timeouts in seconds. Pricing JSONs can be a few MB
+DEFAULT_HTTP_TIMEOUT = (3.05, 10)
+HTTP_TIMEOUTS_BY_HOST: dict[str, tuple[float, float]] = {
+    "b0.p.awsstatic.com": (3.05, 15),
+    "website.spot.ec2.aws.a2z.com": (3.05, 15),
+    "spot-bid-advisor.s3.amazonaws.com": (3.05, 15),
+    "ec2.shop": (3.05, 5),
+}
+
+try:
+    import brotli  # noqa: F401
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# No network access at all, e.g. for CI / air-gapped hosts running from an imported pricing bundle
+offline: bool = False
+session: requests.Session | None = None
+session_lock = threading.Lock()
+# Per host counters, e.g. {"ec2.shop": {"requests": 1, "failures": 0, "bytes": 123, "seconds": 0.2}}
+http_download_stats: dict[str, dict] = {}
+http_download_stats_lock = threading.Lock()
+
+
+class OfflineModeError(requests.ConnectionError):
+    pass
+
+
+def get_http_session() -> requests.Session:
+    """A shared keep-alive session with bounded exponential backoff retries on connection errors
+    and throttling / server errors
+    """
+    global session
+    with session_lock:
+        if session is None:
+            retry = Retry(
+                total=HTTP_RETRIES,
+                backoff_factor=HTTP_RETRY_BACKOFF_FACTOR,
+                status_forcelist=HTTP_RETRY_STATUSES,
+                allowed_methods=["GET", "HEAD"],
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                max_retries=retry,
+                pool_connections=HTTP_POOL_MAXSIZE,
+                pool_maxsize=HTTP_POOL_MAXSIZE,
+            )
+            s = requests.Session()
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers["Accept-Encoding"] = ACCEPT_ENCODING
+            session = s
+        return session
+
+
+def get_timeout_for_url(url: str) -> tuple[float, float]:
+    return HTTP_TIMEOUTS_BY_HOST.get(
+        urlparse(url).hostname or "", DEFAULT_HTTP_TIMEOUT
+    )
+
+
+def record_http_download(
+    host: str, elapsed: float, num_bytes: int, failed: bool
+) -> None:
+    with http_download_stats_lock:
+        stats = http_download_stats.setdefault(
+            host, {"requests": 0, "failures": 0, "bytes": 0, "seconds": 0.0}
+        )
+        stats["requests"] += 1
+        stats["failures"] += int(failed)
+        stats["bytes"] += num_bytes
+        stats["seconds"] += elapsed
+
+
+def get_transferred_bytes(r: requests.Response) -> int:
+    """Response size on the wire, i.e. still compressed, unlike len(r.content)"""
+    try:
+        return int(r.headers["Content-Length"])
+    except (KeyError, ValueError):
+        pass
+    try:
+        return int(
+            r.raw.tell()
+        )  # Bytes read from the socket, e.g. for chunked responses
+    except Exception:
+        return len(r.content)
+
+
+def http_get(
+    url: str,
+    headers: dict | None = None,
+    timeout: tuple[float, float] | None = None,
+) -> requests.Response:
+    """requests.get via the shared session with per-host timeouts. Raises requests.RequestException
+    if still failing after retries
+    """
+    if offline:
+        raise OfflineModeError(f"Offline mode, not fetching {url}")
+    host = urlparse(url).hostname or ""
+    started = time.time()
+    try:
+        r = get_http_session().get(
+            url, headers=headers, timeout=timeout or get_timeout_for_url(url)
+        )
+    except requests.RequestException:
+        record_http_download(host, time.time() - started, 0, True)
+        raise
+    elapsed = time.time() - started
+    num_bytes = get_transferred_bytes(r)
+    record_http_download(host, elapsed, num_bytes, r.status_code >= 400)
+    logger.debug(
+        "GET %s - retcode: %s, %s bytes (%s decoded) in %.2fs",
+        url,
+        r.status_code,
+        num_bytes,
+        len(r.content),
+        elapsed,
+    )
+    return r
+
+
+def get_http_download_stats() -> dict[str, dict]:
+    """Returns a copy of the per-host download counters"""
+    with http_download_stats_lock:
+        return {
+            host: dict(stats) for host, stats in http_download_stats.items()
+        }
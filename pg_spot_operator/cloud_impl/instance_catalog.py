@@ -0,0 +1,386 @@
+import logging
+import re
+import sys
+import threading
+from array import array
+
+from pg_spot_operator.cloud_impl.cloud_structs import (
+    EvictionRateInfo,
+    InstanceTypeInfo,
+)
+from pg_spot_operator.constants import CLOUD_AWS, MF_SEC_VM_STORAGE_TYPE_LOCAL
+
+logger = logging.getLogger(__name__)
+
+
+def calc_monthly_price(hourly_price: float) -> float:
+    return (
+        round(hourly_price * 24 * 30, 1)
+        if hourly_price * 24 * 30 < 100
+        else round(hourly_price * 24 * 30)
+    )
+
+
+# Data sources of instance specs, which can differ slightly in details like the storage speed class
+SPEC_SOURCE_BOTO3 = "boto3"
+SPEC_SOURCE_PRICING = "pricing"
+
+
+class InstanceSpecTable:
+    """Region independent instance type specs, column-wise, one row per instance type. Shared by
+    all regional catalogs built from the same data source, so that each spec is parsed only once
+    per process. Low-cardinality strings (arch, storage class) are stored as codes into a string table
+    """
+
+    def __init__(self):
+        self.instance_types: list[str] = []
+        self.rows_by_instance_type: dict[str, int] = {}
+        self.strings: list[str] = [""]
+        self.string_codes: dict[str, int] = {"": 0}
+        self.arch = array("B")
+        self.cpu = array("H")
+        self.ram_mb = array("I")
+        self.instance_storage = array("I")
+        self.instance_storage_disks = array("H")
+        self.storage_speed_class = array("B")
+        self.is_burstable = array("B")
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.instance_types)
+
+    def get_string_code(self, s: str) -> int:
+        code = self.string_codes.get(s)
+        if code is None:
+            code = self.string_codes[s] = len(self.strings)
+            self.strings.append(s)
+        return code
+
+    def add(
+        self,
+        instance_type: str,
+        arch: str,
+        cpu: int = 0,
+        ram_mb: int = 0,
+        instance_storage: int = 0,
+        instance_storage_disks: int = 1,
+        storage_speed_class: str = "hdd",
+        is_burstable: bool = False,
+    ) -> int:
+        """Returns the row number. Repeated instance types are ignored, first one wins"""
+        with self.lock:
+            row = self.rows_by_instance_type.get(instance_type)
+            if row is not None:
+                return row
+            row = len(self.instance_types)
+            self.arch.append(self.get_string_code(arch))
+            self.cpu.append(cpu)
+            self.ram_mb.append(ram_mb)
+            self.instance_storage.append(instance_storage)
+            self.instance_storage_disks.append(instance_storage_disks)
+            self.storage_speed_class.append(
+                self.get_string_code(storage_speed_class)
+            )
+            self.is_burstable.append(is_burstable)
+            # Published last, so that lock-free readers only see complete rows
+            instance_type = sys.intern(instance_type)
+            self.instance_types.append(instance_type)
+            self.rows_by_instance_type[instance_type] = row
+            return row
+
+
+# Process-wide spec tables by data source
+instance_spec_tables: dict[str, InstanceSpecTable] = {}
+instance_spec_tables_lock = threading.Lock()
+
+
+def get_instance_spec_table(source: str) -> InstanceSpecTable:
+    with instance_spec_tables_lock:
+        if source not in instance_spec_tables:
+            instance_spec_tables[source] = InstanceSpecTable()
+        return instance_spec_tables[source]
+
+
+class InstanceTypeCatalog:
+    """Instance types available in one region with their prices, column-wise - one array per
+    attribute, indexed by row. Hardware specs are looked up from a (shared) InstanceSpecTable via
+    spec_row. Full InstanceTypeInfo objects are only created for the final shortlist via
+    to_instance_type_info
+    """
+
+    def __init__(
+        self,
+        region: str,
+        cloud: str = CLOUD_AWS,
+        specs: InstanceSpecTable | None = None,
+    ):
+        self.region = region
+        self.cloud = cloud
+        self.specs = specs if specs is not None else InstanceSpecTable()
+        self.instance_types: list[str] = []
+        self.rows_by_instance_type: dict[str, int] = {}
+        self.strings: list[str] = [""]
+        self.string_codes: dict[str, int] = {"": 0}
+        self.spec_row = array("I")
+        self.hourly_spot_price = array("d")
+        self.hourly_ondemand_price = array("d")
+        self.max_eviction_rate = array("d")
+        self.eviction_rate_group_label = array("B")
+
+    def __len__(self) -> int:
+        return len(self.instance_types)
+
+    def get_string_code(self, s: str) -> int:
+        code = self.string_codes.get(s)
+        if code is None:
+            code = self.string_codes[s] = len(self.strings)
+            self.strings.append(s)
+        return code
+
+    def add_spec_row(
+        self,
+        spec_row: int,
+        hourly_spot_price: float = 0,
+        hourly_ondemand_price: float = 0,
+        max_eviction_rate: float = 0,
+        eviction_rate_group_label: str = "",
+    ) -> int:
+        """Returns the row number. Repeated instance types are ignored, first one wins"""
+        instance_type = self.specs.instance_types[spec_row]
+        if instance_type in self.rows_by_instance_type:
+            return self.rows_by_instance_type[instance_type]
+        row = len(self.instance_types)
+        self.instance_types.append(instance_type)
+        self.rows_by_instance_type[instance_type] = row
+        self.spec_row.append(spec_row)
+        self.hourly_spot_price.append(hourly_spot_price)
+        self.hourly_ondemand_price.append(hourly_ondemand_price)
+        self.max_eviction_rate.append(max_eviction_rate)
+        self.eviction_rate_group_label.append(
+            self.get_string_code(eviction_rate_group_label)
+        )
+        return row
+
+    def add(
+        self,
+        instance_type: str,
+        arch: str,
+        cpu: int = 0,
+        ram_mb: int = 0,
+        instance_storage: int = 0,
+        instance_storage_disks: int = 1,
+        storage_speed_class: str = "hdd",
+        is_burstable: bool = False,
+        hourly_spot_price: float = 0,
+        hourly_ondemand_price: float = 0,
+        max_eviction_rate: float = 0,
+        eviction_rate_group_label: str = "",
+    ) -> int:
+        """Returns the row number. Specs already in the spec table are not overwritten"""
+        spec_row = self.specs.add(
+            instance_type,
+            arch,
+            cpu=cpu,
+            ram_mb=ram_mb,
+            instance_storage=instance_storage,
+            instance_storage_disks=instance_storage_disks,
+            storage_speed_class=storage_speed_class,
+            is_burstable=is_burstable,
+        )
+        return self.add_spec_row(
+            spec_row,
+            hourly_spot_price=hourly_spot_price,
+            hourly_ondemand_price=hourly_ondemand_price,
+            max_eviction_rate=max_eviction_rate,
+            eviction_rate_group_label=eviction_rate_group_label,
+        )
+
+    @classmethod
+    def from_instance_type_infos(
+        cls, instance_type_infos: list[InstanceTypeInfo]
+    ) -> "InstanceTypeCatalog":
+        catalog = cls(
+            instance_type_infos[0].region if instance_type_infos else ""
+        )
+        for x in instance_type_infos:
+            catalog.add(
+                x.instance_type,
+                x.arch,
+                cpu=x.cpu,
+                ram_mb=x.ram_mb,
+                instance_storage=x.instance_storage,
+                instance_storage_disks=x.instance_storage_disks,
+                storage_speed_class=x.storage_speed_class,
+                is_burstable=x.is_burstable,
+                hourly_spot_price=x.hourly_spot_price,
+                hourly_ondemand_price=x.hourly_ondemand_price,
+                max_eviction_rate=x.max_eviction_rate,
+                eviction_rate_group_label=x.eviction_rate_group_label,
+            )
+        return catalog
+
+    def set_eviction_rates(
+        self, eviction_rate_infos: dict[str, EvictionRateInfo]
+    ) -> None:
+        for instance_type, eri in eviction_rate_infos.items():
+            row = self.rows_by_instance_type.get(instance_type)
+            if row is None:
+                continue
+            self.max_eviction_rate[row] = eri.eviction_rate_max_pct
+            self.eviction_rate_group_label[row] = self.get_string_code(
+                eri.eviction_rate_group_label
+            )
+
+    def filter_rows(
+        self,
+        cpu_min: int | None = 0,
+        cpu_max: int | None = 0,
+        ram_min: int | None = 0,
+        ram_max: int | None = 0,
+        cpu_arch: str = "",
+        storage_min: int | None = 0,
+        storage_type: str = "network",
+        allow_burstable: bool = False,
+        storage_speed_class: str | None = "any",
+        instance_types: list[str] | None = None,
+        instance_types_to_avoid: list[str] | None = None,
+        instance_family: str = "",
+    ) -> list[int]:
+        """Returns qualified rows sorted by (CPU, RAM) or (CPU, Total instance storage DESC)"""
+        if instance_types:
+            logger.debug(
+                "Only considering following instance types: %s",
+                instance_types,
+            )
+        if instance_family:
+            logger.debug(
+                "Only considering instance families matching regex: %s",
+                instance_family,
+            )
+        if instance_types_to_avoid:
+            logger.debug(
+                "NOT considering following instance types: %s",
+                instance_types_to_avoid,
+            )
+        instance_family_regex = (
+            re.compile(instance_family) if instance_family else None
+        )
+        avoid = set(instance_types_to_avoid or [])
+        # On AWS architectures are named x86_64 and arm64, but we only look for arm / not-arm for now
+        arch_filter = (cpu_arch or "").strip().lower()
+        if arch_filter == "any":
+            arch_filter = ""
+        specs = self.specs
+        arm_codes = {
+            code for s, code in list(specs.string_codes.items()) if "arm" in s
+        }
+        local_storage = storage_type == MF_SEC_VM_STORAGE_TYPE_LOCAL
+        speed_class = (storage_speed_class or "").lower()
+        hdd_code = specs.string_codes.get("hdd", -1)
+        nvme_code = specs.string_codes.get("nvme", -1)
+
+        arch = specs.arch
+        cpu = specs.cpu
+        ram_mb = specs.ram_mb
+        instance_storage = specs.instance_storage
+        storage_speed_codes = specs.storage_speed_class
+        is_burstable = specs.is_burstable
+        spec_row = self.spec_row
+
+        ret: list[int] = []
+        for row, (it, sr) in enumerate(zip(self.instance_types, spec_row)):
+            if instance_types:
+                if it in instance_types:
+                    ret.append(row)
+                continue
+            if it in avoid:
+                continue
+            if instance_family_regex and not instance_family_regex.search(it):
+                continue
+            if arch_filter and ("arm" in arch_filter) != (
+                arch[sr] in arm_codes
+            ):
+                continue
+            if not allow_burstable and is_burstable[sr]:
+                continue
+            if cpu_min and cpu[sr] < cpu_min:
+                continue
+            if cpu_max and cpu[sr] > cpu_max:
+                continue
+            if (
+                ram_min and ram_mb[sr] / 1000 < ram_min
+            ):  # 1000 on purpose to use almost matching RAM SKUs as well
+                continue
+            if ram_max and ram_mb[sr] / 1024 > ram_max:  # User input in GBs
+                continue
+            if local_storage and instance_storage[sr] == 0:
+                continue
+            if storage_min and local_storage:
+                if instance_storage[sr] < storage_min:
+                    continue
+            # PS storage_speed_class=ssd > SSD + NVME, storage_speed_class=nvme > nvme only
+            if speed_class == "hdd" and storage_speed_codes[sr] != hdd_code:
+                continue
+            if speed_class == "ssd" and storage_speed_codes[sr] == hdd_code:
+                continue
+            if speed_class == "nvme" and storage_speed_codes[sr] != nvme_code:
+                continue
+            ret.append(row)
+
+        if (
+            storage_min and local_storage
+        ):  # Prefer bigger disks for local storage
+            ret.sort(
+                key=lambda r: (
+                    cpu[spec_row[r]],
+                    instance_storage[spec_row[r]],
+                )
+            )
+        else:
+            ret.sort(key=lambda r: (cpu[spec_row[r]], ram_mb[spec_row[r]]))
+        return ret
+
+    def to_instance_type_info(
+        self,
+        row: int,
+        availability_zone: str = "",
+        hourly_spot_price: float | None = None,
+    ) -> InstanceTypeInfo:
+        spot_price = (
+            self.hourly_spot_price[row]
+            if hourly_spot_price is None
+            else hourly_spot_price
+        )
+        ondemand_price = self.hourly_ondemand_price[row]
+        specs = self.specs
+        sr = self.spec_row[row]
+        return InstanceTypeInfo(
+            instance_type=self.instance_types[row],
+            arch=specs.strings[specs.arch[sr]],
+            region=self.region,
+            cloud=self.cloud,
+            availability_zone=availability_zone,
+            hourly_spot_price=spot_price,
+            hourly_ondemand_price=ondemand_price,
+            monthly_ondemand_price=(
+                calc_monthly_price(ondemand_price) if ondemand_price else 0
+            ),
+            max_eviction_rate=self.max_eviction_rate[row],
+            eviction_rate_group_label=self.strings[
+                self.eviction_rate_group_label[row]
+            ],
+            cpu=specs.cpu[sr],
+            ram_mb=specs.ram_mb[sr],
+            instance_storage=specs.instance_storage[sr],
+            instance_storage_disks=specs.instance_storage_disks[sr],
+            storage_speed_class=specs.strings[specs.storage_speed_class[sr]],
+            is_burstable=bool(specs.is_burstable[sr]),
+        )
+
+    def to_instance_type_infos(
+        self, rows: list[int] | None = None
+    ) -> list[InstanceTypeInfo]:
+        return [
+            self.to_instance_type_info(row)
+            for row in (range(len(self)) if rows is None else rows)
+        ]
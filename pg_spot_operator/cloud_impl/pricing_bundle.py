@@ -0,0 +1,150 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import tarfile
+import time
+
+from pg_spot_operator.cloud_impl import aws_cache
+from pg_spot_operator.cloud_impl.cache_manager import get_cache_file_kind
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_MANIFEST_NAME = "bundle_manifest.json"
+BUNDLED_FILE_KINDS = (
+    "spot",
+    "eviction_rate",
+    "ondemand",
+    "ami",
+    "boto3_catalog",
+    "meta",
+)
+# Not referenced by feed metas, bundled as is
+STANDALONE_FILE_KINDS = ("meta", "ami", "boto3_catalog")
+
+
+def get_files_to_bundle() -> list[str]:
+    """Feed meta files, the downloads they point to and all AMI / boto3 catalog cache files"""
+    cache_dir = aws_cache.get_price_cache_dir()
+    referenced = aws_cache.get_files_referenced_by_pricing_feed_metas()
+    ret: list[str] = []
+    for f in sorted(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else []:
+        kind = get_cache_file_kind(f)
+        if kind not in BUNDLED_FILE_KINDS:
+            continue
+        if kind in STANDALONE_FILE_KINDS or f in referenced:
+            ret.append(f)
+    return ret
+
+
+def refresh_pricing_feeds_for_bundle(regions: list[str]) -> None:
+    """Synchronous revalidation of the all-region feeds plus given regions' on-demand files"""
+    max_staleness_s = aws_cache.price_cache_max_staleness_s
+    aws_cache.price_cache_max_staleness_s = 0
+    try:
+        aws_cache.get_spot_pricing_feed_file()
+        aws_cache.get_spot_eviction_rates_feed_file()
+        for region in regions:
+            aws_cache.get_ondemand_pricing_info_via_http(region)
+    finally:
+        aws_cache.price_cache_max_staleness_s = max_staleness_s
+
+
+def export_pricing_bundle(bundle_path: str, regions: list[str]) -> dict:
+    """Packs the current pricing feeds, on-demand regional files and AMI cache into a tar.gz.
+    Returns the bundle manifest
+    """
+    if regions:
+        refresh_pricing_feeds_for_bundle(regions)
+
+    cache_dir = aws_cache.get_price_cache_dir()
+    files: list[dict] = []
+    with tarfile.open(bundle_path, "w:gz") as tar:
+        for f in get_files_to_bundle():
+            with open(os.path.join(cache_dir, f), "rb") as fp:
+                data = fp.read()
+            files.append(
+                {
+                    "name": f,
+                    "kind": get_cache_file_kind(f),
+                    "size": len(data),
+                    "sha256": hashlib.sha256(data).hexdigest(),
+                }
+            )
+            add_bytes_to_tar(tar, f, data)
+        manifest = {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "created_on": time.time(),
+            "regions": regions,
+            "files": files,
+        }
+        add_bytes_to_tar(
+            tar, BUNDLE_MANIFEST_NAME, json.dumps(manifest, indent=2).encode()
+        )
+    logger.info(
+        "Exported %s pricing cache files to %s", len(files), bundle_path
+    )
+    return manifest
+
+
+def add_bytes_to_tar(tar: tarfile.TarFile, name: str, data: bytes) -> None:
+    ti = tarfile.TarInfo(name)
+    ti.size = len(data)
+    ti.mtime = int(time.time())
+    tar.addfile(ti, io.BytesIO(data))
+
+
+def read_bundle_member(tar: tarfile.TarFile, name: str) -> bytes:
+    """extractfile() raises KeyError for missing members, but returns None for non-regular files"""
+    try:
+        member = tar.extractfile(name)
+    except KeyError:
+        member = None
+    if not member:
+        raise Exception(f"File {name} missing from pricing bundle")
+    return member.read()
+
+
+def import_pricing_bundle(bundle_path: str) -> dict:
+    """Verifies and unpacks a bundle into the price cache dir, overwriting same named files.
+    Returns the bundle manifest
+    """
+    with tarfile.open(bundle_path, "r:gz") as tar:
+        manifest = json.loads(read_bundle_member(tar, BUNDLE_MANIFEST_NAME))
+        if manifest.get("format_version", 0) > BUNDLE_FORMAT_VERSION:
+            raise Exception(
+                f"Unsupported pricing bundle format version {manifest.get('format_version')}, upgrade the operator"
+            )
+
+        verified: dict[str, bytes] = {}
+        for f in manifest.get("files", []):
+            name = f["name"]
+            if (
+                os.path.basename(name) != name
+                or get_cache_file_kind(name) not in BUNDLED_FILE_KINDS
+            ):
+                raise Exception(f"Unexpected file in pricing bundle: {name}")
+            data = read_bundle_member(tar, name)
+            if hashlib.sha256(data).hexdigest() != f["sha256"]:
+                raise Exception(f"Checksum mismatch for {name} in bundle")
+            verified[name] = data
+
+    cache_dir = aws_cache.get_price_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    for name, data in verified.items():
+        tmp_path = os.path.join(cache_dir, name + ".import")
+        with open(tmp_path, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp_path, os.path.join(cache_dir, name))
+    aws_cache.pricing_index_memo.clear()
+    logger.info(
+        "Imported %s pricing cache files from %s created on %s",
+        len(verified),
+        bundle_path,
+        time.strftime(
+            "%Y-%m-%d %H:%M", time.localtime(manifest.get("created_on", 0))
+        ),
+    )
+    return manifest
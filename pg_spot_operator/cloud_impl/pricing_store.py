@@ -0,0 +1,560 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+PRICING_DB_FILE_NAME = "pricing.db"
+METRIC_SPOT_PRICE = "spot_price"
+METRIC_ONDEMAND_PRICE = "ondemand_price"
+
+# Roll-forward only, applied based on PRAGMA user_version
+PRICING_DB_DDL_MIGRATIONS = [
+    """
+CREATE TABLE current_value (
+    region text NOT NULL,
+    instance_type text NOT NULL,
+    az text NOT NULL DEFAULT '', -- '' for region level feeds
+    metric text NOT NULL,
+    value real NOT NULL,
+    fetched_at real NOT NULL,
+    PRIMARY KEY (metric, region, instance_type, az)
+) WITHOUT ROWID;
+
+CREATE INDEX current_value_instance_type_idx ON current_value (instance_type, metric);
+
+/* Only changed values get a row */
+CREATE TABLE value_history (
+    region text NOT NULL,
+    instance_type text NOT NULL,
+    az text NOT NULL DEFAULT '',
+    metric text NOT NULL,
+    value real NOT NULL,
+    fetched_at real NOT NULL
+);
+
+CREATE INDEX value_history_key_idx ON value_history (region, instance_type, metric, az, fetched_at);
+
+CREATE INDEX value_history_fetched_at_idx ON value_history (fetched_at);
+
+/* Which downloaded file the current_value rows of a feed come from */
+CREATE TABLE feed_ingest (
+    feed text NOT NULL PRIMARY KEY,
+    cache_file text NOT NULL,
+    ingested_at real NOT NULL,
+    metadata text NOT NULL DEFAULT '{}'
+);
+
+CREATE VIEW current_pricing AS
+SELECT
+    region,
+    instance_type,
+    az,
+    max(CASE WHEN metric = 'spot_price' THEN value END) AS spot_price,
+    max(CASE WHEN metric = 'ondemand_price' THEN value END) AS ondemand_price,
+    max(CASE WHEN metric = 'eviction_group' THEN value END) AS eviction_group,
+    max(fetched_at) AS fetched_at
+FROM current_value
+GROUP BY region, instance_type, az;
+""",
+    """
+/* Zonal price change points as returned by describe_spot_price_history */
+CREATE TABLE spot_price_history (
+    region text NOT NULL,
+    instance_type text NOT NULL,
+    az text NOT NULL,
+    ts real NOT NULL,
+    price real NOT NULL,
+    PRIMARY KEY (region, instance_type, az, ts)
+) WITHOUT ROWID;
+
+/* Up to when the API has been asked. az = '' for all zones of the region */
+CREATE TABLE spot_price_history_sync (
+    region text NOT NULL,
+    instance_type text NOT NULL,
+    az text NOT NULL DEFAULT '',
+    synced_until real NOT NULL,
+    PRIMARY KEY (region, instance_type, az)
+) WITHOUT ROWID;
+""",
+    """
+/* Price cache file read hits / misses by kind, accumulated over processes */
+CREATE TABLE cache_read_stats (
+    kind text NOT NULL PRIMARY KEY,
+    hits int NOT NULL DEFAULT 0,
+    misses int NOT NULL DEFAULT 0
+);
+""",
+    """
+/* Read-only EC2 API responses. scope = account identity + region, dropped as a whole on mutations */
+CREATE TABLE api_response_cache (
+    scope text NOT NULL,
+    request_key text NOT NULL,
+    operation text NOT NULL,
+    response text NOT NULL,
+    expires_at real NOT NULL,
+    PRIMARY KEY (scope, request_key)
+) WITHOUT ROWID;
+""",
+    """
+/* Lower bound of the fetched history, to backfill when a longer period is asked for */
+ALTER TABLE spot_price_history_sync ADD COLUMN synced_from real NOT NULL DEFAULT 0;
+
+/* Not known for existing syncs, so they're re-fetched as a whole on the next sync */
+UPDATE spot_price_history_sync SET synced_from = synced_until;
+""",
+    """
+/* Eviction rates are not ingested into the store, only their parsed index file is cached */
+DROP VIEW current_pricing;
+
+CREATE VIEW current_pricing AS
+SELECT
+    region,
+    instance_type,
+    az,
+    max(CASE WHEN metric = 'spot_price' THEN value END) AS spot_price,
+    max(CASE WHEN metric = 'ondemand_price' THEN value END) AS ondemand_price,
+    max(fetched_at) AS fetched_at
+FROM current_value
+GROUP BY region, instance_type, az;
+""",
+]
+
+schema_checked_for_db: set[str] = set()
+schema_lock = threading.Lock()
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """A new connection per use, so that it's safe to call from background / worker threads"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def split_sql_script(script: str) -> list[str]:
+    """executescript() would commit an open transaction first, so migrations run statement-wise"""
+    statements: list[str] = []
+    current = ""
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ""
+    return statements
+
+
+def ensure_schema(db_path: str) -> None:
+    """Applies missing migrations one transaction at a time. BEGIN IMMEDIATE takes the write lock
+    before user_version is read, for concurrent processes not to apply the same migration twice
+    """
+    with schema_lock:
+        if db_path in schema_checked_for_db:
+            return
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with closing(connect(db_path)) as conn:
+            conn.isolation_level = None  # Explicit transactions only
+            conn.execute("PRAGMA journal_mode = WAL")
+            while True:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    version = conn.execute("PRAGMA user_version").fetchone()[0]
+                    if version >= len(PRICING_DB_DDL_MIGRATIONS):
+                        conn.execute("COMMIT")
+                        break
+                    logger.debug(
+                        "Applying pricing DB migration %s to %s",
+                        version,
+                        db_path,
+                    )
+                    for statement in split_sql_script(
+                        PRICING_DB_DDL_MIGRATIONS[version]
+                    ):
+                        conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {version + 1}")
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        schema_checked_for_db.add(db_path)
+
+
+def get_feed_ingest(db_path: str, feed: str) -> dict:
+    """Returns {"cache_file": ..., "ingested_at": ..., "metadata": {...}} or {}"""
+    ensure_schema(db_path)
+    with closing(connect(db_path)) as conn:
+        row = conn.execute(
+            "SELECT cache_file, ingested_at, metadata FROM feed_ingest WHERE feed = ?",
+            (feed,),
+        ).fetchone()
+    if not row:
+        return {}
+    return {
+        "cache_file": row["cache_file"],
+        "ingested_at": row["ingested_at"],
+        "metadata": json.loads(row["metadata"]),
+    }
+
+
+def replace_current_values(
+    db_path: str,
+    feed: str,
+    cache_file: str,
+    metric: str,
+    values_by_region: dict[str, dict[str, float]],
+    metadata: dict | None = None,
+) -> int:
+    """Makes the given regions' current values of a metric match the input, dropping instance types
+    not present anymore. Changed or new values are also appended to the history table.
+    Returns the count of changed values
+    """
+    ensure_schema(db_path)
+    now = time.time()
+    changed: list[tuple] = []
+    with closing(connect(db_path)) as conn, conn:
+        for region, values in values_by_region.items():
+            existing = {
+                r["instance_type"]: r["value"]
+                for r in conn.execute(
+                    "SELECT instance_type, value FROM current_value WHERE metric = ? AND region = ? AND az = ''",
+                    (metric, region),
+                )
+            }
+            changed.extend(
+                (region, instance_type, metric, value, now)
+                for instance_type, value in values.items()
+                if existing.get(instance_type) != value
+            )
+            removed = existing.keys() - values.keys()
+            conn.executemany(
+                "DELETE FROM current_value WHERE metric = ? AND region = ? AND instance_type = ? AND az = ''",
+                [(metric, region, it) for it in removed],
+            )
+            conn.executemany(
+                """INSERT INTO current_value (region, instance_type, metric, value, fetched_at) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (metric, region, instance_type, az) DO UPDATE SET value = excluded.value, fetched_at = excluded.fetched_at""",
+                [
+                    (region, instance_type, metric, value, now)
+                    for instance_type, value in values.items()
+                ],
+            )
+        conn.executemany(
+            "INSERT INTO value_history (region, instance_type, metric, value, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            changed,
+        )
+        conn.execute(
+            """INSERT INTO feed_ingest (feed, cache_file, ingested_at, metadata) VALUES (?, ?, ?, ?)
+               ON CONFLICT (feed) DO UPDATE SET cache_file = excluded.cache_file, ingested_at = excluded.ingested_at,
+               metadata = excluded.metadata""",
+            (feed, cache_file, now, json.dumps(metadata or {})),
+        )
+    logger.debug(
+        "Ingested %s %s values of %s regions from %s, %s changed",
+        sum(len(v) for v in values_by_region.values()),
+        metric,
+        len(values_by_region),
+        cache_file,
+        len(changed),
+    )
+    return len(changed)
+
+
+def get_current_values(
+    db_path: str, metric: str, region: str = "", instance_type: str = ""
+) -> dict[str, dict[str, float]]:
+    """Returns region level values as {region: {instance_type: value}}, optionally filtered"""
+    ensure_schema(db_path)
+    sql = "SELECT region, instance_type, value FROM current_value WHERE metric = ? AND az = ''"
+    params: list = [metric]
+    if region:
+        sql += " AND region = ?"
+        params.append(region)
+    if instance_type:
+        sql += " AND instance_type = ?"
+        params.append(instance_type)
+    ret: dict[str, dict[str, float]] = {}
+    with closing(connect(db_path)) as conn:
+        for r in conn.execute(sql, params):
+            ret.setdefault(r["region"], {})[r["instance_type"]] = r["value"]
+    return ret
+
+
+def replace_current_zonal_values(
+    db_path: str,
+    feed: str,
+    region: str,
+    metric: str,
+    values: dict[str, dict[str, float]],
+) -> int:
+    """Like replace_current_values but for one region's AZ level values {instance_type: {az: value}}.
+    Returns the count of changed values
+    """
+    ensure_schema(db_path)
+    now = time.time()
+    rows = [
+        (region, instance_type, az, metric, value, now)
+        for instance_type, by_az in values.items()
+        for az, value in by_az.items()
+    ]
+    with closing(connect(db_path)) as conn, conn:
+        existing = {
+            (r["instance_type"], r["az"]): r["value"]
+            for r in conn.execute(
+                "SELECT instance_type, az, value FROM current_value WHERE metric = ? AND region = ? AND az != ''",
+                (metric, region),
+            )
+        }
+        changed = [r for r in rows if existing.get((r[1], r[2])) != r[4]]
+        conn.executemany(
+            "DELETE FROM current_value WHERE metric = ? AND region = ? AND instance_type = ? AND az = ?",
+            [
+                (metric, region, it, az)
+                for it, az in existing.keys() - {(r[1], r[2]) for r in rows}
+            ],
+        )
+        conn.executemany(
+            """INSERT INTO current_value (region, instance_type, az, metric, value, fetched_at) VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (metric, region, instance_type, az) DO UPDATE SET value = excluded.value, fetched_at = excluded.fetched_at""",
+            rows,
+        )
+        conn.executemany(
+            "INSERT INTO value_history (region, instance_type, az, metric, value, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            changed,
+        )
+        conn.execute(
+            """INSERT INTO feed_ingest (feed, cache_file, ingested_at) VALUES (?, '', ?)
+               ON CONFLICT (feed) DO UPDATE SET ingested_at = excluded.ingested_at""",
+            (feed, now),
+        )
+    logger.debug(
+        "Ingested %s zonal %s values of region %s, %s changed",
+        len(rows),
+        metric,
+        region,
+        len(changed),
+    )
+    return len(changed)
+
+
+def get_current_zonal_values(
+    db_path: str, metric: str, region: str
+) -> dict[str, dict[str, float]]:
+    """Returns AZ level values of a region as {instance_type: {az: value}}"""
+    ensure_schema(db_path)
+    ret: dict[str, dict[str, float]] = {}
+    with closing(connect(db_path)) as conn:
+        for r in conn.execute(
+            "SELECT instance_type, az, value FROM current_value WHERE metric = ? AND region = ? AND az != ''",
+            (metric, region),
+        ):
+            ret.setdefault(r["instance_type"], {})[r["az"]] = r["value"]
+    return ret
+
+
+def get_current_pricing(
+    db_path: str, instance_type: str = "", regions: list[str] | None = None
+) -> list[dict]:
+    """Cross-region rows of the current_pricing view, cheapest Spot first"""
+    ensure_schema(db_path)
+    sql = "SELECT * FROM current_pricing WHERE true"
+    params: list = []
+    if instance_type:
+        sql += " AND instance_type = ?"
+        params.append(instance_type)
+    if regions:
+        sql += f" AND region IN ({','.join('?' * len(regions))})"
+        params.extend(regions)
+    sql += " ORDER BY spot_price IS NULL, spot_price, region, instance_type"
+    with closing(connect(db_path)) as conn:
+        return [dict(r) for r in conn.execute(sql, params)]
+
+
+def get_value_history(
+    db_path: str,
+    region: str,
+    instance_type: str,
+    metric: str = METRIC_SPOT_PRICE,
+    since: float = 0,
+) -> list[tuple[float, float]]:
+    """Returns [(fetched_at, value), ...] ordered by time"""
+    ensure_schema(db_path)
+    with closing(connect(db_path)) as conn:
+        return [
+            (r["fetched_at"], r["value"])
+            for r in conn.execute(
+                """SELECT fetched_at, value FROM value_history
+                   WHERE region = ? AND instance_type = ? AND metric = ? AND az = '' AND fetched_at >= ?
+                   ORDER BY fetched_at""",
+                (region, instance_type, metric, since),
+            )
+        ]
+
+
+def get_spot_price_history_synced_ranges(
+    db_path: str, region: str, instance_types: list[str], az: str = ""
+) -> dict[str, tuple[float, float]]:
+    """Returns {instance_type: (synced_from, synced_until)} for instance types fetched before. An
+    all-zones sync also covers single AZ requests, the one reaching further back is used
+    """
+    ensure_schema(db_path)
+    ret: dict[str, tuple[float, float]] = {}
+    with closing(connect(db_path)) as conn:
+        for r in conn.execute(
+            f"""SELECT instance_type, synced_from, synced_until FROM spot_price_history_sync
+                WHERE region = ? AND az IN ('', ?) AND instance_type IN ({','.join('?' * len(instance_types))})
+                ORDER BY synced_from DESC, synced_until""",
+            [region, az, *instance_types],
+        ):
+            ret[r["instance_type"]] = (r["synced_from"], r["synced_until"])
+    return ret
+
+
+def store_spot_price_history(
+    db_path: str,
+    region: str,
+    price_points: list[tuple[str, str, float, float]],
+    synced_ranges: dict[str, tuple[float, float]],
+    az: str,
+) -> None:
+    """price_points = [(instance_type, az, epoch, price), ...]. Already known points are ignored.
+    synced_ranges = {instance_type: (synced_from, synced_until)}, contiguous fetched history
+    """
+    ensure_schema(db_path)
+    with closing(connect(db_path)) as conn, conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO spot_price_history (region, instance_type, az, ts, price) VALUES (?, ?, ?, ?, ?)",
+            [(region, *pp) for pp in price_points],
+        )
+        conn.executemany(
+            """INSERT INTO spot_price_history_sync (region, instance_type, az, synced_from, synced_until) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (region, instance_type, az) DO UPDATE SET synced_from = excluded.synced_from, synced_until = excluded.synced_until""",
+            [
+                (region, it, az, synced_from, synced_until)
+                for it, (synced_from, synced_until) in synced_ranges.items()
+            ],
+        )
+
+
+SQL_SPOT_PRICE_HISTORY_SINCE = """
+SELECT instance_type, az, ts, price
+FROM spot_price_history h
+WHERE region = ?
+AND instance_type IN ({instance_types})
+AND az LIKE ?
+/* Plus the price in effect at "since" */
+AND ts >= (SELECT coalesce(max(ts), 0)
+           FROM spot_price_history p
+           WHERE p.region = h.region AND p.instance_type = h.instance_type AND p.az = h.az AND p.ts <= ?)
+"""
+
+
+def get_spot_price_history(
+    db_path: str,
+    region: str,
+    instance_types: list[str],
+    since: float,
+    az: str = "",
+) -> list[tuple[str, str, float, float]]:
+    """Returns [(instance_type, az, epoch, price), ...], latest first"""
+    ensure_schema(db_path)
+    sql = SQL_SPOT_PRICE_HISTORY_SINCE.format(
+        instance_types=",".join("?" * len(instance_types))
+    )
+    with closing(connect(db_path)) as conn:
+        return [
+            (r["instance_type"], r["az"], r["ts"], r["price"])
+            for r in conn.execute(
+                sql + " ORDER BY ts DESC",
+                [region, *instance_types, az or "%", since],
+            )
+        ]
+
+
+def add_cache_read_stats(
+    db_path: str, counters: dict[str, dict[str, int]]
+) -> None:
+    ensure_schema(db_path)
+    with closing(connect(db_path)) as conn, conn:
+        conn.executemany(
+            """INSERT INTO cache_read_stats (kind, hits, misses) VALUES (?, ?, ?)
+               ON CONFLICT (kind) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses""",
+            [
+                (kind, c.get("hits", 0), c.get("misses", 0))
+                for kind, c in counters.items()
+            ],
+        )
+
+
+def get_cache_read_stats(db_path: str) -> dict[str, dict[str, int]]:
+    ensure_schema(db_path)
+    with closing(connect(db_path)) as conn:
+        return {
+            r["kind"]: {"hits": r["hits"], "misses": r["misses"]}
+            for r in conn.execute("SELECT * FROM cache_read_stats")
+        }
+
+
+def prune_value_history(db_path: str, older_than_days: int) -> int:
+    """Also prunes the zonal Spot price history"""
+    if not os.path.exists(db_path):
+        return 0
+    ensure_schema(db_path)
+    cutoff = time.time() - older_than_days * 86400
+    with closing(connect(db_path)) as conn, conn:
+        # Keeping the price in effect at cutoff time
+        conn.execute(
+            """DELETE FROM spot_price_history AS h WHERE ts < ?
+               AND EXISTS (SELECT 1 FROM spot_price_history n
+                           WHERE n.region = h.region AND n.instance_type = h.instance_type AND n.az = h.az
+                           AND n.ts > h.ts AND n.ts <= ?)""",
+            (cutoff, cutoff),
+        )
+        return conn.execute(
+            "DELETE FROM value_history WHERE fetched_at < ?", (cutoff,)
+        ).rowcount
+
+
+def get_cached_api_response(
+    db_path: str, scope: str, request_key: str
+) -> str | None:
+    """Serialized response if not expired yet"""
+    ensure_schema(db_path)
+    with closing(connect(db_path)) as conn:
+        row = conn.execute(
+            "SELECT response FROM api_response_cache WHERE scope = ? AND request_key = ? AND expires_at > ?",
+            (scope, request_key, time.time()),
+        ).fetchone()
+    return row["response"] if row else None
+
+
+def store_api_response(
+    db_path: str,
+    scope: str,
+    request_key: str,
+    operation: str,
+    response: str,
+    ttl_s: float,
+) -> None:
+    """Also drops any expired responses"""
+    ensure_schema(db_path)
+    now = time.time()
+    with closing(connect(db_path)) as conn, conn:
+        conn.execute(
+            "DELETE FROM api_response_cache WHERE expires_at <= ?", (now,)
+        )
+        conn.execute(
+            """INSERT INTO api_response_cache (scope, request_key, operation, response, expires_at) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (scope, request_key) DO UPDATE SET response = excluded.response, expires_at = excluded.expires_at""",
+            (scope, request_key, operation, response, now + ttl_s),
+        )
+
+
+def invalidate_api_responses(db_path: str, scope: str) -> int:
+    ensure_schema(db_path)
+    with closing(connect(db_path)) as conn, conn:
+        return conn.execute(
+            "DELETE FROM api_response_cache WHERE scope = ?", (scope,)
+        ).rowcount
@@ -0,0 +1,101 @@
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+@dataclass
+class SpotPriceStats:
+    """Time-weighted Spot price statistics of one (instance type, AZ) over a window. A price
+    change point is in effect until the next one
+    """
+
+    instance_type: str
+    availability_zone: str
+    mean_price: float = 0
+    volatility: float = 0  # Coefficient of variation, i.e. stddev / mean
+    p50_price: float = 0
+    p90_price: float = 0
+    price_changes: int = 0
+    # Relative price change per day from a linear fit, e.g. 0.01 = +1% a day
+    trend: float = 0
+
+
+def weighted_percentile(
+    price_durations: list[tuple[float, float]], pct: float
+) -> float:
+    """Price below which the given pct of the time was spent"""
+    total = sum(d for _, d in price_durations)
+    if not total:
+        return price_durations[-1][0] if price_durations else 0
+    cumulative = 0.0
+    for price, duration in sorted(price_durations):
+        cumulative += duration
+        if cumulative >= pct / 100 * total:
+            return price
+    return max(p for p, _ in price_durations)
+
+
+def compute_spot_price_stats(
+    instance_type: str,
+    az: str,
+    points: list[tuple[float, float]],
+    since: float,
+    until: float,
+) -> SpotPriceStats:
+    """points = [(epoch, price), ...] in any order, can include the price in effect at "since" """
+    stats = SpotPriceStats(instance_type=instance_type, availability_zone=az)
+    if not points:
+        return stats
+    points = sorted(points)
+
+    # (price, duration, segment midpoint in days)
+    segments: list[tuple[float, float, float]] = []
+    prev_price: float | None = None
+    for i, (ts, price) in enumerate(points):
+        if ts > since and prev_price is not None and price != prev_price:
+            stats.price_changes += 1
+        prev_price = price
+        start = max(ts, since)
+        end = points[i + 1][0] if i + 1 < len(points) else until
+        end = min(max(end, start), until)
+        segments.append((price, end - start, (start + end) / 2 / 86400))
+
+    total = sum(d for _, d, _ in segments)
+    if not total:  # All points at the end of the window
+        stats.mean_price = stats.p50_price = stats.p90_price = points[-1][1]
+        return stats
+
+    mean = sum(p * d for p, d, _ in segments) / total
+    variance = sum(d * (p - mean) ** 2 for p, d, _ in segments) / total
+    stats.mean_price = round(mean, 6)
+    stats.volatility = round(math.sqrt(variance) / mean, 4) if mean else 0
+    price_durations = [(p, d) for p, d, _ in segments]
+    stats.p50_price = weighted_percentile(price_durations, 50)
+    stats.p90_price = weighted_percentile(price_durations, 90)
+
+    # Duration weighted least squares of price over time
+    mean_x = sum(x * d for _, d, x in segments) / total
+    sxx = sum(d * (x - mean_x) ** 2 for _, d, x in segments)
+    if sxx and mean:
+        sxy = sum(d * (x - mean_x) * (p - mean) for p, d, x in segments)
+        stats.trend = round(sxy / sxx / mean, 4)
+    return stats
+
+
+def compute_spot_price_stats_by_sku_and_az(
+    price_history: list[tuple[str, str, float, float]],
+    since: float,
+    until: float,
+) -> dict[tuple[str, str], SpotPriceStats]:
+    """price_history = [(instance_type, az, epoch, price), ...] as stored in the pricing store"""
+    points_by_sku_az: dict[tuple[str, str], list[tuple[float, float]]] = (
+        defaultdict(list)
+    )
+    for instance_type, az, ts, price in price_history:
+        points_by_sku_az[(instance_type, az)].append((ts, price))
+    return {
+        (instance_type, az): compute_spot_price_stats(
+            instance_type, az, points, since, until
+        )
+        for (instance_type, az), points in points_by_sku_az.items()
+    }
@@ -50,5 +50,8 @@ CONNSTR_FORMAT_POSTGRES = "postgres"
 
 DEFAULT_VM_LOGIN_USER = "pgspotops"
 
+# botocore retry modes, "legacy" is the botocore default
+AWS_RETRY_MODES = ("legacy", "standard", "adaptive")
+
 # https://aws.amazon.com/ebs/pricing/
 APPROX_EBS_PRICE_PER_GB = 0.08  # For most regions as of 2025 Oct
@@ -8,6 +8,7 @@ SELECTION_STRATEGY_BALANCED = "balanced"
 SELECTION_STRATEGY_CHEAPEST = "cheapest"
 SELECTION_STRATEGY_RANDOM = "random"
 SELECTION_STRATEGY_EVICTION_RATE = "eviction-rate"
+SELECTION_STRATEGY_PRICE_STABILITY = "price-stability"
 
 logger = logging.getLogger(__name__)
 
@@ -129,6 +130,55 @@ class InstanceTypeSelectionBalanced(InstanceTypeSelectionStrategy):
         return balanced
 
 
+class InstanceTypeSelectionPriceStability(InstanceTypeSelectionStrategy):
+    """A mix of price + zonal Spot price volatility, as stable prices hint at low capacity pressure.
+    Rising price trend as tie-breaker. Instance types without price history stats are ranked after
+    the ones with, cheapest first
+    """
+
+    @classmethod
+    def execute(
+        cls, instance_types: list[InstanceTypeInfo]
+    ) -> list[InstanceTypeInfo]:
+        if not instance_types[0].is_spot:
+            return InstanceTypeSelectionCheapest.execute(instance_types)
+        valid_instances = [
+            x
+            for x in instance_types
+            if x.hourly_spot_price
+            and x.spot_price_p50
+            and x.max_eviction_rate != 100
+        ]
+        if not valid_instances:
+            logger.warning(
+                "No Spot price history stats available, falling back to the cheapest strategy"
+            )
+            return InstanceTypeSelectionCheapest.execute(instance_types)
+        without_stats = [
+            x
+            for x in instance_types
+            if x.hourly_spot_price
+            and not x.spot_price_p50
+            and x.max_eviction_rate != 100
+        ]
+        max_price = max([x.hourly_spot_price for x in valid_instances])
+        max_volatility = max(
+            [x.spot_price_volatility for x in valid_instances]
+        )
+        return sorted(
+            valid_instances,
+            key=lambda x: (
+                x.hourly_spot_price / max_price
+                + (
+                    x.spot_price_volatility / max_volatility
+                    if max_volatility
+                    else 0
+                ),
+                x.spot_price_trend,
+            ),
+        ) + sorted(without_stats, key=lambda x: x.hourly_spot_price)
+
+
 class InstanceTypeSelection:
 
     @classmethod
@@ -140,6 +190,7 @@ class InstanceTypeSelection:
             SELECTION_STRATEGY_RANDOM: InstanceTypeSelectionRandom,
             SELECTION_STRATEGY_EVICTION_RATE: InstanceTypeSelectionEvictionRate,
             SELECTION_STRATEGY_BALANCED: InstanceTypeSelectionBalanced,
+            SELECTION_STRATEGY_PRICE_STABILITY: InstanceTypeSelectionPriceStability,
         }
         return strategy.get(
             instance_selection_strategy.lower().strip(),
@@ -152,5 +203,6 @@ class InstanceTypeSelection:
             SELECTION_STRATEGY_BALANCED: "A 50-50 weighed mix of ev.rate / price. Cost-optimal for non-critical use cases. DEFAULT",
             SELECTION_STRATEGY_CHEAPEST: "Look only at price. Highest eviction rate bracket (>20%) instances not considered though",
             SELECTION_STRATEGY_EVICTION_RATE: "Prefer lowest eviction rate bracket instances only, preferring cheapest within the bracket",
+            SELECTION_STRATEGY_PRICE_STABILITY: "A 50-50 weighed mix of zonal Spot price volatility / price over the last --price-stats-window-days. Needs AWS credentials for price history, falls back to cheapest",
             SELECTION_STRATEGY_RANDOM: "Randomize from 15 cheapest instances satisfying the HW requirements. Useful for testing out various HW or in very contested regions where cheaper instance types get a lot of churn",
         }
@@ -13,6 +13,7 @@ from pydantic import BaseModel, ValidationError, model_validator
 from typing_extensions import Self
 
 from pg_spot_operator.constants import (
+    AWS_RETRY_MODES,
     BACKUP_TYPE_NONE,
     BACKUP_TYPE_PGBACKREST,
     CLOUD_AWS,
@@ -163,6 +164,17 @@ class SectionBackup(BaseModel):
     )
 
 
+class SubSectionAwsTransport(BaseModel):
+    """botocore client settings, empty / 0 = CLI level / botocore defaults"""
+
+    retry_mode: str = ""  # legacy | standard | adaptive
+    max_attempts: int = 0  # Including the initial call
+    max_pool_connections: int = 0
+    connect_timeout_s: float = 0
+    read_timeout_s: float = 0
+    tcp_keepalive: bool | None = None
+
+
 class SectionAws(BaseModel):
     access_key_id: str = ""
     secret_access_key: str = ""
@@ -173,6 +185,9 @@ class SectionAws(BaseModel):
     key_pair_name: str = ""
     self_termination_access_key_id: str = ""
     self_termination_secret_access_key: str = ""
+    transport: SubSectionAwsTransport = field(
+        default_factory=SubSectionAwsTransport
+    )
 
 
 class SubSectionMonitoringPrometheus(BaseModel):
@@ -409,6 +424,17 @@ class InstanceManifest(BaseModel):
             raise ValueError("Only aws cloud supported for now")
         return self
 
+    @model_validator(mode="after")
+    def check_aws_transport(self) -> Self:
+        if (
+            self.aws.transport.retry_mode
+            and self.aws.transport.retry_mode not in AWS_RETRY_MODES
+        ):
+            raise ValueError(
+                f"Invalid aws.transport.retry_mode, expecting one of {AWS_RETRY_MODES}"
+            )
+        return self
+
     @model_validator(mode="after")
     def check_valid_expiration_date(self) -> Self:
         if self.expiration_date and self.expiration_date != "now":
@@ -13,8 +13,11 @@ import yaml
 from dateutil.parser import isoparse
 
 from pg_spot_operator import cloud_api, cmdb, constants, manifests
-from pg_spot_operator.cloud_impl import aws_client
-from pg_spot_operator.cloud_impl.aws_client import set_access_keys
+from pg_spot_operator.cloud_impl import aws_api_stats, aws_client
+from pg_spot_operator.cloud_impl.aws_client import (
+    set_access_keys,
+    set_transport_profile,
+)
 from pg_spot_operator.cloud_impl.aws_s3 import (
     s3_clean_bucket_path_if_exists,
     s3_try_create_bucket_if_not_exists,
@@ -1290,6 +1293,8 @@ def decrypt_and_set_aws_secrets_if_any(m):
         m.aws.secret_access_key,
         m.aws.profile_name,
     )
+    # Instance level botocore settings, if any
+    set_transport_profile(**m.aws.transport.model_dump())
 
 
 def stop_running_vms_if_any(instance_name: str, dry_run: bool = False) -> None:
@@ -1421,6 +1426,33 @@ def fetch_primary_infos_for_replica_building(m: InstanceManifest):
         ] = m.postgres.primary_replication_password
 
 
+def log_aws_api_calls_since(
+    prev_api_call_counts: dict[tuple[str, str, str], int], loop: int
+) -> dict[tuple[str, str, str], int]:
+    """Returns the current counts, to be passed in on the next call"""
+    api_call_counts = aws_api_stats.get_api_call_counts()
+    loop_calls = {
+        key: calls - prev_api_call_counts.get(key, 0)
+        for key, calls in api_call_counts.items()
+        if calls > prev_api_call_counts.get(key, 0)
+    }
+    logger.info(
+        "AWS API calls in main loop iteration %s: %s",
+        loop,
+        (
+            ", ".join(
+                f"{service}.{operation}@{region}={calls}"
+                for (service, operation, region), calls in sorted(
+                    loop_calls.items()
+                )
+            )
+            if loop_calls
+            else "none"
+        ),
+    )
+    return api_call_counts
+
+
 def do_main_loop(
     cli_dry_run: bool = False,
     cli_debug: bool = False,
@@ -1435,6 +1467,7 @@ def do_main_loop(
     cli_connstr_format: str = "ssh",
     cli_ansible_path: str = "",
     cli_connstr_output_path: str = "",
+    cli_stats: bool = False,
 ):
     global dry_run
     dry_run = cli_dry_run
@@ -1449,6 +1482,7 @@ def do_main_loop(
     first_loop = True
     loops = 0
     start_time = time.time()
+    api_call_counts = aws_api_stats.get_api_call_counts()
 
     while True:
         loops += 1
@@ -1740,6 +1774,9 @@ def do_main_loop(
 
         first_loop = False
 
+        if cli_stats:
+            api_call_counts = log_aws_api_calls_since(api_call_counts, loops)
+
         logger.info(
             "Main loop finished. Sleeping for %s s ...",
             cli_main_loop_interval_s,
@@ -1,3 +1,4 @@
+import contextlib
 import datetime
 import functools
 import json
@@ -6,10 +7,14 @@ import os
 import re
 import shutil
 import subprocess
+import threading
 import time
 import urllib.request
 import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from statistics import mean
+from typing import Any, Hashable, Iterator
 
 import humanize
 import requests
@@ -21,6 +26,18 @@ from pg_spot_operator.constants import (
 
 logger = logging.getLogger(__name__)
 
+try:
+    import fcntl
+except ImportError:  # Non-POSIX, in-process locking only
+    fcntl = None  # type: ignore[assignment]
+
+DEFAULT_TIMED_CACHE_MAXSIZE = 1024
+
+single_flight_locks: dict[str, threading.Lock] = {}
+single_flight_locks_guard = threading.Lock()
+# All @timed_cache instances by function name, for stats
+timed_caches: dict[str, "TTLCache"] = {}
+
 
 def run_process_with_output(
     runnable_path: str, input_params: list[str]
@@ -101,31 +118,162 @@ def retrieve_url_to_local_text_file(url: str, file_path: str) -> str:
     return pricing_info
 
 
-def timed_cache(**timedelta_kwargs):
-    """From https://gist.github.com/Morreski/c1d08a3afa4040815eafd3891e16b945"""
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry"""
+
+    def __init__(self, name: str, maxsize: int = DEFAULT_TIMED_CACHE_MAXSIZE):
+        self.name = name
+        self.maxsize = maxsize
+        # key -> (expires_at, value), least recently used first
+        self.entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """Returns (found, value)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_s: float) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl_s, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def info(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+            }
+
+
+def timed_cache(
+    maxsize: int = DEFAULT_TIMED_CACHE_MAXSIZE, **timedelta_kwargs
+):
+    """Memoizes by call args, each entry expiring on its own after the given timedelta. Least
+    recently used entries are dropped over maxsize. Exceptions are not cached. Concurrent misses
+    all call f, use @single_flight under it to coalesce them
+    """
+    ttl_s = datetime.timedelta(**timedelta_kwargs).total_seconds()
 
     def _wrapper(f):
-        update_delta = datetime.timedelta(**timedelta_kwargs)
-        next_update = (
-            datetime.datetime.now(datetime.timezone.utc) + update_delta
-        )
-        # Apply @lru_cache to f with no cache size limit
-        f = functools.lru_cache(None)(f)
+        cache = TTLCache(f"{f.__module__}.{f.__qualname__}", maxsize)
+        timed_caches[cache.name] = cache
 
         @functools.wraps(f)
         def _wrapped(*args, **kwargs):
-            nonlocal next_update
-            now = datetime.datetime.now(datetime.timezone.utc)
-            if now >= next_update:
-                f.cache_clear()
-                next_update = now + update_delta
-            return f(*args, **kwargs)
-
+            key = (args, tuple(sorted(kwargs.items())))
+            found, value = cache.get(key)
+            if found:
+                return value
+            value = f(*args, **kwargs)
+            cache.set(key, value, ttl_s)
+            return value
+
+        _wrapped.cache_clear = cache.clear  # type: ignore[attr-defined]
+        _wrapped.cache_info = cache.info  # type: ignore[attr-defined]
         return _wrapped
 
     return _wrapper
 
 
+def get_timed_cache_stats() -> dict[str, dict[str, int]]:
+    """Per decorated function hit / miss / eviction counters"""
+    return {name: cache.info() for name, cache in timed_caches.items()}
+
+
+@dataclass
+class SingleFlightCall:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: Exception | None = None
+
+
+def single_flight(f):
+    """Coalesces concurrent calls with the same args into one - the first caller runs f and the
+    others wait for its result (or exception). Meant to go under @timed_cache, which on its own
+    lets all concurrent misses through
+    """
+    in_flight: dict[tuple, SingleFlightCall] = {}
+    in_flight_lock = threading.Lock()
+
+    @functools.wraps(f)
+    def _wrapped(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        with in_flight_lock:
+            call = in_flight.get(key)
+            is_leader = call is None
+            if call is None:
+                call = in_flight[key] = SingleFlightCall()
+        if not is_leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+        try:
+            call.result = f(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with in_flight_lock:
+                in_flight.pop(key, None)
+            call.done.set()
+        return call.result
+
+    return _wrapped
+
+
+@contextlib.contextmanager
+def single_flight_lock(key: str, lock_file_path: str = "") -> Iterator[None]:
+    """Serializes the block per key between threads, plus between processes via flock if a
+    lock_file_path given. Callers should re-check their cache after acquiring, as the previous
+    holder might have just filled it
+    """
+    with single_flight_locks_guard:
+        lock = single_flight_locks.setdefault(key, threading.Lock())
+    with lock:
+        fp = None
+        if lock_file_path and fcntl is not None:
+            try:
+                fp = open(lock_file_path, "a")
+            except OSError:
+                logger.debug("Could not open lock file %s", lock_file_path)
+        if fp is None:
+            yield
+            return
+        with fp:
+            fcntl.flock(fp.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+
+
 def compose_postgres_connstr_uri(
     ip_address: str,
     admin_user: str,
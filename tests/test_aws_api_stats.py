@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+from pg_spot_operator.cloud_impl.aws_api_stats import (
+    CACHE_HIT_CONTEXT_KEY,
+    get_api_call_counts,
+    get_api_call_stats,
+    get_latency_percentile,
+    on_after_call,
+    on_after_call_error,
+    on_before_call,
+    on_needs_retry,
+    reset_api_call_stats,
+)
+
+THROTTLED_RESPONSE = {"Error": {"Code": "RequestLimitExceeded"}}
+
+
+def make_call(
+    operation: str,
+    region: str,
+    responses: list[dict],
+    status_code: int = 200,
+    cache_hit: bool = False,
+    connection_error: bool = False,
+):
+    """Mimics botocore's event sequence, responses = parsed responses of all HTTP attempts"""
+    context: dict = {}
+    on_before_call(context=context, event_name=f"before-call.ec2.{operation}")
+    if cache_hit:
+        context[CACHE_HIT_CONTEXT_KEY] = True
+    for attempt, parsed in enumerate(responses, 1):
+        on_needs_retry(
+            response=(SimpleNamespace(status_code=status_code), parsed),
+            attempts=attempt,
+            request_dict={"context": context},
+            event_name=f"needs-retry.ec2.{operation}",
+            region=region,
+        )
+    if connection_error:
+        on_after_call_error(
+            context=context,
+            event_name=f"after-call-error.ec2.{operation}",
+            region=region,
+            exception=ConnectionError(),
+        )
+    else:
+        on_after_call(
+            http_response=SimpleNamespace(status_code=status_code),
+            parsed=responses[-1] if responses else {},
+            context=context,
+            event_name=f"after-call.ec2.{operation}",
+            region=region,
+        )
+
+
+def test_api_call_stats():
+    reset_api_call_stats()
+    make_call("DescribeInstances", "eu-north-1", [{}])
+    make_call("DescribeInstances", "eu-north-1", [], cache_hit=True)
+    make_call("DescribeInstances", "eu-west-1", [{}])
+    make_call("DescribeVpcs", "eu-north-1", [THROTTLED_RESPONSE, {}])
+    make_call(
+        "DescribeVpcs",
+        "eu-north-1",
+        [THROTTLED_RESPONSE] * 3,
+        status_code=503,
+    )
+    make_call("DescribeSubnets", "eu-north-1", [{}], connection_error=True)
+
+    stats = get_api_call_stats()
+    assert len(stats) == 4
+    s = stats[("ec2", "DescribeInstances", "eu-north-1")]
+    assert s["calls"] == 2
+    assert s["cached"] == 1
+    assert sum(s["latency_buckets"]) == 1  # Cache hits not timed
+    s = stats[("ec2", "DescribeVpcs", "eu-north-1")]
+    assert s["calls"] == 2
+    assert s["throttles"] == 4
+    assert s["retries"] == 3
+    assert s["errors"] == 1
+    assert stats[("ec2", "DescribeSubnets", "eu-north-1")]["errors"] == 1
+    assert get_api_call_counts()[("ec2", "DescribeVpcs", "eu-north-1")] == 2
+
+    reset_api_call_stats()
+    assert not get_api_call_stats()
+
+
+def test_get_latency_percentile():
+    assert get_latency_percentile([0] * 9, 90) == 0
+    assert get_latency_percentile([8, 1, 1, 0, 0, 0, 0, 0, 0], 50) == 0.05
+    assert get_latency_percentile([8, 1, 1, 0, 0, 0, 0, 0, 0], 90) == 0.1
+    assert get_latency_percentile([1, 0, 0, 0, 0, 0, 0, 0, 9], 90) == float(
+        "inf"
+    )
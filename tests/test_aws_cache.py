@@ -0,0 +1,299 @@
+import threading
+
+import pytest
+
+from pg_spot_operator.cloud_impl import aws_cache
+from pg_spot_operator.cloud_impl.aws_cache import (
+    extract_ondemand_price_index_from_regional_pricing_info,
+    extract_spot_price_index_from_public_spot_json,
+    get_cached_pricing_dict,
+    get_or_build_pricing_index,
+    get_pricing_json_with_revalidation,
+    write_pricing_cache_file_as_json,
+)
+from pg_spot_operator.cloud_impl.pricing_store import METRIC_SPOT_PRICE
+from tests.test_aws_spot import (
+    PUBLIC_EVICTION_RATE_INFO,
+    REGIONAL_PRICING_INFO,
+    SPOT_PRICING_INFO_S3_JSON_SAMPLE,
+)
+
+
+def test_extract_spot_price_index_from_public_spot_json():
+    idx = extract_spot_price_index_from_public_spot_json(
+        SPOT_PRICING_INFO_S3_JSON_SAMPLE
+    )
+    assert list(idx.keys()) == ["us-east-1"]
+    assert idx["us-east-1"]["m6i.xlarge"] == 0.0615
+    assert len(idx["us-east-1"]) == 2
+
+
+def test_get_or_build_pricing_index(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    monkeypatch.setattr(aws_cache, "pricing_index_memo", {})
+    raw_fetches = []
+
+    def index_getter():
+        raw_fetches.append(1)
+        return extract_spot_price_index_from_public_spot_json(
+            SPOT_PRICING_INFO_S3_JSON_SAMPLE
+        )
+
+    cache_file = "aws_spot_2024111_1000.json"
+    write_pricing_cache_file_as_json(
+        cache_file, SPOT_PRICING_INFO_S3_JSON_SAMPLE
+    )
+    for _ in range(3):
+        idx = get_or_build_pricing_index(
+            "aws_spot",
+            "aws_spot",
+            cache_file,
+            index_getter,
+            METRIC_SPOT_PRICE,
+        )
+        assert idx["us-east-1"]["m6g.xlarge"] == 0.0378
+    assert len(raw_fetches) == 1
+
+    # Pricing store is re-used by a "new process"
+    monkeypatch.setattr(aws_cache, "pricing_index_memo", {})
+    idx = get_or_build_pricing_index(
+        "aws_spot",
+        "aws_spot",
+        cache_file,
+        index_getter,
+        METRIC_SPOT_PRICE,
+    )
+    assert idx["us-east-1"]["m6g.xlarge"] == 0.0378
+    assert len(raw_fetches) == 1
+
+
+def test_pricing_cache_file_roundtrip(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    cache_dir = tmpdir.join(aws_cache.CONFIG_DIR_PRICE_CACHE_SUBDIR)
+
+    # Legacy plain JSON files are still readable and get replaced on write
+    cache_dir.ensure(dir=True)
+    cache_dir.join("aws_x.json").write('{"a": 1}')
+    assert get_cached_pricing_dict("aws_x.json") == {"a": 1}
+
+    write_pricing_cache_file_as_json("aws_x.json", {"a": 2})
+    assert sorted(f.basename for f in cache_dir.listdir()) == ["aws_x.json.gz"]
+    assert get_cached_pricing_dict("aws_x.json") == {"a": 2}
+
+    # Truncated files fail the gzip checks
+    gz = cache_dir.join("aws_x.json.gz")
+    gz.write_binary(gz.read_binary()[:-4])
+    assert get_cached_pricing_dict("aws_x.json") == {}
+
+
+def test_extract_ondemand_price_index_from_regional_pricing_info():
+    idx = extract_ondemand_price_index_from_regional_pricing_info(
+        REGIONAL_PRICING_INFO
+    )
+    assert len(idx) == 3
+    assert idx["r7a.2xlarge"] == 0.6472
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data: dict, headers: dict):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers
+
+    def json(self):
+        return self.data
+
+
+def test_get_pricing_json_with_revalidation(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    monkeypatch.setattr(aws_cache, "price_cache_max_staleness_s", 0)
+    requests_made: list[dict] = []
+
+    def fake_get(url, headers):
+        requests_made.append(headers)
+        if headers.get("If-None-Match") == "v1":
+            return FakeResponse(304, {}, {})
+        return FakeResponse(200, {"x": 1}, {"ETag": "v1"})
+
+    monkeypatch.setattr(aws_cache, "http_get", fake_get)
+
+    assert get_pricing_json_with_revalidation(
+        "aws_test", "http://x", "aws_test_1.json"
+    ) == {"x": 1}
+    assert len(requests_made) == 1
+    assert "If-None-Match" not in requests_made[0]
+
+    # Same period - no requests
+    get_pricing_json_with_revalidation(
+        "aws_test", "http://x", "aws_test_1.json"
+    )
+    assert len(requests_made) == 1
+
+    # Next period - conditional GET, 304, no new file
+    for _ in range(2):
+        assert get_pricing_json_with_revalidation(
+            "aws_test", "http://x", "aws_test_2.json"
+        ) == {"x": 1}
+    assert len(requests_made) == 2
+    assert requests_made[1]["If-None-Match"] == "v1"
+    assert not tmpdir.join(
+        aws_cache.CONFIG_DIR_PRICE_CACHE_SUBDIR, "aws_test_2.json"
+    ).exists()
+
+
+def test_get_pricing_json_stale_while_revalidate(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    monkeypatch.setattr(aws_cache, "price_cache_max_staleness_s", 3600)
+    monkeypatch.setattr(
+        aws_cache, "pricing_index_memo", {"aws_test": ("", {})}
+    )
+    fetch_started = threading.Event()
+    fetch_allowed = threading.Event()
+    statuses = [200, 200, 500]
+
+    def fake_get(url, headers):
+        fetch_started.set()
+        fetch_allowed.wait(5)
+        return FakeResponse(statuses.pop(0), {"x": len(statuses)}, {})
+
+    monkeypatch.setattr(aws_cache, "http_get", fake_get)
+
+    fetch_allowed.set()
+    assert get_pricing_json_with_revalidation(
+        "aws_test", "http://x", "aws_test_1.json"
+    ) == {"x": 2}
+
+    # Next period - previous data served right away, refreshed in the background
+    fetch_started.clear()
+    fetch_allowed.clear()
+    assert get_pricing_json_with_revalidation(
+        "aws_test", "http://x", "aws_test_2.json"
+    ) == {"x": 2}
+    assert fetch_started.wait(5)
+    assert not aws_cache.is_pricing_feed_validated_for_period(
+        "aws_test", "aws_test_2.json"
+    )
+    fetch_allowed.set()
+    for t in threading.enumerate():
+        if t.name == "refresh_aws_test":
+            assert t.daemon  # Not to block process exit
+            t.join()
+    assert aws_cache.is_pricing_feed_validated_for_period(
+        "aws_test", "aws_test_2.json"
+    )
+    assert "aws_test" not in aws_cache.pricing_index_memo
+    assert get_pricing_json_with_revalidation(
+        "aws_test", "http://x", "aws_test_2.json"
+    ) == {"x": 1}
+
+    # Failing fetch without a staleness budget falls back to the last download
+    monkeypatch.setattr(aws_cache, "price_cache_max_staleness_s", 0)
+    assert get_pricing_json_with_revalidation(
+        "aws_test", "http://x", "aws_test_3.json"
+    ) == {"x": 1}
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_per_region_extraction(tmpdir, monkeypatch, streaming):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    monkeypatch.setattr(aws_cache, "pricing_index_memo", {})
+    if not streaming:
+        monkeypatch.setattr(aws_cache, "ijson", None)
+    elif aws_cache.ijson is None:
+        pytest.skip("ijson not installed")
+    spot_file = aws_cache.get_spot_pricing_cache_file_name()
+    write_pricing_cache_file_as_json(
+        spot_file, SPOT_PRICING_INFO_S3_JSON_SAMPLE
+    )
+    eviction_file = aws_cache.get_eviction_rate_cache_file_name()
+    write_pricing_cache_file_as_json(eviction_file, PUBLIC_EVICTION_RATE_INFO)
+
+    assert (
+        list(
+            aws_cache.iter_pricing_feed_items(
+                spot_file, {}, "config.regions.item"
+            )
+        )[0]["region"]
+        == "us-east-1"
+    )
+
+    assert aws_cache.get_spot_prices_for_region("us-east-1") == {
+        "m6i.xlarge": 0.0615,
+        "m6g.xlarge": 0.0378,
+    }
+    assert "aws_spot/us-east-1" in aws_cache.pricing_index_memo
+    assert not aws_cache.get_spot_prices_for_region("xx-north-1")
+    assert aws_cache.pricing_index_memo["aws_spot/xx-north-1"][1] == {
+        "xx-north-1": {}
+    }
+
+    # All regions indexed once, region lookups sliced from it without re-parsing
+    assert "us-east-1" in aws_cache.get_spot_price_index()
+    monkeypatch.setattr(
+        aws_cache,
+        "extract_spot_price_index_from_spot_pricing_feed",
+        lambda *args, **kwargs: pytest.fail("spot.json re-parsed"),
+    )
+    assert aws_cache.get_spot_prices_for_region("us-east-1")
+    assert not aws_cache.get_spot_prices_for_region("xx-south-1")
+
+    region = list(PUBLIC_EVICTION_RATE_INFO["spot_advisor"])[0]
+    idx = aws_cache.get_spot_eviction_rate_index()
+    assert idx["ranges"] == PUBLIC_EVICTION_RATE_INFO["ranges"]
+    assert len(idx["regions"]) == len(
+        PUBLIC_EVICTION_RATE_INFO["spot_advisor"]
+    )
+    instance_type, ev_info = next(
+        iter(
+            PUBLIC_EVICTION_RATE_INFO["spot_advisor"][region]["Linux"].items()
+        )
+    )
+    assert idx["regions"][region][instance_type] == [
+        ev_info["r"],
+        ev_info["s"],
+    ]
+    assert "aws_eviction_rate" in aws_cache.pricing_index_memo
+
+    # Persisted index is re-used by a "new process"
+    monkeypatch.setattr(aws_cache, "pricing_index_memo", {})
+    monkeypatch.setattr(aws_cache, "build_eviction_rate_index", None)
+    assert aws_cache.get_spot_eviction_rate_index() == idx
+    assert get_cached_pricing_dict(
+        aws_cache.get_eviction_rate_index_file_name(eviction_file)
+    )
+
+
+def test_concurrent_pricing_feed_fetches_coalesced(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    monkeypatch.setattr(aws_cache, "price_cache_max_staleness_s", 0)
+    fetch_allowed = threading.Event()
+    requests_made = []
+
+    def fake_get(url, headers):
+        requests_made.append(url)
+        fetch_allowed.wait(5)
+        return FakeResponse(200, {"x": 1}, {"ETag": "v1"})
+
+    monkeypatch.setattr(aws_cache, "http_get", fake_get)
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                get_pricing_json_with_revalidation(
+                    "aws_test", "http://x", "aws_test_1.json"
+                )
+            )
+        )
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    fetch_allowed.set()
+    for t in threads:
+        t.join()
+    assert results == [{"x": 1}] * 5
+    assert len(requests_made) == 1
+    assert tmpdir.join(
+        aws_cache.CONFIG_DIR_PRICE_CACHE_SUBDIR, "aws_test.lock"
+    ).exists()
@@ -0,0 +1,128 @@
+import threading
+
+import pytest
+
+from pg_spot_operator.cloud_impl import aws_client
+
+
+def test_get_pooled_client():
+    aws_client.clear_client_pool()
+    c1 = aws_client.get_pooled_client(
+        "s3", "eu-north-1", access_key_id="a", secret_access_key="b"
+    )
+    assert (
+        aws_client.get_pooled_client(
+            "s3", "eu-north-1", access_key_id="a", secret_access_key="b"
+        )
+        is c1
+    )
+    assert (
+        aws_client.get_pooled_client(
+            "s3", "eu-west-1", access_key_id="a", secret_access_key="b"
+        )
+        is not c1
+    )
+    assert (
+        aws_client.get_pooled_client(
+            "s3", "eu-north-1", access_key_id="x", secret_access_key="y"
+        )
+        is not c1
+    )
+
+
+def test_client_pool_expiry(monkeypatch):
+    aws_client.clear_client_pool()
+    c1 = aws_client.get_pooled_client(
+        "s3", "eu-north-1", access_key_id="a", secret_access_key="b"
+    )
+    monkeypatch.setattr(aws_client, "CLIENT_POOL_MAX_AGE_S", 0)
+    assert (
+        aws_client.get_pooled_client(
+            "s3", "eu-north-1", access_key_id="a", secret_access_key="b"
+        )
+        is not c1
+    )
+
+
+def test_set_access_keys_clears_pool(monkeypatch):
+    monkeypatch.setattr(aws_client, "AWS_ACCESS_KEY_ID", "a")
+    monkeypatch.setattr(aws_client, "AWS_SECRET_ACCESS_KEY", "b")
+    c1 = aws_client.get_client("ec2", "eu-north-1")
+    assert aws_client.get_client("ec2", "eu-north-1") is c1
+    aws_client.set_access_keys("a2", "b2")
+    c2 = aws_client.get_client("ec2", "eu-north-1")
+    assert c2 is not c1
+    assert c2._request_signer._credentials.access_key == "a2"
+
+
+def test_get_pooled_client_concurrent():
+    aws_client.clear_client_pool()
+    clients = []
+
+    def get():
+        clients.append(
+            aws_client.get_pooled_client(
+                "ec2", "eu-north-1", access_key_id="a", secret_access_key="b"
+            )
+        )
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(clients) == 8
+    assert len({id(c) for c in clients}) == 1
+
+
+def test_transport_profile(monkeypatch):
+    monkeypatch.setattr(aws_client, "default_transport_profile", {})
+    monkeypatch.setattr(aws_client, "transport_profile", {})
+    assert aws_client.get_botocore_config({}) is None
+
+    aws_client.set_default_transport_profile(
+        retry_mode="standard", max_pool_connections=20, read_timeout_s=10
+    )
+    c1 = aws_client.get_pooled_client(
+        "s3", "eu-north-1", access_key_id="a", secret_access_key="b"
+    )
+    assert c1.meta.config.retries["mode"] == "standard"
+    assert c1.meta.config.max_pool_connections == 20
+
+    # Manifest level overrides, unset ones fall back to the defaults
+    aws_client.set_transport_profile(
+        retry_mode="adaptive", max_attempts=3, tcp_keepalive=False
+    )
+    assert aws_client.transport_profile == {
+        "retry_mode": "adaptive",
+        "max_attempts": 3,
+        "max_pool_connections": 20,
+        "read_timeout_s": 10,
+        "tcp_keepalive": False,
+    }
+    c2 = aws_client.get_pooled_client(
+        "s3", "eu-north-1", access_key_id="a", secret_access_key="b"
+    )
+    assert c2 is not c1
+    assert c2.meta.config.retries == {
+        "mode": "adaptive",
+        "total_max_attempts": 3,
+    }
+    assert c2.meta.config.read_timeout == 10
+
+    aws_client.set_transport_profile()
+    assert aws_client.transport_profile == {
+        "retry_mode": "standard",
+        "max_pool_connections": 20,
+        "read_timeout_s": 10,
+    }
+    # Clients of the previous profile are still pooled
+    assert (
+        aws_client.get_pooled_client(
+            "s3", "eu-north-1", access_key_id="a", secret_access_key="b"
+        )
+        is c1
+    )
+
+    with pytest.raises(ValueError):
+        aws_client.set_transport_profile(retry_mode="aggressive")
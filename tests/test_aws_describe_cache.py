@@ -0,0 +1,113 @@
+import datetime
+from types import SimpleNamespace
+
+from pg_spot_operator.cloud_impl import aws_cache
+from pg_spot_operator.cloud_impl.aws_describe_cache import (
+    get_cache_scope,
+    get_credentials_identity,
+    serve_cached_response,
+    store_or_invalidate,
+)
+
+VOLUMES_RESPONSE = {
+    "Volumes": [
+        {
+            "VolumeId": "vol-1",
+            "State": "available",
+            "CreateTime": datetime.datetime(
+                2024, 5, 8, 9, 31, 30, tzinfo=datetime.timezone.utc
+            ),
+        }
+    ]
+}
+
+
+def make_call(operation: str, body: dict, scope: str, parsed: dict):
+    """Mimics botocore's before-call / after-call event sequence"""
+    model = SimpleNamespace(name=operation)
+    context: dict = {}
+    params = {"url_path": "/", "body": {"Action": operation, **body}}
+    cached = serve_cached_response(
+        model=model, params=params, context=context, scope=scope
+    )
+    if cached:
+        http_response, parsed = cached
+    else:
+        http_response = SimpleNamespace(status_code=200)
+    store_or_invalidate(
+        http_response=http_response,
+        parsed=parsed,
+        model=model,
+        context=context,
+        scope=scope,
+    )
+    return bool(cached), parsed
+
+
+def test_describe_cache(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    scope = get_cache_scope("eu-north-1", "AKIATEST")
+    vol1 = {"VolumeId.1": "vol-1"}
+
+    assert make_call("DescribeVolumes", vol1, scope, VOLUMES_RESPONSE) == (
+        False,
+        VOLUMES_RESPONSE,
+    )
+    # Datetimes survive the round trip
+    assert make_call("DescribeVolumes", vol1, scope, {}) == (
+        True,
+        VOLUMES_RESPONSE,
+    )
+    # Different params, region or credentials are separate entries
+    assert not make_call("DescribeVolumes", {"VolumeId.1": "x"}, scope, {})[0]
+    assert not make_call(
+        "DescribeVolumes",
+        vol1,
+        get_cache_scope("eu-north-1", "AKIAOTHER"),
+        {},
+    )[0]
+    # Not cached operations
+    assert not make_call("DescribeSpotPriceHistory", {}, scope, {})[0]
+    assert not make_call("DescribeSpotPriceHistory", {}, scope, {})[0]
+    assert make_call("DescribeVolumes", vol1, scope, {})[0]
+
+    # Mutations invalidate
+    make_call("CreateTags", {"ResourceId.1": "vol-1"}, scope, {})
+    assert not make_call("DescribeVolumes", vol1, scope, {})[0]
+
+
+def test_describe_response_not_stored_after_invalidation(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    scope = get_cache_scope("eu-north-1", "AKIATEST")
+    model = SimpleNamespace(name="DescribeVolumes")
+    context: dict = {}
+    params = {"url_path": "/", "body": {"Action": "DescribeVolumes"}}
+    assert not serve_cached_response(
+        model=model, params=params, context=context, scope=scope
+    )
+    # A mutating call completes while the describe call is in flight
+    make_call("DeleteVolume", {"VolumeId": "vol-1"}, scope, {})
+    store_or_invalidate(
+        http_response=SimpleNamespace(status_code=200),
+        parsed=VOLUMES_RESPONSE,
+        model=model,
+        context=context,
+        scope=scope,
+    )
+    assert not make_call("DescribeVolumes", {}, scope, {})[0]
+
+
+def test_get_credentials_identity():
+    def session(access_key):
+        credentials = (
+            SimpleNamespace(access_key=access_key) if access_key else None
+        )
+        return SimpleNamespace(get_credentials=lambda: credentials)
+
+    assert get_credentials_identity(session("AKIA1")) != (
+        get_credentials_identity(session("AKIA2"))
+    )
+    assert get_credentials_identity(session("AKIA1")) != (
+        get_credentials_identity(session("AKIA1"), "http://localhost:4566")
+    )
+    assert get_credentials_identity(session("")) == ""
@@ -1,13 +1,16 @@
+import dataclasses
 import datetime
 import os
+import time
 import unittest
 
+import pytest
 from dateutil.tz import tzutc
 
 from pg_spot_operator.cloud_api import (
     boto3_api_instance_list_to_instance_type_info,
 )
-from pg_spot_operator.cloud_impl import aws_spot
+from pg_spot_operator.cloud_impl import aws_cache, aws_spot
 from pg_spot_operator.cloud_impl.aws_spot import (
     get_current_hourly_spot_price_boto3,
     get_current_hourly_ondemand_price,
@@ -612,6 +615,29 @@ def test_filter_instances():
     assert len(filtered_ram) == 2
 
 
+def test_filter_instances_multiple_rows_per_instance_type():
+    iti = boto3_api_instance_list_to_instance_type_info(
+        "dummy-reg", INSTANCE_LISTING
+    )
+    per_az = []
+    for az in ["dummy-reg-a", "dummy-reg-b"]:
+        for x in iti:
+            per_az.append(dataclasses.replace(x, availability_zone=az))
+    filtered = filter_instance_types_by_hw_req(
+        per_az,
+        storage_min=10,
+        storage_type=MF_SEC_VM_STORAGE_TYPE_LOCAL,
+    )
+    assert len(filtered) == 4
+    assert all(any(f is x for x in per_az) for f in filtered)
+    for instance_type in {x.instance_type for x in filtered}:
+        assert [
+            x.availability_zone
+            for x in filtered
+            if x.instance_type == instance_type
+        ] == ["dummy-reg-a", "dummy-reg-b"]
+
+
 def test_get_avg_spot_price_from_pricing_history_data_by_sku_and_az():
     sku_az_price_data = (
         aws_spot.get_avg_spot_price_from_pricing_history_data_by_sku_and_az(
@@ -733,3 +759,267 @@ def test_attach_pricing_info_to_instance_type_info():
             and x.hourly_ondemand_price
             and x.hourly_spot_price
         )
+
+
+def test_get_spot_pricing_data_for_skus_over_period(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    fetches: list[datetime.datetime] = []
+
+    def fake_fetch(instance_types, region, start_time, az=None, end_time=None):
+        fetches.append(start_time)
+        return PRICING_DATA
+
+    monkeypatch.setattr(
+        aws_spot, "fetch_spot_pricing_data_for_skus_since", fake_fetch
+    )
+    instance_types = list({x["InstanceType"] for x in PRICING_DATA})
+    lookback = datetime.timedelta(days=36500)
+    for _ in range(2):
+        pricing_data = aws_spot.get_spot_pricing_data_for_skus_over_period(
+            instance_types, "eu-north-1", lookback
+        )
+        assert sorted(
+            (
+                x["InstanceType"],
+                x["AvailabilityZone"],
+                float(x["SpotPrice"]),
+                x["Timestamp"],
+            )
+            for x in pricing_data
+        ) == sorted(
+            (
+                x["InstanceType"],
+                x["AvailabilityZone"],
+                float(x["SpotPrice"]),
+                x["Timestamp"],
+            )
+            for x in PRICING_DATA
+        )
+    assert len(fetches) == 1  # Within SPOT_HISTORY_SYNC_INTERVAL_S
+
+    # Delta only on next sync
+    monkeypatch.setattr(aws_spot, "SPOT_HISTORY_SYNC_INTERVAL_S", 0)
+    aws_spot.get_spot_pricing_data_for_skus_over_period(
+        instance_types, "eu-north-1", lookback
+    )
+    assert len(fetches) == 2
+    assert fetches[1] > datetime.datetime.now(
+        datetime.timezone.utc
+    ) - datetime.timedelta(hours=1)
+
+
+def test_sync_spot_price_history_store_backfills(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    fetches: list[tuple] = []
+
+    def fake_fetch(instance_types, region, start_time, az=None, end_time=None):
+        assert start_time.tzinfo and (not end_time or end_time.tzinfo)
+        fetches.append((start_time.timestamp(), end_time))
+        return []
+
+    monkeypatch.setattr(
+        aws_spot, "fetch_spot_pricing_data_for_skus_since", fake_fetch
+    )
+    now = time.time()
+    aws_spot.sync_spot_price_history_store(
+        ["m6i.large"], "eu-north-1", now - 86400
+    )
+    assert len(fetches) == 1
+    # A longer period than synced before fetches only the older part
+    aws_spot.sync_spot_price_history_store(
+        ["m6i.large"], "eu-north-1", now - 7 * 86400
+    )
+    assert len(fetches) == 2
+    start, end = fetches[1]
+    assert start == pytest.approx(now - 7 * 86400, abs=1)
+    assert end.timestamp() == pytest.approx(now - 86400, abs=1)
+    # Fully covered now
+    aws_spot.sync_spot_price_history_store(
+        ["m6i.large"], "eu-north-1", now - 3 * 86400
+    )
+    assert len(fetches) == 2
+
+
+def test_spot_price_stats_window_longer_than_prior_sync(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    now = time.time()
+    # Price changing every 12h over the last 8 days, stable over the last day
+    history = [
+        (now - h * 3600, 0.1 if (h // 12) % 2 else 0.2)
+        for h in range(24, 8 * 24, 12)
+    ]
+
+    def fake_fetch(instance_types, region, start_time, az=None, end_time=None):
+        start = start_time.timestamp()
+        end = end_time.timestamp() if end_time else now
+        in_effect_at_start = max(ts for ts, _ in history if ts <= start)
+        return [
+            {
+                "AvailabilityZone": zone,
+                "InstanceType": instance_type,
+                "SpotPrice": str(price),
+                "Timestamp": datetime.datetime.fromtimestamp(
+                    ts, datetime.timezone.utc
+                ),
+            }
+            for instance_type in instance_types
+            for ts, price in history
+            # Only m5.large history returned without the price in effect at start
+            for zone in ["eu-north-1a"]
+            if in_effect_at_start <= ts <= end
+            and (instance_type != "m5.large" or ts > start + 3600)
+        ]
+
+    monkeypatch.setattr(
+        aws_spot, "fetch_spot_pricing_data_for_skus_since", fake_fetch
+    )
+    aws_spot.get_spot_pricing_data_for_skus_over_period(
+        ["m6i.large", "m5.large"], "eu-north-1", datetime.timedelta(days=1)
+    )
+    stats = aws_spot.get_spot_price_stats_by_sku_and_az_over_period(
+        ["m6i.large", "m5.large"], "eu-north-1", datetime.timedelta(days=7)
+    )
+    s = stats[("m6i.large", "eu-north-1a")]
+    assert s.price_changes > 10
+    assert s.volatility > 0.3
+    # Partial history, not to be ranked as stable
+    assert ("m5.large", "eu-north-1a") not in stats
+
+
+def test_get_all_ec2_spot_instance_types_disk_catalog(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    describe_calls = []
+
+    def describe(region, with_local_storage_only=False):
+        describe_calls.append(region)
+        if len(describe_calls) > 2:
+            raise Exception("API down")
+        return INSTANCE_LISTING
+
+    monkeypatch.setattr(
+        aws_spot, "describe_all_ec2_spot_instance_types", describe
+    )
+    memoized = aws_spot.get_all_ec2_spot_instance_types
+
+    for _ in range(2):  # A "new process" starts from the on-disk copy
+        memoized.cache_clear()
+        assert (
+            aws_spot.get_all_ec2_spot_instance_types("eu-north-1")
+            == INSTANCE_LISTING
+        )
+    assert describe_calls == ["eu-north-1"]
+
+    # Expired catalogs are re-fetched, or used as is if the API call fails
+    cache_file = aws_cache.get_boto3_catalog_cache_file_name("eu-north-1")
+    cache_path = aws_cache.get_pricing_cache_file_path(cache_file)
+    os.utime(cache_path, (0, time.time() - 8 * 86400))
+    memoized.cache_clear()
+    assert (
+        aws_spot.get_all_ec2_spot_instance_types("eu-north-1")
+        == INSTANCE_LISTING
+    )
+    assert len(describe_calls) == 2
+
+    os.utime(cache_path, (0, time.time() - 8 * 86400))
+    memoized.cache_clear()
+    assert (
+        aws_spot.get_all_ec2_spot_instance_types("eu-north-1")
+        == INSTANCE_LISTING
+    )
+    assert len(describe_calls) == 3
+    memoized.cache_clear()
+
+
+def test_resolve_hardware_requirements_from_zonal_price_snapshot(
+    tmpdir, monkeypatch
+):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    monkeypatch.setattr(
+        aws_spot,
+        "extract_instance_type_eviction_rates_from_public_eviction_info",
+        lambda region: {},
+    )
+    fetches = []
+
+    def fake_fetch(region):
+        fetches.append(region)
+        ts = datetime.datetime(2024, 5, 8, 9, 31, 30, tzinfo=tzutc())
+        return [
+            {
+                "AvailabilityZone": az,
+                "InstanceType": it,
+                "SpotPrice": price,
+                "Timestamp": ts + datetime.timedelta(minutes=minutes),
+            }
+            for it, az, price, minutes in [
+                ("i3.2xlarge", "eu-north-1a", "0.5", 0),
+                ("i3.2xlarge", "eu-north-1a", "0.2", 5),  # Latest wins
+                ("i3.2xlarge", "eu-north-1b", "0.25", 0),
+                ("r7a.2xlarge", "eu-north-1b", "0.3", 0),
+                ("x2gd.large", "eu-north-1b", "0.01", 0),  # Not qualified
+            ]
+        ]
+
+    monkeypatch.setattr(
+        aws_spot, "fetch_current_spot_prices_for_region", fake_fetch
+    )
+    catalog = (
+        aws_spot.build_instance_type_catalog_from_aws_regional_pricing_info(
+            "eu-north-1", REGIONAL_PRICING_INFO
+        )
+    )
+    for _ in range(2):
+        skus = aws_spot.resolve_hardware_requirements_to_instance_types(
+            catalog, "eu-north-1", 10, use_boto3=True, cpu_min=4
+        )
+        assert [
+            (x.instance_type, x.availability_zone, x.hourly_spot_price)
+            for x in skus
+        ] == [
+            ("i3.2xlarge", "eu-north-1a", 0.2),
+            ("i3.2xlarge", "eu-north-1b", 0.25),
+            ("r7a.2xlarge", "eu-north-1b", 0.3),
+        ]
+    assert fetches == ["eu-north-1"]  # Served from the pricing store
+
+    skus = aws_spot.resolve_hardware_requirements_to_instance_types(
+        catalog,
+        "eu-north-1",
+        10,
+        use_boto3=True,
+        cpu_min=4,
+        availability_zone="eu-north-1b",
+    )
+    assert [x.instance_type for x in skus] == ["i3.2xlarge", "r7a.2xlarge"]
+
+
+def test_resolve_hardware_requirements_prices_only_returned_skus(
+    tmpdir, monkeypatch
+):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    monkeypatch.setattr(
+        aws_spot, "get_aws_static_ondemand_price_index", lambda region: {}
+    )
+    priced: list[str] = []
+
+    def fake_attach(instance_types):
+        priced.extend(x.instance_type for x in instance_types)
+        return instance_types
+
+    monkeypatch.setattr(
+        aws_spot, "attach_pricing_info_to_instance_type_info", fake_attach
+    )
+    catalog = (
+        aws_spot.build_instance_type_catalog_from_aws_regional_pricing_info(
+            "eu-north-1", REGIONAL_PRICING_INFO
+        )
+    )
+    skus = aws_spot.resolve_hardware_requirements_to_instance_types(
+        catalog, "eu-north-1", 1, persistent_vms=True, cpu_min=4
+    )
+    assert len(skus) == 1 and not skus[0].is_spot
+    assert priced == [skus[0].instance_type]
+    assert skus[0].hourly_ondemand_price == min(
+        catalog.hourly_ondemand_price[row]
+        for row in catalog.filter_rows(cpu_min=4)
+    )
@@ -0,0 +1,52 @@
+from statistics import mean, median
+
+from pg_spot_operator.cloud_impl.aws_cache import build_eviction_rate_index
+from pg_spot_operator.cloud_impl.aws_spot_summary import (
+    build_eviction_rate_columns,
+    percentile,
+    summarize_spot_savings_and_eviction_rates,
+)
+from tests.test_aws_spot import PUBLIC_EVICTION_RATE_INFO
+
+
+def test_summarize_spot_savings_and_eviction_rates():
+    index = build_eviction_rate_index("", PUBLIC_EVICTION_RATE_INFO)
+    index["regions"]["xx-south-1"] = {"m6g.large": [4, 50]}
+    columns = build_eviction_rate_columns(index)
+    assert columns.regions == ["eu-north-1", "xx-south-1"]
+
+    linux = PUBLIC_EVICTION_RATE_INFO["spot_advisor"]["eu-north-1"]["Linux"]
+    savings = [x["s"] for x in linux.values()]
+
+    stats = summarize_spot_savings_and_eviction_rates(columns)
+    assert [s.region for s in stats] == ["eu-north-1", "xx-south-1"]
+    s = stats[0]
+    assert s.avg_spot_savings_rate == round(mean(savings), 1)
+    assert s.median_spot_savings_rate == median(savings)
+    assert s.avg_eviction_rate_group == round(
+        mean(x["r"] for x in linux.values())
+    )
+    assert s.eviction_rate_group_label == "5-10%"
+    assert s.instance_type_count == len(linux)
+    assert sum(s.eviction_rate_group_counts.values()) == len(linux)
+    assert s.eviction_rate_group_counts[3] == 1
+    assert stats[1].eviction_rate_group_label == ">20%"
+
+    # Filters
+    stats = summarize_spot_savings_and_eviction_rates(
+        columns, regions=["eu-north-1"], cpu_arch="arm"
+    )
+    assert len(stats) == 1
+    assert stats[0].instance_type_count == len(
+        [x for x in linux if "g" in x.split(".")[0][1:]]
+    )
+    assert not summarize_spot_savings_and_eviction_rates(
+        columns, instance_family="^x9"
+    )
+
+
+def test_percentile():
+    assert percentile([], 90) == 0
+    assert percentile([1], 90) == 1
+    assert percentile(list(range(1, 11)), 90) == 9
+    assert percentile(list(range(1, 11)), 50) == 5
@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+
+from pg_spot_operator.cloud_impl import aws_cache, cache_manager
+from pg_spot_operator.cloud_impl.cache_manager import (
+    get_cache_file_kind,
+    prune_cache_dir,
+    summarize_cache_dir,
+)
+
+
+def test_get_cache_file_kind():
+    assert get_cache_file_kind("aws_spot_2024111_1000.json.gz") == "spot"
+    assert get_cache_file_kind("aws_spot.meta.json.gz") == "meta"
+    assert (
+        get_cache_file_kind("aws_eviction_rate_2024111_1000.eu-north-1.json")
+        == "eviction_rate"
+    )
+    assert get_cache_file_kind("aws_spot_2024111_1000.json.x1y2z3") == "temp"
+    assert (
+        get_cache_file_kind("aws_boto3_catalog_eu-north-1_local.json.gz")
+        == "boto3_catalog"
+    )
+    assert get_cache_file_kind("pricing.db-wal") == "other"
+
+
+def write_file(path, size: int, age_s: float, atime_age_s: float = 0):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    now = time.time()
+    os.utime(path, (now - atime_age_s, now - age_s))
+
+
+def test_prune_cache_dir(tmpdir):
+    d = str(tmpdir)
+    write_file(os.path.join(d, "aws_spot_old.json.gz"), 10, 3 * 86400)
+    write_file(os.path.join(d, "aws_ondemand_a.json.gz"), 100, 0, 30)
+    write_file(os.path.join(d, "aws_ondemand_b.json.gz"), 100, 0, 10)
+    write_file(os.path.join(d, "aws_ondemand_c.json.gz"), 100, 0, 60)
+    write_file(os.path.join(d, "aws_spot.meta.json.gz"), 10, 0, 100)
+    write_file(os.path.join(d, "pricing.db"), 1000, 0, 100)
+
+    pruned = prune_cache_dir(
+        d, max_bytes=1250, protected_files={"aws_ondemand_c.json.gz"}
+    )
+    # Retention first, then least recently accessed unprotected files
+    assert pruned["deleted_files"] == 2
+    assert sorted(os.listdir(d)) == [
+        "aws_ondemand_b.json.gz",
+        "aws_ondemand_c.json.gz",
+        "aws_spot.meta.json.gz",
+        "pricing.db",
+    ]
+    assert pruned["total_bytes"] == 1210
+
+    stats = summarize_cache_dir(d, {"ondemand": {"hits": 3, "misses": 1}})
+    assert stats["ondemand"]["files"] == 2
+    assert stats["ondemand"]["bytes"] == 200
+    assert stats["ondemand"]["hits"] == 3
+
+
+def test_price_cache_read_stats(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    monkeypatch.setattr(cache_manager, "cache_read_counters", {})
+    aws_cache.write_pricing_cache_file_as_json("aws_spot_1.json", {"a": 1})
+    aws_cache.get_cached_pricing_dict("aws_spot_1.json")
+    aws_cache.get_cached_pricing_dict("aws_spot_2.json")
+
+    stats = aws_cache.get_price_cache_stats()
+    assert stats["spot"]["hits"] == 1
+    assert stats["spot"]["misses"] == 1
+    assert stats["spot"]["files"] == 1
+    assert not cache_manager.cache_read_counters
+
+
+def test_cache_read_counters_concurrent_pop(monkeypatch):
+    monkeypatch.setattr(cache_manager, "cache_read_counters", {})
+    popped: list[dict] = []
+
+    def read():
+        for _ in range(2000):
+            cache_manager.record_cache_read("aws_spot_1.json", True)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        popped.append(cache_manager.pop_cache_read_counters())
+    for t in threads:
+        t.join()
+    popped.append(cache_manager.pop_cache_read_counters())
+    assert sum(c.get("spot", {}).get("hits", 0) for c in popped) == 8000
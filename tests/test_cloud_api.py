@@ -1,7 +1,12 @@
+import time
+
+from pg_spot_operator import cloud_api, manifests
 from pg_spot_operator.cloud_api import (
     boto3_api_instance_list_to_instance_type_info,
 )
+from pg_spot_operator.cloud_impl.cloud_structs import InstanceTypeInfo
 from tests.test_aws_spot import INSTANCE_LISTING
+from tests.test_manifests import TEST_MANIFEST
 
 
 def test_boto3_api_instance_list_to_instance_type_info():
@@ -19,3 +24,34 @@ def test_boto3_api_instance_list_to_instance_type_info():
     assert as_dict["r6gd.medium"].storage_speed_class == "ssd"
     assert as_dict["r6gd.medium"].ram_mb == 8192
     assert as_dict["r6gd.medium"].cpu == 1
+
+
+def test_resolve_hardware_requirements_to_instance_types_multi_region(
+    monkeypatch,
+):
+    m: manifests.InstanceManifest = manifests.load_manifest_from_string(
+        TEST_MANIFEST
+    )
+
+    def resolve_region(m, region, max_skus_to_get, skus_to_avoid, use_boto3):
+        if region == "r-fail":
+            raise Exception("boom")
+        if region == "r-noinfo":
+            return None
+        time.sleep(0.2 if region == "r-slow" else 0)
+        return [
+            InstanceTypeInfo(
+                instance_type=f"{region}.large", arch="x86", region=region
+            )
+        ]
+
+    monkeypatch.setattr(
+        cloud_api,
+        "resolve_hardware_requirements_to_instance_types_for_region",
+        resolve_region,
+    )
+    regions = ["r-slow", "r-fail", "r-fast", "r-noinfo", "r-fast2"]
+    skus = cloud_api.resolve_hardware_requirements_to_instance_types(
+        m, regions=regions, max_parallel_regions=3
+    )
+    assert [x.region for x in skus] == ["r-slow", "r-fast", "r-fast2"]
@@ -0,0 +1,57 @@
+from pg_spot_operator.cloud_impl import http_client
+from pg_spot_operator.cloud_impl.http_client import (
+    DEFAULT_HTTP_TIMEOUT,
+    get_http_download_stats,
+    get_http_session,
+    get_timeout_for_url,
+    get_transferred_bytes,
+    http_get,
+)
+
+
+def test_get_timeout_for_url():
+    assert get_timeout_for_url("https://ec2.shop/?region=x") == (3.05, 5)
+    assert get_timeout_for_url("https://example.com/x") == DEFAULT_HTTP_TIMEOUT
+
+
+def test_get_http_session():
+    s = get_http_session()
+    assert s is get_http_session()
+    assert "gzip" in s.headers["Accept-Encoding"]
+    assert s.get_adapter("https://ec2.shop").max_retries.total == 3
+
+
+class FakeResponse:
+    status_code = 200
+    content = b"12345"
+    headers = {"Content-Length": "3"}  # Compressed
+
+
+class FakeSession:
+    def __init__(self):
+        self.timeouts: list = []
+
+    def get(self, url, headers, timeout):
+        self.timeouts.append(timeout)
+        return FakeResponse()
+
+
+def test_http_get_records_stats(monkeypatch):
+    fake_session = FakeSession()
+    monkeypatch.setattr(http_client, "http_download_stats", {})
+    monkeypatch.setattr(http_client, "get_http_session", lambda: fake_session)
+
+    for _ in range(2):
+        http_get("https://ec2.shop/?region=x")
+    assert fake_session.timeouts == [(3.05, 5), (3.05, 5)]
+    stats = get_http_download_stats()
+    assert stats["ec2.shop"]["requests"] == 2
+    assert stats["ec2.shop"]["bytes"] == 6
+    assert stats["ec2.shop"]["failures"] == 0
+
+
+def test_get_transferred_bytes():
+    r = FakeResponse()
+    assert get_transferred_bytes(r) == 3
+    r.headers = {}
+    assert get_transferred_bytes(r) == 5  # No raw stream to ask either
@@ -0,0 +1,109 @@
+from pg_spot_operator.cloud_impl import aws_spot, instance_catalog
+from pg_spot_operator.cloud_impl.aws_spot import (
+    build_instance_type_catalog_from_aws_regional_pricing_info,
+)
+from pg_spot_operator.cloud_impl.cloud_structs import EvictionRateInfo
+from pg_spot_operator.cloud_impl.instance_catalog import InstanceTypeCatalog
+from pg_spot_operator.constants import MF_SEC_VM_STORAGE_TYPE_LOCAL
+from tests.test_aws_spot import REGIONAL_PRICING_INFO
+
+
+def test_instance_type_catalog():
+    catalog = build_instance_type_catalog_from_aws_regional_pricing_info(
+        "eu-north-1", REGIONAL_PRICING_INFO
+    )
+    assert len(catalog) == 3
+    assert catalog.specs.strings.count("x86") == 1  # Interned
+
+    rows = catalog.filter_rows(cpu_min=4)
+    assert [catalog.instance_types[r] for r in rows] == [
+        "i3.2xlarge",
+        "r7a.2xlarge",
+    ]
+    rows = catalog.filter_rows(
+        storage_type=MF_SEC_VM_STORAGE_TYPE_LOCAL, storage_speed_class="nvme"
+    )
+    assert [catalog.instance_types[r] for r in rows] == ["i3.2xlarge"]
+    assert not catalog.filter_rows(cpu_arch="arm")
+
+    catalog.set_eviction_rates(
+        {
+            "i3.2xlarge": EvictionRateInfo(
+                instance_type="i3.2xlarge",
+                region="eu-north-1",
+                spot_savings_rate=70,
+                eviction_rate_group=1,
+                eviction_rate_group_label="5-10%",
+                eviction_rate_max_pct=11,
+            )
+        }
+    )
+    iti = catalog.to_instance_type_info(
+        rows[0], availability_zone="eu-north-1a", hourly_spot_price=0.2
+    )
+    assert iti.instance_type == "i3.2xlarge"
+    assert iti.availability_zone == "eu-north-1a"
+    assert iti.hourly_spot_price == 0.2
+    assert iti.hourly_ondemand_price == 0.652
+    assert iti.monthly_ondemand_price == 469
+    assert iti.instance_storage == 1900
+    assert iti.storage_speed_class == "nvme"
+    assert iti.max_eviction_rate == 11
+    assert iti.eviction_rate_group_label == "5-10%"
+
+    # Round trip
+    again = InstanceTypeCatalog.from_instance_type_infos(
+        catalog.to_instance_type_infos()
+    )
+    assert again.to_instance_type_infos() == catalog.to_instance_type_infos()
+
+
+def test_instance_specs_shared_across_regions(monkeypatch):
+    parsed = []
+    add_spec = aws_spot.add_instance_spec_from_aws_pricing_sku_data
+
+    def add_spec_counting(specs, sku_data):
+        parsed.append(sku_data["Instance Type"])
+        return add_spec(specs, sku_data)
+
+    monkeypatch.setattr(
+        aws_spot,
+        "add_instance_spec_from_aws_pricing_sku_data",
+        add_spec_counting,
+    )
+    monkeypatch.setattr(instance_catalog, "instance_spec_tables", {})
+    a = build_instance_type_catalog_from_aws_regional_pricing_info(
+        "eu-north-1", REGIONAL_PRICING_INFO
+    )
+    b = build_instance_type_catalog_from_aws_regional_pricing_info(
+        "eu-west-1", REGIONAL_PRICING_INFO
+    )
+    assert len(parsed) == 3
+    assert a.specs is b.specs
+    assert list(a.spec_row) == list(b.spec_row)
+    assert [x.region for x in b.to_instance_type_infos()] == ["eu-west-1"] * 3
+    assert [x.cpu for x in a.to_instance_type_infos()] == [
+        x.cpu for x in b.to_instance_type_infos()
+    ]
+
+
+def test_resolve_hardware_requirements_from_catalog(monkeypatch):
+    monkeypatch.setattr(
+        aws_spot,
+        "extract_instance_type_eviction_rates_from_public_eviction_info",
+        lambda region: {},
+    )
+    catalog = build_instance_type_catalog_from_aws_regional_pricing_info(
+        "eu-north-1",
+        REGIONAL_PRICING_INFO,
+        spot_prices={"r7a.2xlarge": 0.3, "i3.2xlarge": 0.2},
+    )
+    assert len(catalog) == 2
+    skus = aws_spot.resolve_hardware_requirements_to_instance_types(
+        catalog, "eu-north-1", 3, cpu_min=4
+    )
+    assert [(x.instance_type, x.hourly_spot_price) for x in skus] == [
+        ("i3.2xlarge", 0.2),
+        ("r7a.2xlarge", 0.3),
+    ]
+    assert skus[0].monthly_spot_price == 144
@@ -4,6 +4,7 @@ from pg_spot_operator.instance_type_selection import (
     SELECTION_STRATEGY_EVICTION_RATE,
     SELECTION_STRATEGY_CHEAPEST,
     SELECTION_STRATEGY_BALANCED,
+    SELECTION_STRATEGY_PRICE_STABILITY,
 )
 
 INSTANCE_TYPES: list[InstanceTypeInfo] = [
@@ -75,3 +76,47 @@ def test_strategy_balanced():
         INSTANCE_TYPES
     )[0]
     assert siti.instance_type == "i4"
+
+
+def test_strategy_price_stability():
+    instance_selection_strategy_cls = (
+        InstanceTypeSelection.get_selection_strategy(
+            SELECTION_STRATEGY_PRICE_STABILITY
+        )
+    )
+    instance_types = [
+        InstanceTypeInfo(
+            instance_type="i1",
+            region="r1",
+            arch="x86",
+            hourly_spot_price=1.0,
+            spot_price_p50=1.0,
+            spot_price_volatility=0.5,
+        ),
+        InstanceTypeInfo(
+            instance_type="i2",
+            region="r1",
+            arch="x86",
+            hourly_spot_price=1.1,
+            spot_price_p50=1.1,
+            spot_price_volatility=0.05,
+        ),
+        InstanceTypeInfo(  # No history stats
+            instance_type="i3",
+            region="r1",
+            arch="x86",
+            hourly_spot_price=0.5,
+        ),
+    ]
+    assert [
+        x.instance_type
+        for x in instance_selection_strategy_cls.execute(instance_types)
+    ] == ["i2", "i1", "i3"]
+
+    # Falls back to cheapest without any stats
+    assert (
+        instance_selection_strategy_cls.execute(INSTANCE_TYPES)[
+            0
+        ].instance_type
+        == "i1"
+    )
@@ -138,3 +138,31 @@ def test_multi_instance():
     )
     assert m
     assert len(m.vm.instance_types) == 2
+
+
+TEST_MANIFEST_AWS_TRANSPORT = """
+---
+api_version: v1
+kind: pg_spot_operator_instance
+cloud: aws
+region: eu-west-1
+instance_name: hello
+aws:
+  transport:
+    retry_mode: adaptive
+    max_attempts: 5
+    connect_timeout_s: 3
+"""
+
+
+def test_aws_transport():
+    m: manifests.InstanceManifest = manifests.load_manifest_from_string(
+        TEST_MANIFEST_AWS_TRANSPORT
+    )
+    assert m.aws.transport.retry_mode == "adaptive"
+    assert m.aws.transport.max_attempts == 5
+    assert m.aws.transport.read_timeout_s == 0
+    assert m.aws.transport.tcp_keepalive is None
+    assert not manifests.try_load_manifest_from_string(
+        TEST_MANIFEST_AWS_TRANSPORT.replace("adaptive", "aggressive")
+    )
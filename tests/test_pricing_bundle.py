@@ -0,0 +1,69 @@
+import tarfile
+
+import pytest
+
+from pg_spot_operator.cloud_impl import aws_cache, http_client
+from pg_spot_operator.cloud_impl.pricing_bundle import (
+    add_bytes_to_tar,
+    export_pricing_bundle,
+    import_pricing_bundle,
+)
+from tests.test_aws_spot import SPOT_PRICING_INFO_S3_JSON_SAMPLE
+
+
+def test_export_import_pricing_bundle(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir.join("a")))
+    monkeypatch.setattr(aws_cache, "pricing_index_memo", {})
+    aws_cache.write_pricing_cache_file_as_json(
+        "aws_spot_1.json", SPOT_PRICING_INFO_S3_JSON_SAMPLE
+    )
+    aws_cache.write_pricing_cache_file_as_json("aws_spot_0.json", {})
+    aws_cache.write_pricing_cache_file_as_json(
+        "aws_spot.meta.json",
+        {
+            "url": aws_cache.SPOT_PRICING_URL,
+            "cache_file": "aws_spot_1.json",
+            "checked_for": "aws_spot_1.json",
+        },
+    )
+    bundle = str(tmpdir.join("bundle.tar.gz"))
+    manifest = export_pricing_bundle(bundle, [])
+    assert [f["name"] for f in manifest["files"]] == [
+        "aws_spot.meta.json.gz",
+        "aws_spot_1.json.gz",
+    ]
+
+    # Fresh host, no network
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir.join("b")))
+    monkeypatch.setattr(http_client, "offline", True)
+    assert not aws_cache.get_spot_prices_for_region("us-east-1")
+    import_pricing_bundle(bundle)
+    assert (
+        aws_cache.get_spot_prices_for_region("us-east-1")["m6g.xlarge"]
+        == 0.0378
+    )
+
+
+def test_import_pricing_bundle_rejects_unknown_files(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    bundle = str(tmpdir.join("bundle.tar.gz"))
+    with tarfile.open(bundle, "w:gz") as tar:
+        manifest = b'{"format_version": 1, "files": [{"name": "../x.json", "sha256": ""}]}'
+        add_bytes_to_tar(tar, "bundle_manifest.json", manifest)
+    with pytest.raises(Exception, match="Unexpected file"):
+        import_pricing_bundle(bundle)
+
+
+def test_import_pricing_bundle_missing_members(tmpdir, monkeypatch):
+    monkeypatch.setattr(aws_cache, "DEFAULT_CONFIG_DIR", str(tmpdir))
+    bundle = str(tmpdir.join("bundle.tar.gz"))
+    with tarfile.open(bundle, "w:gz") as tar:
+        add_bytes_to_tar(tar, "aws_spot_2024111_1000.json", b"{}")
+    with pytest.raises(Exception, match="bundle_manifest.json missing"):
+        import_pricing_bundle(bundle)
+
+    with tarfile.open(bundle, "w:gz") as tar:
+        manifest = b'{"format_version": 1, "files": [{"name": "aws_spot_2024111_1000.json", "sha256": ""}]}'
+        add_bytes_to_tar(tar, "bundle_manifest.json", manifest)
+    with pytest.raises(Exception, match="aws_spot_2024111_1000.json missing"):
+        import_pricing_bundle(bundle)
@@ -0,0 +1,179 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from pg_spot_operator.cloud_impl.pricing_store import (
+    METRIC_ONDEMAND_PRICE,
+    PRICING_DB_DDL_MIGRATIONS,
+    connect,
+    ensure_schema,
+    METRIC_SPOT_PRICE,
+    get_current_pricing,
+    get_current_values,
+    get_current_zonal_values,
+    get_feed_ingest,
+    get_spot_price_history,
+    get_spot_price_history_synced_ranges,
+    get_value_history,
+    replace_current_values,
+    replace_current_zonal_values,
+    store_spot_price_history,
+)
+
+
+def test_replace_current_values(tmpdir):
+    db = str(tmpdir.join("pricing.db"))
+
+    changed = replace_current_values(
+        db,
+        "aws_spot",
+        "aws_spot_1.json",
+        METRIC_SPOT_PRICE,
+        {"us-east-1": {"m6i.xlarge": 0.06, "m6g.xlarge": 0.04}},
+    )
+    assert changed == 2
+    assert get_feed_ingest(db, "aws_spot")["cache_file"] == "aws_spot_1.json"
+
+    # Only the changed price lands in history, dropped types get removed
+    changed = replace_current_values(
+        db,
+        "aws_spot",
+        "aws_spot_2.json",
+        METRIC_SPOT_PRICE,
+        {"us-east-1": {"m6i.xlarge": 0.05}},
+    )
+    assert changed == 1
+    assert get_current_values(db, METRIC_SPOT_PRICE) == {
+        "us-east-1": {"m6i.xlarge": 0.05}
+    }
+    assert [
+        p for _, p in get_value_history(db, "us-east-1", "m6i.xlarge")
+    ] == [0.06, 0.05]
+    assert get_value_history(db, "us-east-1", "m6g.xlarge")
+
+
+def test_get_current_pricing(tmpdir):
+    db = str(tmpdir.join("pricing.db"))
+    replace_current_values(
+        db,
+        "aws_spot",
+        "aws_spot_1.json",
+        METRIC_SPOT_PRICE,
+        {
+            "us-east-1": {"m6i.xlarge": 0.06},
+            "eu-north-1": {"m6i.xlarge": 0.04},
+        },
+    )
+    replace_current_values(
+        db,
+        "aws_ondemand_eu-north-1",
+        "aws_ondemand_eu-north-1_1.json",
+        METRIC_ONDEMAND_PRICE,
+        {"eu-north-1": {"m6i.xlarge": 0.2}},
+    )
+    rows = get_current_pricing(db, instance_type="m6i.xlarge")
+    assert [r["region"] for r in rows] == ["eu-north-1", "us-east-1"]
+    assert rows[0]["ondemand_price"] == 0.2
+    assert rows[1]["ondemand_price"] is None
+    assert "eviction_group" not in rows[0]
+    assert len(get_current_pricing(db, regions=["us-east-1"])) == 1
+
+
+def test_spot_price_history(tmpdir):
+    db = str(tmpdir.join("pricing.db"))
+    assert not get_spot_price_history_synced_ranges(
+        db, "eu-north-1", ["m6i.large"]
+    )
+    store_spot_price_history(
+        db,
+        "eu-north-1",
+        [
+            ("m6i.large", "eu-north-1a", 100, 0.1),
+            ("m6i.large", "eu-north-1a", 200, 0.2),
+            ("m6i.large", "eu-north-1a", 300, 0.3),
+            ("m6i.large", "eu-north-1b", 250, 0.05),
+        ],
+        {"m6i.large": (50, 400)},
+        "",
+    )
+    # Re-fetched overlapping points are ignored
+    store_spot_price_history(
+        db,
+        "eu-north-1",
+        [("m6i.large", "eu-north-1a", 300, 0.3)],
+        {"m6i.large": (250, 500)},
+        "eu-north-1a",
+    )
+    # The all-zones sync reaches further back
+    assert get_spot_price_history_synced_ranges(
+        db, "eu-north-1", ["m6i.large"], "eu-north-1a"
+    ) == {"m6i.large": (50, 400)}
+    assert get_spot_price_history_synced_ranges(
+        db, "eu-north-1", ["m6i.large"]
+    ) == {"m6i.large": (50, 400)}
+    store_spot_price_history(
+        db, "eu-north-1", [], {"m6i.large": (20, 600)}, "eu-north-1a"
+    )
+    assert get_spot_price_history_synced_ranges(
+        db, "eu-north-1", ["m6i.large"], "eu-north-1a"
+    ) == {"m6i.large": (20, 600)}
+
+    # Price in effect at "since" is included
+    hist = get_spot_price_history(
+        db, "eu-north-1", ["m6i.large"], 210, "eu-north-1a"
+    )
+    assert [ts for _, _, ts, _ in hist] == [300, 200]
+    # All zones
+    hist = get_spot_price_history(db, "eu-north-1", ["m6i.large"], 210)
+    assert [(az, ts) for _, az, ts, _ in hist] == [
+        ("eu-north-1a", 300),
+        ("eu-north-1b", 250),
+        ("eu-north-1a", 200),
+    ]
+
+
+def test_current_zonal_values(tmpdir):
+    db = str(tmpdir.join("pricing.db"))
+    replace_current_values(
+        db, "aws_spot", "f1", METRIC_SPOT_PRICE, {"eu-north-1": {"a": 1}}
+    )
+    assert (
+        replace_current_zonal_values(
+            db,
+            "aws_spot_zonal/eu-north-1",
+            "eu-north-1",
+            METRIC_SPOT_PRICE,
+            {
+                "a": {"eu-north-1a": 0.5, "eu-north-1b": 0.6},
+                "b": {"eu-north-1a": 1},
+            },
+        )
+        == 3
+    )
+    assert (
+        replace_current_zonal_values(
+            db,
+            "aws_spot_zonal/eu-north-1",
+            "eu-north-1",
+            METRIC_SPOT_PRICE,
+            {"a": {"eu-north-1a": 0.5, "eu-north-1b": 0.7}},
+        )
+        == 1
+    )
+    assert get_current_zonal_values(db, METRIC_SPOT_PRICE, "eu-north-1") == {
+        "a": {"eu-north-1a": 0.5, "eu-north-1b": 0.7}
+    }
+    # Region level values are separate
+    assert get_current_values(db, METRIC_SPOT_PRICE) == {
+        "eu-north-1": {"a": 1}
+    }
+    assert get_feed_ingest(db, "aws_spot_zonal/eu-north-1")["ingested_at"]
+
+
+def test_ensure_schema_concurrent_processes(tmpdir):
+    db = str(tmpdir.join("pricing.db"))
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        for f in [executor.submit(ensure_schema, db) for _ in range(8)]:
+            f.result()
+    with connect(db) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(
+            PRICING_DB_DDL_MIGRATIONS
+        )
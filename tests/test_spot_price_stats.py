@@ -0,0 +1,52 @@
+from pg_spot_operator.cloud_impl.spot_price_stats import (
+    compute_spot_price_stats,
+    compute_spot_price_stats_by_sku_and_az,
+)
+
+DAY = 86400
+
+
+def test_compute_spot_price_stats():
+    # Price in effect at window start + 2 changes
+    stats = compute_spot_price_stats(
+        "m6i.large",
+        "eu-north-1a",
+        [(2 * DAY, 0.2), (-DAY, 0.1), (3 * DAY, 0.1)],
+        0,
+        4 * DAY,
+    )
+    assert stats.price_changes == 2
+    assert stats.mean_price == 0.125
+    assert stats.p50_price == 0.1
+    assert stats.p90_price == 0.2
+    assert 0.3 < stats.volatility < 0.4
+
+    flat = compute_spot_price_stats(
+        "m6i.large", "eu-north-1a", [(0, 0.1), (DAY, 0.1)], 0, 2 * DAY
+    )
+    assert flat.volatility == 0 and flat.price_changes == 0
+    assert flat.trend == 0
+
+    rising = compute_spot_price_stats(
+        "m6i.large",
+        "eu-north-1a",
+        [(0, 0.1), (DAY, 0.2), (2 * DAY, 0.3)],
+        0,
+        3 * DAY,
+    )
+    assert rising.trend > 0
+
+
+def test_compute_spot_price_stats_by_sku_and_az():
+    by_sku_az = compute_spot_price_stats_by_sku_and_az(
+        [
+            ("m6i.large", "eu-north-1a", 0, 0.1),
+            ("m6i.large", "eu-north-1b", 0, 0.2),
+            ("m6i.large", "eu-north-1b", DAY, 0.3),
+        ],
+        0,
+        2 * DAY,
+    )
+    assert by_sku_az[("m6i.large", "eu-north-1a")].mean_price == 0.1
+    assert by_sku_az[("m6i.large", "eu-north-1b")].mean_price == 0.25
+    assert by_sku_az[("m6i.large", "eu-north-1b")].price_changes == 1
@@ -1,5 +1,7 @@
 import datetime
 import tempfile
+import threading
+import time
 
 import pytest
 
@@ -15,6 +17,9 @@ from pg_spot_operator.util import (
     extract_mtf_months_from_eviction_rate_group_label,
     pg_size_bytes,
     calc_discount_rate_str,
+    single_flight,
+    timed_cache,
+    get_timed_cache_stats,
 )
 from tests.test_manifests import TEST_MANIFEST_VAULT_SECRETS
 
@@ -138,3 +143,62 @@ def test_calc_discount_rate_as_str():
     assert calc_discount_rate_str(10, 0) == "N/A"
     assert calc_discount_rate_str(10, 100) == "-90"
     assert calc_discount_rate_str(10, 100, 1) == "-90.0"
+
+
+def test_single_flight():
+    calls = []
+    release = threading.Event()
+
+    @single_flight
+    def slow(x):
+        calls.append(x)
+        release.wait(5)
+        return x * 2
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(slow(2)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+    assert results == [4] * 5
+    assert calls == [2]
+    assert slow(3) == 6
+
+
+def test_timed_cache():
+    calls = []
+
+    @timed_cache(maxsize=2, seconds=0.3)
+    def f(x):
+        calls.append(x)
+        if x < 0:
+            raise ValueError(x)
+        return x * 2
+
+    assert f(1) == 2 and f(1) == 2
+    assert f(2) == 4
+    assert f(3) == 6  # Evicts 1 as least recently used
+    assert f(3) == 6
+    assert f(1) == 2
+    assert calls == [1, 2, 3, 1]
+
+    time.sleep(0.4)  # Expired
+    assert f(3) == 6
+    assert calls == [1, 2, 3, 1, 3]
+
+    for _ in range(2):  # Failures not cached
+        with pytest.raises(ValueError):
+            f(-1)
+    assert calls[-2:] == [-1, -1]
+
+    info = get_timed_cache_stats()[f.__module__ + "." + f.__qualname__]
+    assert info["hits"] == 2
+    assert info["evictions"] >= 2 and info["size"] == 2
+    f.cache_clear()
+    assert f.cache_info()["size"] == 0